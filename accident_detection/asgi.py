@@ -2,6 +2,12 @@
 ASGI config for accident_detection project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+HTTP requests go to Django; WebSocket connections on /ws/telemetry/ go to the
+device telemetry channel in api/device_socket.py.
+
+Run with:
+    uvicorn accident_detection.asgi:application
+    gunicorn accident_detection.asgi:application -k uvicorn_worker.UvicornWorker
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -13,4 +19,16 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "accident_detection.settings")
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up (it touches models)
+from api.device_socket import telemetry_socket  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope["type"] == "websocket":
+        if scope["path"].rstrip("/") == "/ws/telemetry":
+            return await telemetry_socket(scope, receive, send)
+        await send({"type": "websocket.close", "code": 4404})
+        return
+    return await django_application(scope, receive, send)
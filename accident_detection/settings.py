@@ -136,11 +136,9 @@ REST_FRAMEWORK = {
 }
 
 
-import firebase_admin
-from firebase_admin import credentials
-
-cred = credentials.Certificate("acpai-27f5f-firebase-adminsdk-fbsvc-5bf7c98989.json")
-firebase_admin.initialize_app(cred)
+# Firebase is initialized lazily on first use (api/utils.py), not at import
+FIREBASE_CREDENTIALS = os.environ.get("FIREBASE_CREDENTIALS", "acpai-27f5f-firebase-adminsdk-fbsvc-5bf7c98989.json")
+FCM_SERVER_KEY = os.environ.get("FCM_SERVER_KEY", "YOUR_FIREBASE_SERVER_KEY")
 
 
 
@@ -185,4 +183,111 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=90),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-}
\ No newline at end of file
+}
+
+# Sensor ingestion
+SENSOR_BATCH_MAX_READINGS = int(os.environ.get("SENSOR_BATCH_MAX_READINGS", 5000))
+
+# Sliding-window crash detector (api/streaming.py); windows are kept per worker process
+STREAMING_WINDOW_SIZE = int(os.environ.get("STREAMING_WINDOW_SIZE", 50))
+STREAMING_SAMPLE_RATE = int(os.environ.get("STREAMING_SAMPLE_RATE", 50))
+STREAMING_PEAK_ACC_THRESHOLD = float(os.environ.get("STREAMING_PEAK_ACC_THRESHOLD", 6.0))
+STREAMING_JERK_THRESHOLD = float(os.environ.get("STREAMING_JERK_THRESHOLD", 500.0))
+STREAMING_MIN_HITS = int(os.environ.get("STREAMING_MIN_HITS", 3))
+STREAMING_COOLDOWN_SECONDS = int(os.environ.get("STREAMING_COOLDOWN_SECONDS", 30))
+STREAMING_MAX_DEVICES = int(os.environ.get("STREAMING_MAX_DEVICES", 10000))
+
+# Push delivery (api/push_delivery.py)
+FCM_PROJECT_ID = os.environ.get("FCM_PROJECT_ID", "acpai-27f5f")
+FCM_ENDPOINT = os.environ.get("FCM_ENDPOINT", "https://fcm.googleapis.com")
+PUSH_BATCH_SIZE = int(os.environ.get("PUSH_BATCH_SIZE", 500))
+PUSH_MAX_WAIT_MS = int(os.environ.get("PUSH_MAX_WAIT_MS", 50))
+PUSH_MAX_RETRIES = int(os.environ.get("PUSH_MAX_RETRIES", 5))
+PUSH_CONCURRENCY = int(os.environ.get("PUSH_CONCURRENCY", 200))
+# A dispatcher's claim on a batch; past it, manage.py deliver_push may resend the rows
+PUSH_LEASE_SECONDS = int(os.environ.get("PUSH_LEASE_SECONDS", 300))
+
+# Transactional outbox (api/outbox.py)
+OUTBOX_IN_PROCESS = os.environ.get("OUTBOX_IN_PROCESS", "True") == "True"
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 100))
+OUTBOX_POLL_INTERVAL = float(os.environ.get("OUTBOX_POLL_INTERVAL", 5.0))
+ACCIDENT_ALERT_TOPIC = os.environ.get("ACCIDENT_ALERT_TOPIC", "accident-alerts")
+
+# Alert statistics (api/statistics.py); 0 disables the in-process cache
+ALERT_STATISTICS_CACHE_SECONDS = int(os.environ.get("ALERT_STATISTICS_CACHE_SECONDS", 0))
+# "rollup" reads hourly AlertRollup buckets (api/rollups.py); "raw" scans the alert tables
+ALERT_STATISTICS_SOURCE = os.environ.get("ALERT_STATISTICS_SOURCE", "rollup")
+
+# List endpoints (api/pagination.py)
+LIST_PAGE_SIZE = int(os.environ.get("LIST_PAGE_SIZE", 100))
+LIST_MAX_PAGE_SIZE = int(os.environ.get("LIST_MAX_PAGE_SIZE", 1000))
+LIST_STREAM_CHUNK_SIZE = int(os.environ.get("LIST_STREAM_CHUNK_SIZE", 2000))
+
+# Nearby incidents (api/geo.py)
+NEARBY_DEFAULT_RADIUS_KM = float(os.environ.get("NEARBY_DEFAULT_RADIUS_KM", 5.0))
+NEARBY_MAX_RADIUS_KM = float(os.environ.get("NEARBY_MAX_RADIUS_KM", 50.0))
+NEARBY_MAX_RESULTS = int(os.environ.get("NEARBY_MAX_RESULTS", 100))
+
+# Live incident grid (api/live_grid.py)
+LIVE_GRID_CELL_DEGREES = float(os.environ.get("LIVE_GRID_CELL_DEGREES", 0.02))
+LIVE_ACCIDENT_TTL_SECONDS = int(os.environ.get("LIVE_ACCIDENT_TTL_SECONDS", 3600))
+# Seconds between background syncs of rows written by other workers; 0 disables
+LIVE_GRID_SYNC_SECONDS = float(os.environ.get("LIVE_GRID_SYNC_SECONDS", 5.0))
+
+# Incident deduplication (api/clustering.py)
+CLUSTER_RADIUS_METERS = float(os.environ.get("CLUSTER_RADIUS_METERS", 200))
+CLUSTER_WINDOW_SECONDS = int(os.environ.get("CLUSTER_WINDOW_SECONDS", 300))
+
+# Voice keyword lexicon (api/keywords.py); JSON {"term": weight} replaces the built-in one
+VOICE_KEYWORDS_FILE = os.environ.get("VOICE_KEYWORDS_FILE")
+VOICE_SEVERITY_HIGH = float(os.environ.get("VOICE_SEVERITY_HIGH", 0.8))
+VOICE_SEVERITY_MEDIUM = float(os.environ.get("VOICE_SEVERITY_MEDIUM", 0.5))
+
+# Server-side voice transcription (api/voice_pipeline.py); offline "sphinx" (pocketsphinx)
+# or "vosk" (pip install vosk, plus a model). Non-WAV clips need ffmpeg on PATH
+VOICE_RECOGNIZER = os.environ.get("VOICE_RECOGNIZER", "sphinx")
+VOICE_VOSK_MODEL = os.environ.get("VOICE_VOSK_MODEL")
+VOICE_WORKERS = int(os.environ.get("VOICE_WORKERS", 2))
+# Clips queued or in flight per web worker before new ones get 503
+VOICE_MAX_PENDING = int(os.environ.get("VOICE_MAX_PENDING", 32))
+VOICE_MAX_CLIP_BYTES = int(os.environ.get("VOICE_MAX_CLIP_BYTES", 5 * 1024 * 1024))
+# Queued jobs whose worker stopped renewing the lease this long are resumed by another
+VOICE_JOB_LEASE_SECONDS = int(os.environ.get("VOICE_JOB_LEASE_SECONDS", 60))
+
+# Shared inference sidecar (api/inference_server.py, manage.py inference_server);
+# unset to score in every worker
+INFERENCE_SOCKET = os.environ.get("INFERENCE_SOCKET")
+INFERENCE_MAX_BATCH = int(os.environ.get("INFERENCE_MAX_BATCH", 64))
+INFERENCE_MAX_WAIT_MS = float(os.environ.get("INFERENCE_MAX_WAIT_MS", 2.0))
+INFERENCE_TIMEOUT = float(os.environ.get("INFERENCE_TIMEOUT", 1.0))
+
+# ML severity (api/ml_model.py): thresholds on the accident probability, normally
+# stored with the model at training time; set these to override them
+ML_SEVERITY_MEDIUM = os.environ.get("ML_SEVERITY_MEDIUM")
+ML_SEVERITY_HIGH = os.environ.get("ML_SEVERITY_HIGH")
+# Sensor accidents whose probability is below this are saved but not fanned out
+ML_FANOUT_MIN_CONFIDENCE = float(os.environ.get("ML_FANOUT_MIN_CONFIDENCE", 0.0))
+
+# Versioned model artifacts written by manage.py train_model (api/training.py)
+ML_MODEL_DIR = os.environ.get("ML_MODEL_DIR", str(BASE_DIR / "ml_models"))
+# Seconds between checks of the registry's ACTIVE/SHADOW pointers (api/model_registry.py)
+ML_REGISTRY_POLL_SECONDS = float(os.environ.get("ML_REGISTRY_POLL_SECONDS", 2.0))
+# Samples waiting for shadow scoring before new ones are dropped
+ML_SHADOW_QUEUE_SIZE = int(os.environ.get("ML_SHADOW_QUEUE_SIZE", 1000))
+
+# Inference cache (api/inference_cache.py): LRU of probabilities keyed on the sensor
+# vector quantized to these resolutions (m/s^2, deg/s); 0 entries disables it
+ML_CACHE_SIZE = int(os.environ.get("ML_CACHE_SIZE", 100_000))
+ML_CACHE_ACC_RESOLUTION = float(os.environ.get("ML_CACHE_ACC_RESOLUTION", 0.05))
+ML_CACHE_GYRO_RESOLUTION = float(os.environ.get("ML_CACHE_GYRO_RESOLUTION", 0.5))
+# Answer clearly benign rows from bounds stored with the model, without scoring them
+ML_PREFILTER = os.environ.get("ML_PREFILTER", "True") == "True"
+
+# Raw sensor telemetry archive (api/telemetry.py); set TELEMETRY_DIR="" to keep no samples
+TELEMETRY_DIR = os.environ.get("TELEMETRY_DIR", str(BASE_DIR / "telemetry"))
+TELEMETRY_DEVICE_BUCKETS = int(os.environ.get("TELEMETRY_DEVICE_BUCKETS", 16))
+# Buffered samples are written out after this many seconds or rows, whichever comes first
+TELEMETRY_FLUSH_SECONDS = float(os.environ.get("TELEMETRY_FLUSH_SECONDS", 5.0))
+TELEMETRY_FLUSH_ROWS = int(os.environ.get("TELEMETRY_FLUSH_ROWS", 10_000))
+# Per process; samples beyond this are dropped while the disk catches up
+TELEMETRY_MAX_BUFFERED_ROWS = int(os.environ.get("TELEMETRY_MAX_BUFFERED_ROWS", 500_000))
@@ -0,0 +1,28 @@
+import threading
+import time
+
+
+class TTLCache:
+    """Tiny thread-safe in-process cache whose entries expire after `ttl` seconds."""
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get_or_set(self, key, compute):
+        if self.ttl <= 0:
+            return compute()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+        value = compute()
+        with self._lock:
+            self._data[key] = (now + self.ttl, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,102 @@
+"""
+Spatio-temporal deduplication of incoming reports and alerts.
+
+One crash tends to arrive several times: a sensor report, a voice report,
+emergency_notify calls and BLE alerts from phones nearby. Each new
+AccidentReport / BLEAlert is matched against rows of either kind within
+CLUSTER_RADIUS_METERS and CLUSTER_WINDOW_SECONDS before it is inserted:
+
+  * a match joins its incident (cluster_id = the match's cluster_id),
+  * otherwise the row starts a new incident (cluster_id = its own id).
+
+Notifications fan out once per incident and topic instead of once per
+duplicate. The first row of an incident that is worth publishing claims the
+fan-out (`claim_fanout`), whether or not it started the incident. A
+low-severity report that was never published therefore does not silence a
+crash next to it, and a BLE alert does not silence the accident report of
+the same crash. Candidates come from the geohash index (api/geo.py), so
+matching is one indexed query per table.
+"""
+from django.conf import settings
+from django.utils import timezone
+
+from . import geo
+from . import querysets
+
+
+def _settings():
+    radius_km = getattr(settings, "CLUSTER_RADIUS_METERS", 200) / 1000
+    window = timezone.timedelta(seconds=getattr(settings, "CLUSTER_WINDOW_SECONDS", 300))
+    return radius_km, window
+
+
+def _coordinates(obj):
+    if obj.latitude is None or obj.longitude is None:
+        return None
+    return float(obj.latitude), float(obj.longitude)
+
+
+def find_cluster(latitude, longitude, timestamp, exclude_ids=()):
+    """cluster_id of the nearest report/alert within the radius and window, or None."""
+    from .models import AccidentReport, BLEAlert
+
+    radius_km, window = _settings()
+    cells = geo.covering_cells(latitude, longitude, radius_km)
+    rows = []
+    for model in (AccidentReport, BLEAlert):
+        rows += (querysets.in_cells(model.objects.all(), cells)
+                 .filter(timestamp__range=(timestamp - window, timestamp + window), cluster_id__isnull=False)
+                 .exclude(id__in=exclude_ids)
+                 .values_list('cluster_id', 'latitude', 'longitude'))
+    if not rows:
+        return None
+    cluster_ids, latitudes, longitudes = zip(*rows)
+    nearest, _ = geo.within_radius(latitude, longitude, latitudes, longitudes, radius_km, limit=1)
+    return cluster_ids[nearest[0]] if len(nearest) else None
+
+
+def assign_clusters(objs):
+    """
+    Set cluster_id on unsaved reports/alerts, in order. Rows of the same
+    batch can cluster with each other as well as with stored rows.
+    """
+    radius_km, window = _settings()
+    assigned = []
+    for obj in objs:
+        if obj.cluster_id is not None:
+            continue
+        timestamp = obj.timestamp or timezone.now()
+        point = _coordinates(obj)
+        cluster_id = None
+        if point is not None:
+            # Earlier rows of this batch are not in the database yet
+            batch = [(o.cluster_id, p) for o, p in assigned
+                     if abs((o.timestamp or timestamp) - timestamp) <= window]
+            if batch:
+                nearest, _ = geo.within_radius(*point, [p[0] for _, p in batch], [p[1] for _, p in batch],
+                                               radius_km, limit=1)
+                if len(nearest):
+                    cluster_id = batch[nearest[0]][0]
+            if cluster_id is None:
+                cluster_id = find_cluster(*point, timestamp, exclude_ids=[obj.id])
+        obj.cluster_id = cluster_id or obj.id
+        if point is not None:
+            assigned.append((obj, point))
+    return objs
+
+
+def claim_fanout(obj, topic):
+    """
+    True if `obj` should publish `topic` for its incident: no other row of
+    the incident has done so. Call it in the transaction that saves `obj` and
+    only for rows that will be published. The claim is a row with a unique
+    constraint, so concurrent requests cannot both win, and it is rolled back
+    with the report if the transaction fails.
+    """
+    from .models import IncidentNotification
+
+    if obj.cluster_id is None:
+        return True
+    # get_or_create inserts in a savepoint and falls back to a get on IntegrityError
+    _, created = IncidentNotification.objects.get_or_create(cluster_id=obj.cluster_id, topic=topic)
+    return created
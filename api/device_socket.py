@@ -0,0 +1,230 @@
+"""
+Long-lived WebSocket channel for devices (ASGI only).
+
+A device connects once to /ws/telemetry/?device_id=<id>[&token=<jwt>] and then
+streams sensor samples over the open socket instead of making one HTTPS
+request per reading. The JWT (if any) is verified once on connect.
+
+Client -> server frames:
+    text:   {"type": "sample", "latitude": .., "longitude": .., "acc_x": .., ..., "gyro_z": ..[, "timestamp": ..]}
+            {"type": "samples", "readings": [{...}, ...]}
+            {"type": "ping"}
+    binary: packed records in the api/sensor_wire.py layout, as for
+            POST accidents/sensor/ with Content-Type application/octet-stream
+
+Samples are validated like on the HTTP endpoints (every field required,
+finite values). A bad frame, or one that fails while being processed, gets
+an error frame back and the connection stays open.
+
+Server -> client frames:
+    {"type": "accident", "report": {...}}   crash confirmed for this device
+    {"type": "alert", ...}                   alert pushed by the backend
+    {"type": "pong"} / {"type": "error", "message": ..}
+
+An idle connection is just a suspended coroutine waiting on receive(), so a
+single worker can hold thousands of them.
+"""
+import asyncio
+import json
+import threading
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, transaction
+
+from . import sensor_wire
+from .clustering import claim_fanout
+from .models import AccidentReport
+from .outbox import publish, report_payload, ACCIDENT_REPORT_CREATED
+from .serializers import AccidentReportSerializer
+from .streaming import crash_detector
+from .telemetry import telemetry_archive
+
+
+class DeviceSocketRegistry:
+    """Open sockets of this worker process, keyed by device id."""
+
+    def __init__(self):
+        self._sockets = {}
+        self._lock = threading.Lock()
+        self.loop = None
+
+    def add(self, device_id, connection):
+        with self._lock:
+            self._sockets.setdefault(device_id, set()).add(connection)
+
+    def remove(self, device_id, connection):
+        with self._lock:
+            connections = self._sockets.get(device_id)
+            if connections:
+                connections.discard(connection)
+                if not connections:
+                    del self._sockets[device_id]
+
+    def connections(self, device_ids=None):
+        with self._lock:
+            if device_ids is None:
+                return [c for conns in self._sockets.values() for c in conns]
+            return [c for device_id in device_ids for c in self._sockets.get(device_id, ())]
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(conns) for conns in self._sockets.values())
+
+    async def push(self, message, device_ids=None):
+        connections = self.connections(device_ids)
+        if connections:
+            await asyncio.gather(*(c.send_json(message) for c in connections), return_exceptions=True)
+        return len(connections)
+
+    def push_threadsafe(self, message, device_ids=None):
+        """
+        Push a message from sync code (views, background threads).
+        Only reaches sockets held by this process; a no-op before the first connect.
+        """
+        if self.loop is None or self.loop.is_closed():
+            return None
+        return asyncio.run_coroutine_threadsafe(self.push(message, device_ids), self.loop)
+
+
+socket_registry = DeviceSocketRegistry()
+
+
+class DeviceConnection:
+    def __init__(self, send, device_id, user_id):
+        self._send = send
+        self._send_lock = asyncio.Lock()
+        self.device_id = device_id
+        self.user_id = user_id
+
+    async def send_json(self, message):
+        async with self._send_lock:
+            await self._send({"type": "websocket.send", "text": json.dumps(message)})
+
+
+def _authenticate(token):
+    """Return the user id carried by a valid access token, or None."""
+    if not token:
+        return None
+    from rest_framework_simplejwt.tokens import AccessToken
+    from rest_framework_simplejwt.settings import api_settings
+
+    access = AccessToken(token)  # raises TokenError when invalid/expired
+    return access[api_settings.USER_ID_CLAIM]
+
+
+def _ingest(device_id, user_id, records):
+    """
+    Archive record tuples (SENSOR_COLUMNS + timestamp, see api/sensor_wire.py)
+    and push them through the crash detector; create reports for confirmed
+    crashes.
+    Runs on the default executor's threads, each with its own database
+    connection, which is recycled here like at the start of a request.
+    """
+    close_old_connections()
+    telemetry_archive.append(device_id, records)
+    reports = []
+    for latitude, longitude, *sample, timestamp in records:
+        detected, severity, _ = crash_detector.push(device_id, sample, None if timestamp != timestamp else timestamp)
+        if detected:
+            acc_x, acc_y, acc_z, gyro_x, gyro_y, gyro_z = sample
+            with transaction.atomic():
+                report = AccidentReport.objects.create(
+                    user_id=user_id,
+                    latitude=latitude,
+                    longitude=longitude,
+                    severity=severity,
+                    description="Sensor data detected accident",
+                    device_id=device_id[:64],
+                    acc_x=acc_x, acc_y=acc_y, acc_z=acc_z, gyro_x=gyro_x, gyro_y=gyro_y, gyro_z=gyro_z,
+                    reported_via="sensor"
+                )
+                if claim_fanout(report, ACCIDENT_REPORT_CREATED):
+                    publish(ACCIDENT_REPORT_CREATED, report_payload(report))
+            reports.append(AccidentReportSerializer(report).data)
+    return reports
+
+
+def _decode_frame(message):
+    """(frame type, record tuples or None); raises ValueError for a bad frame."""
+    if message.get("bytes") is not None:
+        return None, sensor_wire.decode_records(message["bytes"]).tolist()
+
+    payload = json.loads(message.get("text") or "{}")
+    if not isinstance(payload, dict):
+        raise ValueError("Frame must be a JSON object")
+    frame_type = payload.get("type", "sample")
+    if frame_type == "sample":
+        readings = [payload]
+    elif frame_type == "samples":
+        readings = payload.get("readings")
+        if not isinstance(readings, list) or not readings:
+            raise ValueError("readings must be a non-empty list")
+        if len(readings) > sensor_wire.MAX_RECORDS:
+            raise ValueError(f"At most {sensor_wire.MAX_RECORDS} samples per frame")
+    else:
+        return frame_type, None
+    records = []
+    for i, reading in enumerate(readings):
+        if not isinstance(reading, dict):
+            raise ValueError(f"reading {i} must be an object")
+        records += sensor_wire.from_fields(reading)
+    return frame_type, records
+
+
+async def telemetry_socket(scope, receive, send):
+    """ASGI handler for /ws/telemetry/."""
+    message = await receive()
+    if message["type"] != "websocket.connect":
+        return
+
+    query = parse_qs(scope.get("query_string", b"").decode())
+    device_id = query.get("device_id", [None])[0]
+    if not device_id:
+        await send({"type": "websocket.close", "code": 4400})
+        return
+    try:
+        user_id = _authenticate(query.get("token", [None])[0])
+    except Exception:
+        await send({"type": "websocket.close", "code": 4401})
+        return
+
+    await send({"type": "websocket.accept"})
+    socket_registry.loop = asyncio.get_running_loop()
+    connection = DeviceConnection(send, device_id, user_id)
+    socket_registry.add(device_id, connection)
+    # Off Django's single sync thread, so one socket's ingest (model call,
+    # report writes) does not queue up every other socket behind it
+    ingest = sync_to_async(_ingest, thread_sensitive=False)
+
+    try:
+        while True:
+            message = await receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if message["type"] != "websocket.receive":
+                continue
+
+            try:
+                frame_type, records = _decode_frame(message)
+            except (ValueError, TypeError) as e:
+                await connection.send_json({"type": "error", "message": f"Invalid frame: {e}"})
+                continue
+
+            if frame_type == "ping":
+                await connection.send_json({"type": "pong"})
+                continue
+            if records is None:
+                await connection.send_json({"type": "error", "message": f"Unknown frame type: {frame_type}"})
+                continue
+
+            try:
+                reports = await ingest(device_id, user_id, records)
+            except Exception as e:
+                print(f"❌ [BACKEND] Device socket ingest failed for {device_id}: {e}")
+                await connection.send_json({"type": "error", "message": f"Could not process frame: {e}"})
+                continue
+            for report in reports:
+                await connection.send_json({"type": "accident", "report": report})
+    finally:
+        socket_registry.remove(device_id, connection)
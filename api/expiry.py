@@ -0,0 +1,59 @@
+"""
+BLE alert expiry and pruning.
+
+`expire_ble_alerts` moves every broadcast past its expires_at
+(timestamp + broadcast_duration) to "expired" with one set-based UPDATE,
+driven by the partial index on expires_at WHERE status = 'broadcast', so the
+cost follows the number of live broadcasts, not the size of the table.
+
+`prune_ble_alerts` deletes long-expired rows in id batches, each in its own
+short transaction, optionally appending them to a gzipped NDJSON archive
+first. Hourly rollups are left alone, so statistics keep counting pruned
+alerts (a full `manage.py rollup_alerts` rebuild would drop them).
+
+Both run from `manage.py expire_alerts`, once or on an interval.
+"""
+import gzip
+import json
+
+from django.db import transaction
+from django.utils import timezone
+
+from . import rollups
+from .models import BLEAlert
+
+
+def expire_ble_alerts(now=None):
+    """Mark broadcasts past their expiry as expired; returns the number of rows changed."""
+    now = now or timezone.now()
+    due = BLEAlert.objects.filter(status="broadcast", expires_at__lte=now)
+    with transaction.atomic():
+        rollups.transition("ble", due, status="expired")
+        return due.update(status="expired")
+
+
+def prune_ble_alerts(older_than, batch_size=1000, archive_path=None):
+    """
+    Delete alerts that expired before `older_than`, `batch_size` rows at a time.
+    Returns the number of rows deleted.
+    """
+    stale = (BLEAlert.objects
+             .filter(status="expired", expires_at__lt=older_than)
+             .order_by("expires_at"))
+    deleted = 0
+    archive = gzip.open(archive_path, "at", encoding="utf-8") if archive_path else None
+    try:
+        while True:
+            with transaction.atomic():
+                ids = list(stale.values_list("id", flat=True)[:batch_size])
+                if not ids:
+                    break
+                batch = BLEAlert.objects.filter(id__in=ids)
+                if archive is not None:
+                    for row in batch.values():
+                        archive.write(json.dumps(row, default=str) + "\n")
+                deleted += batch.delete()[0]
+    finally:
+        if archive is not None:
+            archive.close()
+    return deleted
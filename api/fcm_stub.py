@@ -0,0 +1,55 @@
+"""
+Local stand-in for the FCM HTTP v1 send endpoint, for offline benchmarks.
+
+Point FCM_ENDPOINT at it (e.g. http://127.0.0.1:9099). Tokens starting with
+"invalid" get a permanent 404 UNREGISTERED, and `failure_rate` of the other
+requests get a retryable 503 so the engine's backoff path is exercised.
+"""
+import asyncio
+import random
+import threading
+
+from aiohttp import web
+
+
+def make_app(latency_ms=20, failure_rate=0.0):
+    app = web.Application()
+    app["stats"] = {"requests": 0, "accepted": 0, "rejected": 0}
+
+    async def send(request):
+        stats = request.app["stats"]
+        stats["requests"] += 1
+        payload = await request.json()
+        await asyncio.sleep(latency_ms / 1000)
+
+        token = payload.get("message", {}).get("token", "")
+        if token.startswith("invalid"):
+            stats["rejected"] += 1
+            return web.json_response({"error": {"code": 404, "status": "UNREGISTERED"}}, status=404)
+        if random.random() < failure_rate:
+            stats["rejected"] += 1
+            return web.json_response({"error": {"code": 503, "status": "UNAVAILABLE"}}, status=503)
+        stats["accepted"] += 1
+        return web.json_response({"name": f"projects/{request.match_info['project']}/messages/{stats['accepted']}"})
+
+    app.router.add_post("/v1/projects/{project}/messages:send", send)
+    return app
+
+
+def serve_in_thread(host="127.0.0.1", port=9099, **options):
+    """Start the stub on a daemon thread; returns the aiohttp app (for its stats)."""
+    app = make_app(**options)
+    ready = threading.Event()
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        runner = web.AppRunner(app, access_log=None)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, host, port, backlog=4096).start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, name="fcm-stub", daemon=True).start()
+    ready.wait()
+    return app
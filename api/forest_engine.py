@@ -0,0 +1,161 @@
+"""
+Compiled RandomForest inference over flat, memory-mapped node arrays.
+
+`export_forest` flattens a fitted sklearn RandomForestClassifier into
+contiguous NumPy arrays (one row per node across all trees) and saves them
+as .npy files. `CompiledForest.load` maps those files read-only, so every
+gunicorn worker on the host shares one copy through the page cache instead
+of unpickling its own forest.
+
+Layout of an exported directory:
+    feature.npy    int64    split feature per node
+    threshold.npy  float64  split threshold per node
+    left.npy       int64    global index of left child
+    right.npy      int64    global index of right child
+    value.npy      float64  (n_nodes, n_classes) class probabilities per node
+    roots.npy      int64    global index of each tree's root node
+    meta.json      classes, feature names, max depth, severity thresholds
+
+Severity thresholds come from the `severity_thresholds` argument, else the
+model's `severity_thresholds_` (set by api/training.py), else the meta.json
+already in `directory`, so re-exporting a model without them keeps the
+tuned ones.
+
+Leaves point to themselves (left == right == own index, feature 0,
+threshold +inf), so traversal is max_depth branch-free gather steps over
+all (tree, sample) pairs at once.
+"""
+import json
+import os
+
+import numpy as np
+
+ARRAY_NAMES = ("feature", "threshold", "left", "right", "value", "roots")
+
+# Samples traversed per step; keeps the (tree, sample) working set in cache
+CHUNK_SIZE = 1024
+
+
+def _existing_thresholds(directory):
+    try:
+        with open(os.path.join(directory, "meta.json")) as f:
+            return json.load(f).get("severity_thresholds")
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def export_forest(model, directory, severity_thresholds=None):
+    """Flatten a fitted RandomForestClassifier into `directory`."""
+    os.makedirs(directory, exist_ok=True)
+    severity_thresholds = (severity_thresholds or getattr(model, "severity_thresholds_", None)
+                           or _existing_thresholds(directory))
+
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for estimator in model.estimators_:
+        tree = estimator.tree_
+        is_leaf = tree.children_left == -1
+        own_index = np.arange(tree.node_count) + offset
+
+        roots.append(offset)
+        features.append(np.where(is_leaf, 0, tree.feature).astype(np.int64))
+        thresholds.append(np.where(is_leaf, np.inf, tree.threshold).astype(np.float64))
+        lefts.append(np.where(is_leaf, own_index, tree.children_left + offset).astype(np.int64))
+        rights.append(np.where(is_leaf, own_index, tree.children_right + offset).astype(np.int64))
+
+        # Normalise leaf values to class probabilities like predict_proba does
+        value = tree.value[:, 0, :].astype(np.float64)
+        totals = value.sum(axis=1, keepdims=True)
+        totals[totals == 0] = 1.0
+        values.append(value / totals)
+
+        offset += tree.node_count
+        max_depth = max(max_depth, tree.max_depth)
+
+    arrays = {
+        "feature": np.concatenate(features),
+        "threshold": np.concatenate(thresholds),
+        "left": np.concatenate(lefts),
+        "right": np.concatenate(rights),
+        "value": np.ascontiguousarray(np.concatenate(values)),
+        "roots": np.array(roots, dtype=np.int64),
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), array)
+
+    meta = {
+        "classes": [c.item() if hasattr(c, "item") else c for c in model.classes_],
+        "feature_names": [str(f) for f in getattr(model, "feature_names_in_", [])],
+        "n_features": int(model.n_features_in_),
+        "n_trees": len(roots),
+        "n_nodes": int(offset),
+        "max_depth": int(max_depth),
+    }
+    if severity_thresholds:
+        meta["severity_thresholds"] = dict(severity_thresholds)
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+class CompiledForest:
+    """
+    Drop-in for the parts of RandomForestClassifier that the API uses
+    (classes_, predict_proba, predict), evaluated with vectorized traversal.
+    """
+
+    def __init__(self, arrays, meta):
+        # Plain ndarray views; still backed by the mapped file when memory-mapped
+        self.feature = np.asarray(arrays["feature"])
+        self.threshold = np.asarray(arrays["threshold"])
+        self.left = np.asarray(arrays["left"])
+        self.right = np.asarray(arrays["right"])
+        self.value = np.asarray(arrays["value"])
+        self.roots = np.asarray(arrays["roots"])
+        self.meta = meta
+        self.classes_ = np.array(meta["classes"])
+        self.n_features_in_ = meta["n_features"]
+        self.max_depth = meta["max_depth"]
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        mode = "r" if mmap else None
+        arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode)
+                  for name in ARRAY_NAMES}
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+        return cls(arrays, meta)
+
+    @staticmethod
+    def exists(directory):
+        return os.path.exists(os.path.join(directory, "meta.json"))
+
+    def apply(self, X):
+        """Return the (n_trees, n_samples) global leaf index reached by every sample."""
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_samples, n_features = X.shape
+        flat_x = X.ravel()
+
+        nodes = np.repeat(self.roots, n_samples)
+        row_offsets = np.tile(np.arange(n_samples) * n_features, len(self.roots))
+
+        # One vectorized step per tree level; samples already on a leaf stay there
+        for _ in range(self.max_depth):
+            go_left = flat_x.take(row_offsets + self.feature.take(nodes)) <= self.threshold.take(nodes)
+            nodes = np.where(go_left, self.left.take(nodes), self.right.take(nodes))
+        return nodes.reshape(len(self.roots), n_samples)
+
+    def predict_proba(self, X):
+        X = np.asarray(X)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if len(X) > CHUNK_SIZE:
+            return np.vstack([self.predict_proba(X[i:i + CHUNK_SIZE])
+                              for i in range(0, len(X), CHUNK_SIZE)])
+        leaves = self.apply(X)
+        return self.value.take(leaves, axis=0).mean(axis=0)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
@@ -0,0 +1,147 @@
+"""
+Geohash cells and haversine distances for proximity queries without PostGIS.
+
+Reports and alerts store the geohash of their coordinates (GEOHASH_PRECISION
+characters, ~5 m cells). Every prefix of a geohash is the enclosing coarser
+cell, so "within R km of (lat, lon)" becomes:
+
+  1. pick the finest precision whose cells are at least R km on each side,
+  2. take the cell containing the point and its 8 neighbours, which then
+     cover the whole circle,
+  3. fetch rows whose geohash falls in one of those 9 prefix ranges
+     (plain B-tree range scans on SQLite and Postgres alike),
+  4. compute exact haversine distances for the candidates with NumPy.
+"""
+import math
+
+import numpy as np
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+_DECODE = {c: i for i, c in enumerate(BASE32)}
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < precision:
+        # Bits alternate between longitude and latitude, longitude first
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if longitude >= mid:
+                bits, lon_lo = bits * 2 + 1, mid
+            else:
+                bits, lon_hi = bits * 2, mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                bits, lat_lo = bits * 2 + 1, mid
+            else:
+                bits, lat_hi = bits * 2, mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def bounds(geohash):
+    """(lat_lo, lat_hi, lon_lo, lon_hi) of a cell."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    even = True
+    for char in geohash:
+        value = _DECODE[char]
+        for shift in range(4, -1, -1):
+            bit = (value >> shift) & 1
+            if even:
+                mid = (lon_lo + lon_hi) / 2
+                lon_lo, lon_hi = (mid, lon_hi) if bit else (lon_lo, mid)
+            else:
+                mid = (lat_lo + lat_hi) / 2
+                lat_lo, lat_hi = (mid, lat_hi) if bit else (lat_lo, mid)
+            even = not even
+    return lat_lo, lat_hi, lon_lo, lon_hi
+
+
+def cell_size_degrees(precision):
+    """(lat_degrees, lon_degrees) spanned by a cell of `precision` characters."""
+    bits = 5 * precision
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def precision_for_radius(radius_km, latitude):
+    """Finest precision whose cells are at least `radius_km` tall and wide at `latitude`."""
+    # Use the poleward edge of the circle, where a degree of longitude is shortest
+    edge = min(abs(latitude) + radius_km / KM_PER_DEGREE, 90.0)
+    lon_km_per_degree = KM_PER_DEGREE * math.cos(math.radians(edge))
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_deg, lon_deg = cell_size_degrees(precision)
+        if lat_deg * KM_PER_DEGREE >= radius_km and lon_deg * lon_km_per_degree >= radius_km:
+            return precision
+    return 0
+
+
+def covering_cells(latitude, longitude, radius_km):
+    """
+    Geohash prefixes whose union contains every point within `radius_km`.
+    An empty string means "everywhere" (radius larger than any cell).
+    """
+    precision = precision_for_radius(radius_km, latitude)
+    if precision == 0:
+        return [""]
+    center = encode(latitude, longitude, precision)
+    lat_lo, lat_hi, lon_lo, lon_hi = bounds(center)
+    lat_step, lon_step = lat_hi - lat_lo, lon_hi - lon_lo
+    center_lat, center_lon = (lat_lo + lat_hi) / 2, (lon_lo + lon_hi) / 2
+
+    cells = set()
+    for dlat in (-1, 0, 1):
+        lat = center_lat + dlat * lat_step
+        if not -90 < lat < 90:
+            continue
+        for dlon in (-1, 0, 1):
+            # Wrap across the antimeridian
+            lon = (center_lon + dlon * lon_step + 180) % 360 - 180
+            cells.add(encode(lat, lon, precision))
+    return sorted(cells)
+
+
+def prefix_range(prefix):
+    """
+    [low, high) string range of every geohash starting with `prefix`; high is
+    None when unbounded. Both ends are alphanumeric, so the range means the
+    same under any database collation.
+    """
+    stem = prefix
+    while stem and stem[-1] == BASE32[-1]:
+        stem = stem[:-1]
+    if not stem:
+        return prefix, None
+    return prefix, stem[:-1] + BASE32[BASE32.index(stem[-1]) + 1]
+
+
+def haversine_km(latitude, longitude, latitudes, longitudes):
+    """Great-circle distance in km from one point to arrays of points."""
+    lat1 = math.radians(latitude)
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    dlat = lat2 - lat1
+    dlon = np.radians(np.asarray(longitudes, dtype=np.float64) - longitude)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def within_radius(latitude, longitude, latitudes, longitudes, radius_km, limit=None):
+    """
+    Indices of the points within `radius_km`, nearest first, and their distances.
+    Points with missing coordinates (NaN) never match.
+    """
+    distances = haversine_km(latitude, longitude, latitudes, longitudes)
+    inside = np.flatnonzero(distances <= radius_km)
+    nearest = inside[np.argsort(distances[inside], kind="stable")][:limit]
+    return nearest, distances[nearest]
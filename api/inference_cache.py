@@ -0,0 +1,191 @@
+"""
+Result cache and benign pre-filter in front of accident inference.
+
+Parked or smoothly cruising devices send nearly the same six-axis vector
+over and over. `InferenceCache` keys each row on its quantized vector
+(ML_CACHE_ACC_RESOLUTION m/s^2 and ML_CACHE_GYRO_RESOLUTION deg/s buckets)
+and keeps up to ML_CACHE_SIZE probabilities in LRU order. A bucket returns
+the probability of the first vector scored in it, so the resolution bounds
+how far apart two rows sharing a result can be. Bucket indices are int64;
+rows with a non-finite value or an index beyond MAX_BUCKET are scored but
+never cached, so no two distant vectors can share a key. The cache empties whenever
+the registry's active model version changes, and `score` reports the version
+that produced its results (the sidecar polls the registry on its own): rows
+scored by any other version than the current one are returned but not
+cached.
+
+Before the cache, `BenignPrefilter` answers rows whose acceleration and
+rotation magnitudes are both below bounds learned at training time
+(`fit_prefilter`). The bounds are kept below all but a `quantile` of the
+training accidents, and rows inside them get the model's mean probability
+there. The bounds travel in the model metadata as "prefilter"; versions
+without them skip this step.
+
+Only rows that are neither pre-filtered nor cached reach the model.
+`report()` gives the hit ratios and an estimate of the inference time saved.
+"""
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+import numpy as np
+
+# Largest bucket index cached; exact in float64 and far inside int64
+MAX_BUCKET = 2 ** 53
+
+
+def _magnitudes(features):
+    features = np.asarray(features, dtype=np.float64)
+    return np.sqrt(np.einsum("ij,ij->i", features[:, :3], features[:, :3])), \
+        np.sqrt(np.einsum("ij,ij->i", features[:, 3:], features[:, 3:]))
+
+
+def fit_prefilter(features, labels, holdout=None, quantile=0.001, margin=0.9):
+    """
+    Bounds (acceleration and rotation magnitude) under which a row counts as
+    benign: `margin` times the `quantile` of each magnitude over the accident
+    rows. `holdout` is (features, labels, model probabilities) for unseen
+    rows: coverage and the accidents falling inside are measured there, and
+    the mean probability inside becomes the answer for pre-filtered rows.
+    """
+    labels = np.asarray(labels)
+    accident_acc, accident_gyro = _magnitudes(np.asarray(features)[labels == 1])
+    if not len(accident_acc):
+        return None
+    prefilter = {
+        "acc_magnitude": round(float(np.quantile(accident_acc, quantile) * margin), 4),
+        "gyro_magnitude": round(float(np.quantile(accident_gyro, quantile) * margin), 4),
+        "probability": 0.0,
+    }
+    features, labels, probabilities = holdout or (features, labels, None)
+    labels = np.asarray(labels)
+    inside = BenignPrefilter(prefilter).mask(features)
+    prefilter["coverage"] = round(float(inside.mean()), 6)
+    prefilter["accidents_inside"] = int(np.sum(labels[inside] == 1))
+    if probabilities is not None and inside.any():
+        prefilter["probability"] = round(float(np.mean(np.asarray(probabilities)[inside])), 6)
+    return prefilter
+
+
+class BenignPrefilter:
+    def __init__(self, bounds):
+        self.acc_magnitude = bounds["acc_magnitude"]
+        self.gyro_magnitude = bounds["gyro_magnitude"]
+        self.probability = bounds.get("probability", 0.0)
+
+    def mask(self, features):
+        acc, gyro = _magnitudes(features)
+        return (acc <= self.acc_magnitude) & (gyro <= self.gyro_magnitude)
+
+
+class InferenceCache:
+    def __init__(self, max_entries=100_000, acc_resolution=0.05, gyro_resolution=0.5, prefilter=True):
+        self.max_entries = max_entries
+        self.resolution = np.array([acc_resolution] * 3 + [gyro_resolution] * 3)
+        self.use_prefilter = prefilter
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = None
+        self._prefilter = None
+        self.stats = defaultdict(float)
+
+    def _sync(self, model_version):
+        """Start over when the active model changes; returns its pre-filter."""
+        with self._lock:
+            if model_version.version != self._version:
+                self._entries.clear()
+                bounds = model_version.metadata.get("prefilter")
+                self._prefilter = BenignPrefilter(bounds) if bounds and self.use_prefilter else None
+                self._version = model_version.version
+            return self._prefilter
+
+    def keys(self, features):
+        """Cache key per row; None for rows that cannot be bucketed exactly."""
+        buckets = np.floor(features / self.resolution + 0.5)
+        # NaN fails the comparison too
+        valid = np.all(np.abs(buckets) <= MAX_BUCKET, axis=1)
+        quantized = np.where(valid[:, None], buckets, 0).astype(np.int64)
+        return [row.tobytes() if ok else None for row, ok in zip(quantized, valid)]
+
+    def probabilities(self, features, model_version, score):
+        """
+        Probability per row of `features`: pre-filtered, cached, or from
+        `score(rows)` -> (probabilities, model version) for the remaining
+        rows, which are cached if that version is still `model_version`.
+        """
+        t0 = time.perf_counter()
+        version = model_version.version
+        prefilter = self._sync(model_version)
+        probabilities = np.empty(len(features), dtype=np.float64)
+        pending = np.ones(len(features), dtype=bool)
+
+        if prefilter is not None:
+            benign = prefilter.mask(features)
+            probabilities[benign] = prefilter.probability
+            pending &= ~benign
+            self.stats["prefiltered"] += int(benign.sum())
+
+        keys = None
+        if self.max_entries and pending.any():
+            keys = self.keys(features)
+            with self._lock:
+                # After a version change the entries belong to the newer model
+                candidates = np.flatnonzero(pending) if self._version == version else ()
+                for i in candidates:
+                    cached = self._entries.get(keys[i])
+                    if cached is not None:
+                        self._entries.move_to_end(keys[i])
+                        probabilities[i] = cached
+                        pending[i] = False
+                        self.stats["hits"] += 1
+        misses = np.flatnonzero(pending)
+        self.stats["misses"] += len(misses)
+        self.stats["rows"] += len(features)
+        overhead = time.perf_counter() - t0
+
+        if len(misses):
+            t1 = time.perf_counter()
+            probabilities[misses], scored_version = score(features[misses])
+            self.stats["model_calls"] += 1
+            self.stats["model_ms"] += (time.perf_counter() - t1) * 1000
+            if keys is not None:
+                t2 = time.perf_counter()
+                with self._lock:
+                    if scored_version != version or self._version != version:
+                        # The model changed meanwhile (here or only in the sidecar)
+                        self.stats["stale_results"] += len(misses)
+                        misses = ()
+                    for i in misses:
+                        if keys[i] is None:
+                            continue
+                        self._entries[keys[i]] = probabilities[i]
+                        self._entries.move_to_end(keys[i])
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+                        self.stats["evictions"] += 1
+                overhead += time.perf_counter() - t2
+        else:
+            self.stats["skipped_calls"] += 1
+        self.stats["overhead_ms"] += overhead * 1000
+        return probabilities
+
+    def report(self):
+        rows = self.stats["rows"]
+        model_calls = self.stats["model_calls"]
+        per_call = self.stats["model_ms"] / model_calls if model_calls else None
+        return {
+            "model_version": self._version,
+            "prefilter": self._prefilter is not None,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "rows": int(rows),
+            "prefiltered": int(self.stats["prefiltered"]),
+            "hits": int(self.stats["hits"]),
+            "misses": int(self.stats["misses"]),
+            "hit_ratio": round((self.stats["hits"] + self.stats["prefiltered"]) / rows, 4) if rows else None,
+            "evictions": int(self.stats["evictions"]),
+            "stale_results": int(self.stats["stale_results"]),
+            # Calls answered without the model, at the mean cost of a call that used it
+            "saved_inference_ms": round(self.stats["skipped_calls"] * per_call, 2) if per_call else 0.0,
+            "cache_overhead_ms": round(self.stats["overhead_ms"], 2),
+        }
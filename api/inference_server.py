@@ -0,0 +1,203 @@
+"""
+Micro-batching inference sidecar shared by the gunicorn workers of a host.
+
+`manage.py inference_server` loads the model once and listens on a Unix
+socket (INFERENCE_SOCKET). Workers with INFERENCE_SOCKET set send their
+rows there instead of loading their own model (api/ml_model.py). The
+server queues concurrent requests and scores them together: a batch closes
+after INFERENCE_MAX_BATCH rows or INFERENCE_MAX_WAIT_MS, whichever comes
+first (or as soon as every connected worker is waiting on it), and runs as
+one predict_proba call. The HTTP API stays per-sample while the forest
+sees batches.
+
+Wire format, little-endian, one request in flight per connection:
+    request   uint32 n_rows, uint32 n_features, float64[n_rows * n_features]
+    response  uint32 n_rows, uint32 n_version, utf-8 model version[n_version],
+              float64[n_rows] accident-class probabilities
+
+The version lets the workers' result cache (api/inference_cache.py) tell
+whether the sidecar already, or still, scores with their active model.
+The server closes the connection on a malformed request or a scoring error.
+
+If the sidecar cannot be reached the client raises OSError and stays marked
+down for a few seconds; callers fall back to in-process scoring meanwhile.
+"""
+import asyncio
+import os
+import socket
+import struct
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+REQUEST_HEADER = struct.Struct("<II")
+RESPONSE_HEADER = struct.Struct("<II")
+# Refuse absurd headers instead of allocating for them
+MAX_ROWS = 1 << 20
+MAX_FEATURES = 64
+
+
+class InferenceServer:
+    """asyncio Unix-socket server that coalesces requests into micro-batches."""
+
+    def __init__(self, path, score, max_batch=64, max_wait_ms=2.0):
+        # score(features) -> (probabilities, model version)
+        self.path = path
+        self._score = score
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.stats = defaultdict(int)
+        self._open = 0
+
+    def run_forever(self):
+        asyncio.run(self._main())
+
+    async def _main(self):
+        self._queue = asyncio.Queue()
+        # Scoring runs off the event loop so connections keep being read meanwhile
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        server = await asyncio.start_unix_server(self._handle, path=self.path)
+        os.chmod(self.path, 0o660)
+        batcher = asyncio.create_task(self._batcher())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+            self._executor.shutdown(wait=False)
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    async def _handle(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        self.stats["connections"] += 1
+        self._open += 1
+        try:
+            while True:
+                n_rows, n_features = REQUEST_HEADER.unpack(await reader.readexactly(REQUEST_HEADER.size))
+                if n_rows > MAX_ROWS or not 0 < n_features <= MAX_FEATURES:
+                    break
+                data = await reader.readexactly(n_rows * n_features * 8)
+                features = np.frombuffer(data, dtype="<f8").reshape(n_rows, n_features)
+                future = loop.create_future()
+                self._queue.put_nowait((features, future))
+                probabilities, version = await future
+                version = version.encode()
+                writer.write(RESPONSE_HEADER.pack(n_rows, len(version)) + version
+                             + probabilities.astype("<f8").tobytes())
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            print(f"❌ [BACKEND] Inference request failed: {e}")
+        finally:
+            self._open -= 1
+            writer.close()
+
+    async def _next_batch(self):
+        batch = [await self._queue.get()]
+        rows = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        # Each connection has at most one request in flight, so once every
+        # open connection is in the batch nothing else can join it
+        while rows < self.max_batch and len(batch) < self._open:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    async def _batcher(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            features = np.vstack([f for f, _ in batch]) if len(batch) > 1 else batch[0][0]
+            try:
+                probabilities, version = await loop.run_in_executor(self._executor, self._score, features)
+            except Exception as e:
+                self.stats["errors"] += 1
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.stats["batches"] += 1
+            self.stats["requests"] += len(batch)
+            self.stats["rows"] += len(features)
+            offset = 0
+            for f, future in batch:
+                if not future.done():
+                    future.set_result((probabilities[offset:offset + len(f)], version))
+                offset += len(f)
+
+
+def _recv_exactly(sock, n):
+    buffer = bytearray(n)
+    view = memoryview(buffer)
+    received = 0
+    while received < n:
+        chunk = sock.recv_into(view[received:], n - received)
+        if not chunk:
+            raise ConnectionError("Inference sidecar closed the connection")
+        received += chunk
+    return buffer
+
+
+class InferenceClient:
+    """Blocking client; each thread keeps its own connection to the sidecar."""
+
+    def __init__(self, path, timeout=1.0, retry_after=5.0):
+        self.path = path
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._local = threading.local()
+        self._down_until = 0.0
+
+    def available(self):
+        return time.monotonic() >= self._down_until
+
+    def _socket(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    def predict_proba(self, features):
+        """Accident-class probability per row of `features`, and the model version that scored them."""
+        features = np.ascontiguousarray(features, dtype="<f8")
+        n_rows, n_features = features.shape
+        try:
+            sock = self._socket()
+            sock.sendall(REQUEST_HEADER.pack(n_rows, n_features) + features.tobytes())
+            n_out, n_version = RESPONSE_HEADER.unpack(_recv_exactly(sock, RESPONSE_HEADER.size))
+            version = bytes(_recv_exactly(sock, n_version)).decode()
+            return np.frombuffer(_recv_exactly(sock, n_out * 8), dtype="<f8"), version
+        except OSError:
+            self.close()
+            self._down_until = time.monotonic() + self.retry_after
+            raise
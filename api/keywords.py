@@ -0,0 +1,159 @@
+"""
+Emergency keyword matching and severity scoring for voice transcripts.
+
+The lexicon (term -> weight in (0, 1]) is compiled once into a single regex
+whose alternation is factored through a trie of the terms
+("c(?:all\\s+(?:ambulance|police)|ollision|r(?:ash|itical))"), so a
+transcript is scanned once in C however many terms there are. Terms only
+match whole words: "hit" no longer fires on "white".
+
+Transcripts are lowercased once and scanned case-sensitively, which is
+about 2.5x faster than an IGNORECASE scan.
+
+A transcript's score combines the weights of the distinct terms found as
+independent evidence, 1 - prod(1 - weight), and maps to a severity via
+VOICE_SEVERITY_HIGH / VOICE_SEVERITY_MEDIUM. The lexicon can be replaced
+with a JSON file of {"term": weight} named by VOICE_KEYWORDS_FILE.
+
+The lexicon and thresholds are checked when this module is imported: a
+weight outside (0, 1], a term that cannot match as whole words, or
+thresholds outside 0 < medium <= high <= 1 raise ImproperlyConfigured, so a
+bad file stops the server at startup instead of skewing severities.
+"""
+import json
+import numbers
+import re
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+DEFAULT_LEXICON = {
+    "dying": 1.0,
+    "unconscious": 1.0,
+    "not breathing": 1.0,
+    "trapped": 0.9,
+    "bleeding": 0.9,
+    "critical": 0.8,
+    "crash": 0.8,
+    "collision": 0.8,
+    "injured": 0.8,
+    "call ambulance": 0.8,
+    "ambulance": 0.7,
+    "accident": 0.7,
+    "injury": 0.7,
+    "emergency": 0.6,
+    "save me": 0.6,
+    "rescue": 0.6,
+    "call police": 0.5,
+    "hospital": 0.5,
+    "hurt": 0.5,
+    "urgent": 0.5,
+    "hit": 0.4,
+    "need help": 0.4,
+    "pain": 0.3,
+    "help": 0.3,
+}
+
+VoiceAnalysis = namedtuple("VoiceAnalysis", "matches score severity")
+
+
+def _normalize(term):
+    return " ".join(term.lower().split())
+
+
+def trie_pattern(terms):
+    """Regex alternation matching exactly `terms`, factored on common prefixes."""
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node):
+        end = node.get("") is True
+        branches = [(re.escape(char) if char != " " else r"\s+") + build(child)
+                    for char, child in sorted(node.items()) if char != ""]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if end:
+            # A shorter term ends here; the longer continuations are optional
+            body = ("(?:" + body + ")" if len(branches) == 1 else body) + "?"
+        return body
+
+    return build(trie)
+
+
+def _validate(lexicon, high, medium):
+    """{normalized term: weight}; ValueError naming the first bad entry."""
+    if not isinstance(lexicon, dict) or not lexicon:
+        raise ValueError("the lexicon must be a non-empty JSON object of {\"term\": weight}")
+    weights = {}
+    for term, weight in lexicon.items():
+        normalized = _normalize(term) if isinstance(term, str) else ""
+        # \b anchors only hold between word and non-word characters
+        if not re.fullmatch(r"\w(?:.*\w)?", normalized):
+            raise ValueError(f"term {term!r} must start and end with a letter or digit")
+        if isinstance(weight, bool) or not isinstance(weight, numbers.Real) or not 0 < weight <= 1:
+            raise ValueError(f"weight of {term!r} must be a number in (0, 1], got {weight!r}")
+        if weights.get(normalized, weight) != weight:
+            raise ValueError(f"term {term!r} is listed twice with different weights")
+        weights[normalized] = float(weight)
+    if not 0 < medium <= high <= 1:
+        raise ValueError(f"severity thresholds need 0 < medium <= high <= 1, got medium={medium!r}, high={high!r}")
+    return weights
+
+
+class KeywordMatcher:
+    def __init__(self, lexicon, high=0.8, medium=0.5):
+        self.weights = _validate(lexicon, high, medium)
+        self.high = high
+        self.medium = medium
+        self.pattern = re.compile(r"\b" + trie_pattern(self.weights) + r"\b")
+
+    def find(self, text):
+        """Distinct lexicon terms in `text`, in order of first appearance."""
+        return list(dict.fromkeys(_normalize(m) for m in self.pattern.findall((text or "").lower())))
+
+    def score(self, matches):
+        remaining = 1.0
+        for term in matches:
+            remaining *= 1.0 - self.weights[term]
+        return 1.0 - remaining
+
+    def severity(self, score):
+        if score >= self.high:
+            return "high"
+        if score >= self.medium:
+            return "medium"
+        return "low"
+
+    def analyze(self, text):
+        matches = self.find(text)
+        score = self.score(matches)
+        return VoiceAnalysis(matches, round(score, 4), self.severity(score) if matches else None)
+
+
+def load_lexicon():
+    path = getattr(settings, "VOICE_KEYWORDS_FILE", None)
+    if not path:
+        return DEFAULT_LEXICON
+    with open(path) as f:
+        return json.load(f)
+
+
+def build_matcher():
+    try:
+        return KeywordMatcher(
+            load_lexicon(),
+            high=getattr(settings, "VOICE_SEVERITY_HIGH", 0.8),
+            medium=getattr(settings, "VOICE_SEVERITY_MEDIUM", 0.5),
+        )
+    except (OSError, ValueError) as e:
+        source = getattr(settings, "VOICE_KEYWORDS_FILE", None) or "built-in lexicon"
+        raise ImproperlyConfigured(f"Invalid voice keywords ({source}): {e}") from e
+
+
+keyword_matcher = build_matcher()
@@ -0,0 +1,62 @@
+"""
+Load-on-first-use holders for expensive process-wide resources (the ML
+model, push clients). Nothing here runs at import time, so management
+commands and requests that never touch ML or push do not pay for them.
+
+Resources can be warmed explicitly, e.g. from gunicorn's post_worker_init
+hook (see gunicorn.conf.py), with `warm_up()`.
+"""
+import threading
+import time
+
+_registry = {}
+
+
+class Lazy:
+    """Thread-safe holder that calls `loader()` once, on first `get()`."""
+
+    def __init__(self, name, loader):
+        self.name = name
+        self._loader = loader
+        self._value = None
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.load_seconds = None
+        _registry[name] = self
+
+    @property
+    def loaded(self):
+        return self._loaded
+
+    def get(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    t0 = time.perf_counter()
+                    self._value = self._loader()
+                    self.load_seconds = time.perf_counter() - t0
+                    self._loaded = True
+        return self._value
+
+    def reset(self):
+        with self._lock:
+            self._value = None
+            self._loaded = False
+            self.load_seconds = None
+
+
+def warm_up(*names):
+    """Load the named resources (all registered ones by default); returns load times."""
+    # Modules that register resources
+    from . import ml_model, utils  # noqa: F401
+
+    timings = {}
+    for name in names or list(_registry):
+        resource = _registry[name]
+        try:
+            resource.get()
+            timings[name] = resource.load_seconds
+        except Exception as e:
+            print(f"⚠️ [BACKEND] Warm-up of {name} failed: {e}")
+            timings[name] = None
+    return timings
@@ -0,0 +1,281 @@
+"""
+In-process spatial grid of live incidents.
+
+"Which alerts should this device see right now?" is asked on every poll, so
+the answer comes from memory instead of the database: recent AccidentReports
+(for LIVE_ACCIDENT_TTL_SECONDS) and BLEAlerts still inside their
+broadcast_duration sit in a uniform lat/lon grid of LIVE_GRID_CELL_DEGREES
+cells. A query looks only at the cells overlapping the search circle and
+computes exact distances for those entries.
+
+Entries expire by time (a min-heap of expiry times, drained lazily on every
+write and query). The grid is kept current incrementally:
+  * rows created or updated by this process are applied on commit (post_save
+    receivers in api/signals.py, plus explicit calls after bulk_create),
+  * rows written by other workers are picked up by a background sync that
+    reads only rows newer than the last one seen, at most every
+    LIVE_GRID_SYNC_SECONDS; polls never wait on it.
+"""
+import heapq
+import math
+import threading
+import time
+from collections import namedtuple
+from itertools import chain
+
+import numpy as np
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from .geo import KM_PER_DEGREE, haversine_km
+
+LiveIncident = namedtuple("LiveIncident", "id kind latitude longitude severity expires_at payload")
+
+
+class _Cell(dict):
+    """id -> LiveIncident, plus a (lat, lon, expires_at) array rebuilt only after the cell changes."""
+    __slots__ = ("_arrays",)
+
+    def __init__(self):
+        super().__init__()
+        self._arrays = None
+
+    def changed(self):
+        self._arrays = None
+
+    def arrays(self):
+        if self._arrays is None:
+            incidents = tuple(self.values())
+            self._arrays = (
+                incidents,
+                np.array([(i.latitude, i.longitude, i.expires_at) for i in incidents], dtype=np.float64),
+            )
+        return self._arrays
+
+
+class LiveIncidentGrid:
+    """Thread-safe uniform grid of LiveIncidents keyed by id, expiring by wall-clock time."""
+
+    def __init__(self, cell_degrees=0.02):
+        self.cell_degrees = cell_degrees
+        self._lon_cells = round(360 / cell_degrees)
+        self._cells = {}    # (row, col) -> _Cell
+        self._by_id = {}    # id -> LiveIncident
+        self._expiry = []   # (expires_at, id) min-heap; stale entries skipped on pop
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def _cell(self, latitude, longitude):
+        return math.floor(latitude / self.cell_degrees), math.floor(longitude / self.cell_degrees)
+
+    def _remove(self, incident_id):
+        incident = self._by_id.pop(incident_id, None)
+        if incident is not None:
+            key = self._cell(incident.latitude, incident.longitude)
+            cell = self._cells[key]
+            del cell[incident_id]
+            cell.changed()
+            if not cell:
+                del self._cells[key]
+
+    def _expire(self, now):
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= now:
+            expires_at, incident_id = heapq.heappop(expiry)
+            incident = self._by_id.get(incident_id)
+            # Skip heap entries superseded by a later add() of the same id
+            if incident is not None and incident.expires_at == expires_at:
+                self._remove(incident_id)
+
+    def add_many(self, incidents, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            for incident in incidents:
+                self._remove(incident.id)
+                if incident.expires_at <= now:
+                    continue
+                self._by_id[incident.id] = incident
+                key = self._cell(incident.latitude, incident.longitude)
+                cell = self._cells.get(key)
+                if cell is None:
+                    cell = self._cells[key] = _Cell()
+                cell[incident.id] = incident
+                cell.changed()
+                heapq.heappush(self._expiry, (incident.expires_at, incident.id))
+            self._expire(now)
+
+    def add(self, incident, now=None):
+        self.add_many([incident], now)
+
+    def discard(self, incident_id):
+        with self._lock:
+            self._remove(incident_id)
+
+    def clear(self):
+        with self._lock:
+            self._cells.clear()
+            self._by_id.clear()
+            self._expiry.clear()
+
+    def _cells_near(self, latitude, longitude, radius_km):
+        lat_span = radius_km / KM_PER_DEGREE
+        edge = min(abs(latitude) + lat_span, 89.999)
+        lon_span = min(radius_km / (KM_PER_DEGREE * math.cos(math.radians(edge))), 180.0)
+        row_lo, col_lo = self._cell(latitude - lat_span, longitude - lon_span)
+        row_hi, col_hi = self._cell(latitude + lat_span, longitude + lon_span)
+        n = self._lon_cells
+        col_hi = min(col_hi, col_lo + n - 1)
+        n_cells = (row_hi - row_lo + 1) * (col_hi - col_lo + 1)
+
+        if n_cells > len(self._cells):
+            # Large radius: walking the occupied cells is cheaper than probing empty ones
+            def in_cols(col):
+                return any(col_lo <= c <= col_hi for c in (col - n, col, col + n))
+            return [cell for (row, col), cell in self._cells.items() if row_lo <= row <= row_hi and in_cols(col)]
+
+        cells = self._cells
+        # Columns past the antimeridian wrap around
+        found = (cells.get((row, (col + n // 2) % n - n // 2))
+                 for row in range(row_lo, row_hi + 1) for col in range(col_lo, col_hi + 1))
+        return [cell for cell in found if cell]
+
+    def query(self, latitude, longitude, radius_km, now=None, limit=None):
+        """[(LiveIncident, distance_km)] within `radius_km`, nearest first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            parts = [cell.arrays() for cell in self._cells_near(latitude, longitude, radius_km)]
+        if not parts:
+            return []
+
+        incidents = list(chain.from_iterable(p[0] for p in parts))
+        rows = np.concatenate([p[1] for p in parts]) if len(parts) > 1 else parts[0][1]
+        distances = haversine_km(latitude, longitude, rows[:, 0], rows[:, 1])
+        hits = np.flatnonzero((distances <= radius_km) & (rows[:, 2] > now))
+        hits = hits[np.argsort(distances[hits], kind="stable")][:limit]
+        return list(zip([incidents[i] for i in hits.tolist()], distances[hits].tolist()))
+
+
+# -------------------------------
+# Model rows -> LiveIncident
+# -------------------------------
+def incident_from_report(report, ttl):
+    from .outbox import report_payload
+
+    return LiveIncident(
+        id=str(report.id), kind="accident",
+        latitude=float(report.latitude), longitude=float(report.longitude),
+        severity=report.severity, expires_at=report.timestamp.timestamp() + ttl,
+        payload={**report_payload(report), "timestamp": report.timestamp.isoformat()},
+    )
+
+
+def incident_from_ble_alert(alert):
+    """None for alerts that are not (or no longer) broadcasting, or have no position."""
+    from .outbox import ble_alert_payload
+
+    if alert.status == "expired" or alert.latitude is None or alert.longitude is None:
+        return None
+    return LiveIncident(
+        id=str(alert.id), kind="ble",
+        latitude=float(alert.latitude), longitude=float(alert.longitude),
+        severity=alert.severity, expires_at=alert.timestamp.timestamp() + int(alert.broadcast_duration),
+        payload={**ble_alert_payload(alert), "timestamp": alert.timestamp.isoformat()},
+    )
+
+
+class LiveIncidents:
+    """The grid plus loading/syncing from the database; use the `live_incidents` singleton."""
+
+    # Re-read this much before the newest row seen, to catch rows that
+    # committed after later-timestamped ones
+    SYNC_OVERLAP_SECONDS = 30
+
+    def __init__(self, cell_degrees=0.02, accident_ttl=3600, sync_interval=5.0):
+        self.grid = LiveIncidentGrid(cell_degrees)
+        self.accident_ttl = accident_ttl
+        self.sync_interval = sync_interval
+        self._watermark = None
+        self._last_sync = 0.0
+        self._sync_lock = threading.Lock()
+        self._syncing = False
+
+    # -- writes from this process ---------------------------------------------
+
+    def add_reports(self, reports):
+        self.grid.add_many([incident_from_report(r, self.accident_ttl) for r in reports])
+
+    def update_ble_alert(self, alert):
+        incident = incident_from_ble_alert(alert)
+        if incident is None:
+            self.grid.discard(str(alert.id))
+        else:
+            self.grid.add(incident)
+
+    def discard(self, incident_id):
+        self.grid.discard(str(incident_id))
+
+    # -- database sync --------------------------------------------------------
+
+    def sync(self):
+        """Load rows newer than the last sync (everything live on the first call)."""
+        from .models import AccidentReport, BLEAlert
+
+        now = timezone.now()
+        since = now - timezone.timedelta(seconds=self.accident_ttl)
+        if self._watermark is not None:
+            since = max(since, self._watermark - timezone.timedelta(seconds=self.SYNC_OVERLAP_SECONDS))
+
+        reports = list(AccidentReport.objects.filter(timestamp__gte=since).order_by())
+        # Only broadcasts still live (partial expiry index); new ones since the last sync
+        alerts = BLEAlert.objects.filter(status="broadcast", expires_at__gt=now).order_by()
+        if self._watermark is not None:
+            alerts = alerts.filter(timestamp__gte=since)
+        alerts = list(alerts)
+        incidents = [incident_from_report(r, self.accident_ttl) for r in reports]
+        incidents += [i for i in map(incident_from_ble_alert, alerts) if i is not None]
+        self.grid.add_many(incidents)
+
+        newest = [row.timestamp for row in reports + alerts]
+        self._watermark = max(newest + [self._watermark or since])
+        self._last_sync = time.monotonic()
+        return len(incidents)
+
+    def _sync_in_background(self):
+        try:
+            self.sync()
+        except Exception as e:
+            print(f"❌ [BACKEND] Live incident sync failed: {e}")
+        finally:
+            connection.close()
+            self._syncing = False
+
+    def ensure_fresh(self):
+        if self._watermark is None:
+            # First use in this process: load synchronously so the first poll is complete
+            with self._sync_lock:
+                if self._watermark is None:
+                    self.sync()
+            return
+        if not self.sync_interval or self._syncing or time.monotonic() - self._last_sync < self.sync_interval:
+            return
+        with self._sync_lock:
+            if self._syncing:
+                return
+            self._syncing = True
+        threading.Thread(target=self._sync_in_background, name="live-incident-sync", daemon=True).start()
+
+    def query(self, latitude, longitude, radius_km, limit=None):
+        self.ensure_fresh()
+        return self.grid.query(latitude, longitude, radius_km, limit=limit)
+
+
+live_incidents = LiveIncidents(
+    cell_degrees=getattr(settings, "LIVE_GRID_CELL_DEGREES", 0.02),
+    accident_ttl=getattr(settings, "LIVE_ACCIDENT_TTL_SECONDS", 3600),
+    sync_interval=getattr(settings, "LIVE_GRID_SYNC_SECONDS", 5.0),
+)
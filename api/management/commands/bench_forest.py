@@ -0,0 +1,96 @@
+import json
+import subprocess
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from api.forest_engine import CompiledForest
+from api.ml_model import MODEL_PATH, FOREST_PATH
+
+# Run in a fresh interpreter per engine so each one is measured like a new worker
+LOAD_PROBE = r"""
+import json, os, sys, time
+sys.path.insert(0, sys.argv[3])
+
+def memory_kb():
+    fields = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 2 and parts[1].isdigit():
+                    fields[parts[0].rstrip(":")] = int(parts[1])
+    except OSError:
+        import resource
+        return {"rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, "private": None}
+    return {"rss": fields.get("Rss", 0),
+            "private": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)}
+
+import numpy as np
+import joblib
+import sklearn.ensemble  # imported up front so only the model load is measured
+from api.forest_engine import CompiledForest
+
+before = memory_kb()
+t0 = time.perf_counter()
+if sys.argv[1] == "joblib":
+    model = joblib.load(sys.argv[2])
+else:
+    model = CompiledForest.load(sys.argv[2])
+model.predict_proba(np.zeros((1, 6)))
+load_ms = (time.perf_counter() - t0) * 1000
+after = memory_kb()
+print(json.dumps({
+    "load_ms": load_ms,
+    "rss_kb": after["rss"] - before["rss"],
+    "private_kb": None if after["private"] is None else after["private"] - before["private"],
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Compare the pickled RandomForest with the compiled memory-mapped forest (latency and per-worker memory)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-sizes", default="1,10,100,1000,10000")
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        sklearn_model = joblib.load(MODEL_PATH)
+        compiled = CompiledForest.load(FOREST_PATH)
+
+        rng = np.random.default_rng(0)
+        max_batch = max(int(b) for b in options["batch_sizes"].split(","))
+        X = np.hstack([rng.uniform(-25, 25, (max_batch, 3)), rng.uniform(-200, 200, (max_batch, 3))])
+
+        diff = np.abs(sklearn_model.predict_proba(X) - compiled.predict_proba(X)).max()
+        self.stdout.write(f"Max |predict_proba| difference over {max_batch} rows: {diff:.2e}")
+
+        self.stdout.write(f"\n{'batch':>8} {'sklearn ms':>12} {'compiled ms':>12} {'speedup':>8}")
+        for batch in (int(b) for b in options["batch_sizes"].split(",")):
+            x = X[:batch]
+            repeat = max(1, options["repeat"] if batch <= 1000 else options["repeat"] // 10)
+            timings = []
+            for engine in (sklearn_model, compiled):
+                engine.predict_proba(x)
+                t0 = time.perf_counter()
+                for _ in range(repeat):
+                    engine.predict_proba(x)
+                timings.append((time.perf_counter() - t0) / repeat * 1000)
+            self.stdout.write(f"{batch:>8} {timings[0]:>12.3f} {timings[1]:>12.3f} {timings[0] / timings[1]:>7.1f}x")
+
+        self.stdout.write("\nPer-worker cost of loading the model (fresh interpreter each):")
+        project_root = str(__import__("pathlib").Path(FOREST_PATH).resolve().parent.parent)
+        for engine, path in (("joblib", MODEL_PATH), ("compiled", FOREST_PATH)):
+            out = subprocess.run([sys.executable, "-c", LOAD_PROBE, engine, path, project_root],
+                                 capture_output=True, text=True, check=True)
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            private = "n/a" if result["private_kb"] is None else f"{result['private_kb']} KB"
+            self.stdout.write(
+                f"  {engine:>8}: load {result['load_ms']:.1f} ms, RSS +{result['rss_kb']} KB, private +{private}"
+            )
@@ -0,0 +1,86 @@
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+def _client(mode, socket_path, n_requests, seed, start, results):
+    """One simulated web worker: per-sample predictions, like SensorAccidentReportView."""
+    from api.inference_server import InferenceClient
+    from api.ml_model import local_accident_probabilities
+
+    rng = np.random.default_rng(seed)
+    rows = np.hstack([rng.uniform(-25, 25, (n_requests, 3)), rng.uniform(-200, 200, (n_requests, 3))])
+    if mode == "sidecar":
+        client = InferenceClient(socket_path, timeout=10.0)
+        predict = client.predict_proba
+    else:
+        predict = local_accident_probabilities
+    predict(rows[:1])  # connect / load the model before the clock starts
+
+    start.wait()
+    latencies = np.empty(n_requests)
+    for i in range(n_requests):
+        t0 = time.perf_counter()
+        predict(rows[i:i + 1])
+        latencies[i] = time.perf_counter() - t0
+    results.put(latencies)
+
+
+class Command(BaseCommand):
+    help = "Compare per-sample inference in every worker with the shared micro-batching sidecar under concurrent load."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=8, help="Concurrent client processes (web workers)")
+        parser.add_argument("--requests", type=int, default=500, help="Predictions per client")
+        parser.add_argument("--max-batch", type=int, default=64)
+        parser.add_argument("--max-wait-ms", type=float, default=2.0)
+
+    def _run(self, mode, socket_path, options):
+        context = multiprocessing.get_context("fork")
+        start = context.Barrier(options["clients"] + 1)
+        results = context.Queue()
+        workers = [context.Process(target=_client, args=(mode, socket_path, options["requests"], seed, start, results))
+                   for seed in range(options["clients"])]
+        for worker in workers:
+            worker.start()
+        start.wait()
+        t0 = time.perf_counter()
+        latencies = np.concatenate([results.get() for _ in workers]) * 1000
+        elapsed = time.perf_counter() - t0
+        for worker in workers:
+            worker.join()
+        p50, p99 = np.percentile(latencies, [50, 99])
+        self.stdout.write(f"  {mode:<10} {len(latencies) / elapsed:>10.0f} {p50:>9.2f} {p99:>9.2f}")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"{options['clients']} clients x {options['requests']} single-row predictions "
+                          f"({os.cpu_count()} CPUs)")
+        self.stdout.write(f"  {'':<10} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9}")
+        self._run("in-process", None, options)
+
+        socket_path = os.path.join(tempfile.mkdtemp(), "inference.sock")
+        server = subprocess.Popen(
+            [sys.executable, "manage.py", "inference_server", "--socket", socket_path,
+             "--max-batch", str(options["max_batch"]), "--max-wait-ms", str(options["max_wait_ms"])],
+            cwd=settings.BASE_DIR, stdout=subprocess.PIPE, text=True,
+        )
+        try:
+            deadline = time.monotonic() + 60
+            while not os.path.exists(socket_path):
+                if server.poll() is not None or time.monotonic() > deadline:
+                    self.stderr.write("Inference server did not start")
+                    return
+                time.sleep(0.05)
+            self._run("sidecar", socket_path, options)
+        finally:
+            server.send_signal(signal.SIGINT)
+            output, _ = server.communicate(timeout=30)
+        self.stdout.write(f"\nSidecar: {output.strip().splitlines()[-1]}")
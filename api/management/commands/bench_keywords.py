@@ -0,0 +1,60 @@
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.keywords import DEFAULT_LEXICON, KeywordMatcher
+
+LEGACY_KEYWORDS = ["accident", "help", "emergency", "crash", "injury", "collision", "hit", "ambulance", "hospital",
+                   "injured", "hurt", "bleeding", "pain", "trapped", "call police", "call ambulance", "need help",
+                   "save me", "rescue", "urgent", "critical", "dying", "unconscious"]
+
+FILLER = ("the a white car was on road near junction and then we saw it suddenly turn left right driver "
+          "bike truck signal traffic people standing there looking while someone shouted from other side").split()
+
+
+def legacy_detect(text):
+    """What VoiceAccidentReportView used to do: lower() and a substring test per keyword."""
+    return [word for word in LEGACY_KEYWORDS if word.lower() in text.lower()]
+
+
+class Command(BaseCommand):
+    help = "Microbenchmark voice keyword matching: per-keyword substring scan vs. compiled regexes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--words", type=int, default=5000, help="Words per transcript")
+        parser.add_argument("--transcripts", type=int, default=200)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        keywords = list(DEFAULT_LEXICON)
+        transcripts = [
+            " ".join(rng.choice(keywords) if rng.random() < 0.01 else rng.choice(FILLER)
+                     for _ in range(options["words"]))
+            for _ in range(options["transcripts"])
+        ]
+        megabytes = sum(len(t) for t in transcripts) / 1e6
+
+        matcher = KeywordMatcher(DEFAULT_LEXICON)
+        flat = re.compile(r"\b(?:" + "|".join(
+            re.escape(t).replace(r"\ ", r"\s+") for t in sorted(matcher.weights, key=len, reverse=True)
+        ) + r")\b")
+
+        variants = [
+            ("substring per keyword (old)", legacy_detect),
+            ("flat alternation regex", lambda t: flat.findall(t.lower())),
+            ("trie-factored regex", matcher.find),
+            ("  + severity scoring", matcher.analyze),
+        ]
+        self.stdout.write(f"{len(transcripts)} transcripts x {options['words']} words ({megabytes:.1f} MB)")
+        self.stdout.write(f"  {'':<30} {'us/transcript':>14} {'MB/s':>8}")
+        for label, func in variants:
+            t0 = time.perf_counter()
+            for text in transcripts:
+                func(text)
+            elapsed = time.perf_counter() - t0
+            self.stdout.write(f"  {label:<30} {elapsed / len(transcripts) * 1e6:>14.0f} {megabytes / elapsed:>8.1f}")
+
+        sample = "a white car sped past the hitchhiker"
+        self.stdout.write(f"\nFalse positives on {sample!r}: old {legacy_detect(sample)}, new {matcher.find(sample)}")
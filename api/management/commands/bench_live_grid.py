@@ -0,0 +1,83 @@
+import random
+import statistics as stats
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.live_grid import LiveIncident, LiveIncidentGrid
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the in-memory live incident grid (api/live_grid.py): bulk load, proximity "
+        "query latency/throughput and time-based expiry. Needs no database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--points", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=10_000)
+        parser.add_argument("--radius", type=float, default=2.0, help="Query radius in km")
+        parser.add_argument("--span", type=float, default=1.0,
+                            help="Points are spread over a span x span degree box (~110 km at 1.0)")
+        parser.add_argument("--cell", type=float, default=0.02, help="Grid cell size in degrees")
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        span = options["span"]
+        lat0, lon0 = 17.0, 78.0
+        now = time.time()
+
+        incidents = [
+            LiveIncident(
+                id=str(i), kind=rng.choice(("accident", "ble")),
+                latitude=lat0 + rng.random() * span, longitude=lon0 + rng.random() * span,
+                severity=rng.choice(("low", "medium", "high")),
+                # Expiries spread over the next 10 minutes
+                expires_at=now + rng.uniform(1, 600),
+                payload={"id": str(i)},
+            )
+            for i in range(options["points"])
+        ]
+        grid = LiveIncidentGrid(options["cell"])
+
+        t0 = time.perf_counter()
+        grid.add_many(incidents, now=now)
+        load_s = time.perf_counter() - t0
+        self.stdout.write(f"Loaded {len(grid)} incidents in {load_s * 1000:.0f} ms "
+                          f"({len(grid) / load_s:,.0f}/s)")
+
+        t0 = time.perf_counter()
+        for incident in incidents[:10_000]:
+            grid.add(incident._replace(expires_at=incident.expires_at + 1), now=now)
+        upsert_us = (time.perf_counter() - t0) / min(10_000, len(incidents)) * 1e6
+        self.stdout.write(f"Single upsert: {upsert_us:.1f} us")
+
+        points = [(lat0 + rng.random() * span, lon0 + rng.random() * span) for _ in range(options["queries"])]
+        # The first pass also builds each touched cell's coordinate array
+        for label in ("cold", "warm"):
+            latencies, hits = [], 0
+            t_start = time.perf_counter()
+            for lat, lon in points:
+                t0 = time.perf_counter()
+                hits += len(grid.query(lat, lon, options["radius"], now=now))
+                latencies.append(time.perf_counter() - t0)
+            elapsed = time.perf_counter() - t_start
+            latencies.sort()
+            self.stdout.write(
+                f"{len(points)} queries ({label}), radius {options['radius']} km: "
+                f"{len(points) / elapsed:,.0f} queries/s, p50 {stats.median(latencies) * 1e6:.0f} us, "
+                f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:.0f} us, {hits / len(points):.1f} hits/query"
+            )
+
+        # Half of the entries expire; the next query drains them from the heap
+        later = now + 300
+        t0 = time.perf_counter()
+        grid.query(lat0, lon0, options["radius"], now=later)
+        expire_ms = (time.perf_counter() - t0) * 1000
+        self.stdout.write(f"Expired down to {len(grid)} live incidents in {expire_ms:.0f} ms")
+
+        t_start = time.perf_counter()
+        for lat, lon in points:
+            grid.query(lat, lon, options["radius"], now=later)
+        elapsed = time.perf_counter() - t_start
+        self.stdout.write(f"After expiry: {len(points) / elapsed:,.0f} queries/s")
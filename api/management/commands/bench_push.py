@@ -0,0 +1,82 @@
+import datetime
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.fcm_stub import serve_in_thread
+from api.models import CloudAlert
+from api.push_delivery import FCMClient, PushDeliveryEngine
+from api.rollups import rebuild
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark CloudAlert push delivery against the local FCM stub: enqueue latency "
+        "(row write + enqueue, as in CloudAlertView) and delivered pushes/sec. "
+        "Writes and then deletes benchmark rows, so point it at a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--alerts", type=int, default=5000)
+        parser.add_argument("--latency-ms", type=float, default=20, help="Simulated FCM latency")
+        parser.add_argument("--failure-rate", type=float, default=0.02, help="Share of retryable 503s")
+        parser.add_argument("--invalid-tokens", type=float, default=0.01, help="Share of permanently bad tokens")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=200)
+
+    def handle(self, *args, **options):
+        port = _free_port()
+        stub = serve_in_thread(port=port, latency_ms=options["latency_ms"], failure_rate=options["failure_rate"])
+        engine = PushDeliveryEngine(
+            batch_size=options["batch_size"],
+            concurrency=options["concurrency"],
+            backoff_base=0.05,
+            client_factory=lambda: FCMClient(f"http://127.0.0.1:{port}", "bench"),
+        )
+        engine.start()
+
+        n = options["alerts"]
+        invalid_every = int(1 / options["invalid_tokens"]) if options["invalid_tokens"] else 0
+        latencies = []
+        ids = []
+        started_at = time.time()
+        started = time.perf_counter()
+        for i in range(n):
+            token = f"invalid-{i}" if invalid_every and i % invalid_every == 0 else f"token-{i}"
+            t0 = time.perf_counter()
+            alert = CloudAlert.objects.create(
+                device_token=token, title="Emergency Alert", alert_message="Benchmark",
+                data={"bench": True}, status="pending",
+            )
+            engine.enqueue([alert.id])
+            latencies.append((time.perf_counter() - t0) * 1000)
+            ids.append(alert.id)
+        enqueue_done = time.perf_counter()
+
+        while engine.stats["delivered"] + engine.stats["failed"] < n:
+            if engine.stats["errors"]:
+                self.stderr.write(f"Delivery errors: {dict(engine.stats)}")
+                break
+            time.sleep(0.01)
+        finished = time.perf_counter()
+
+        latencies.sort()
+        counts = {row: CloudAlert.objects.filter(id__in=ids, status=row).count() for row in ("delivered", "failed", "pending")}
+        CloudAlert.objects.filter(id__in=ids).delete()
+        # The deleted rows were counted into the hourly rollups on insert
+        rebuild(since=datetime.datetime.fromtimestamp(started_at, datetime.timezone.utc), channels=["cloud"])
+
+        self.stdout.write(f"Alerts:            {n}")
+        self.stdout.write(f"Enqueue latency:   p50 {latencies[n // 2]:.2f} ms, p99 {latencies[int(n * 0.99) - 1]:.2f} ms "
+                          f"(write + enqueue, {n / (enqueue_done - started):.0f} alerts/sec)")
+        self.stdout.write(f"Delivery:          {n / (finished - started):.0f} pushes/sec end to end")
+        self.stdout.write(f"Final rows:        {counts}")
+        self.stdout.write(f"Engine stats:      {dict(engine.stats)}")
+        self.stdout.write(f"Stub stats:        {stub['stats']}")
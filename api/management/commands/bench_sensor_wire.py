@@ -0,0 +1,59 @@
+import io
+import time
+
+import msgpack
+import numpy as np
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+
+from api import sensor_wire
+from api.sensor_wire import SENSOR_COLUMNS
+
+
+def _json_decode(body):
+    """What SensorAccidentReportView does for JSON: DRF's parser, then float() per field."""
+    data = JSONParser().parse(io.BytesIO(body))
+    return [tuple(float(r.get(name, 0)) for name in SENSOR_COLUMNS) + (float(r["timestamp"]),) for r in data]
+
+
+def _msgpack_decode(body):
+    return [tuple(float(r.get(name, 0)) for name in SENSOR_COLUMNS) + (float(r["timestamp"]),)
+            for r in msgpack.unpackb(body)]
+
+
+def _binary_decode(body):
+    return sensor_wire.decode_records(body).tolist()
+
+
+class Command(BaseCommand):
+    help = "Microbenchmark sensor upload bodies: bytes on the wire and decode time for JSON, msgpack and packed records."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--samples", type=int, nargs="+", default=[1, 50, 500],
+                            help="Samples per request body")
+        parser.add_argument("--repeat", type=int, default=2000, help="Decodes per body")
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(0)
+        self.stdout.write(f"  {'samples':>7} {'format':<8} {'bytes':>8} {'B/sample':>9} {'us/body':>9} {'us/sample':>10}")
+        for n in options["samples"]:
+            rows = np.column_stack([rng.uniform(-90, 90, n), rng.uniform(-180, 180, n),
+                                    rng.normal(0, 3, (n, 3)), rng.normal(0, 30, (n, 3))])
+            timestamps = 1.7e9 + np.arange(n) / 50
+            readings = [{**dict(zip(SENSOR_COLUMNS, row)), "timestamp": ts}
+                        for row, ts in zip(rows.tolist(), timestamps.tolist())]
+            bodies = [
+                ("json", JSONParser.renderer_class().render(readings), _json_decode),
+                ("msgpack", msgpack.packb(readings), _msgpack_decode),
+                ("binary", sensor_wire.encode_records(rows, timestamps), _binary_decode),
+            ]
+            repeat = max(1, options["repeat"] // n)
+            for label, body, decode in bodies:
+                decoded = decode(body)
+                assert len(decoded) == n
+                t0 = time.perf_counter()
+                for _ in range(repeat):
+                    decode(body)
+                per_body = (time.perf_counter() - t0) / repeat * 1e6
+                self.stdout.write(f"  {n:>7} {label:<8} {len(body):>8} {len(body) / n:>9.1f} "
+                                  f"{per_body:>9.1f} {per_body / n:>10.2f}")
@@ -0,0 +1,121 @@
+import random
+import statistics as stats
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from api.models import AccidentReport, BLEAlert, CloudAlert, User
+from api.row_serializers import ACCIDENT_REPORT_ROWS, BLE_ALERT_ROWS, CLOUD_ALERT_ROWS
+from api.serializers import AccidentReportSerializer, BLEAlertSerializer, CloudAlertSerializer
+
+BENCH_MARKER = "__bench__"
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed accident reports and BLE/Cloud alerts and compare rows/sec of the DRF serializers "
+        "with the values_list() fast path (api/row_serializers.py). Use a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10_000, help="Rows to seed per table")
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded rows")
+
+    def _seed(self, rows, n_users):
+        rng = random.Random(0)
+        now = timezone.now()
+        users = User.objects.bulk_create([
+            User(username=f"{BENCH_MARKER}{i}", email=f"bench{i}@example.com", phone_number=f"{BENCH_MARKER}{i}",
+                 is_driver=rng.random() < 0.5)
+            for i in range(n_users)
+        ])
+        AccidentReport.objects.bulk_create([
+            AccidentReport(
+                # A quarter of the reports are anonymous (user is NULL)
+                user=rng.choice(users) if rng.random() < 0.75 else None,
+                latitude=17 + rng.random(), longitude=78 + rng.random(),
+                severity=rng.choice(("low", "medium", "high")),
+                description=BENCH_MARKER,
+                reported_via=rng.choice(("sensor", "voice", "manual")),
+            ) for _ in range(rows)
+        ], batch_size=5000)
+        BLEAlert.objects.bulk_create([
+            BLEAlert(
+                location_name=BENCH_MARKER,
+                latitude=17 + rng.random(), longitude=78 + rng.random(),
+                severity=rng.choice(("low", "medium", "high")),
+                timestamp=now - timezone.timedelta(seconds=rng.randrange(86400)),
+            ) for _ in range(rows)
+        ], batch_size=5000)
+        CloudAlert.objects.bulk_create([
+            CloudAlert(
+                device_token=f"{BENCH_MARKER}{rng.getrandbits(128):032x}",
+                is_emergency=rng.random() < 0.2,
+                data={"report_id": str(rng.getrandbits(64))},
+                status=rng.choice(("sent", "delivered", "failed")),
+                timestamp=now - timezone.timedelta(seconds=rng.randrange(86400)),
+            ) for _ in range(rows)
+        ], batch_size=5000)
+
+    def _measure(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            # The N+1 variant overflows the 9000-entry query log otherwise
+            connection.queries_log.clear()
+            with CaptureQueriesContext(connection) as ctx:
+                t0 = time.perf_counter()
+                result = func()
+                timings.append(time.perf_counter() - t0)
+        return result, len(ctx.captured_queries), stats.median(timings)
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        if not BLEAlert.objects.filter(location_name=BENCH_MARKER).exists():
+            self.stdout.write(f"Seeding {rows} rows per table...")
+            self._seed(rows, options["users"])
+
+        reports = AccidentReport.objects.filter(description=BENCH_MARKER).order_by('-timestamp', '-id')
+        ble = BLEAlert.objects.filter(location_name=BENCH_MARKER).order_by('-timestamp', '-id')
+        cloud = CloudAlert.objects.filter(device_token__startswith=BENCH_MARKER).order_by('-timestamp', '-id')
+
+        cases = [
+            ("accident reports", [
+                ("DRF serializer (N+1 users)", lambda: AccidentReportSerializer(reports.all(), many=True).data),
+                ("DRF + select_related",
+                 lambda: AccidentReportSerializer(reports.select_related('user'), many=True).data),
+                ("values_list fast path", lambda: ACCIDENT_REPORT_ROWS.many(ACCIDENT_REPORT_ROWS.rows(reports))),
+            ]),
+            ("BLE alerts", [
+                ("DRF serializer", lambda: BLEAlertSerializer(ble.all(), many=True).data),
+                ("values_list fast path", lambda: BLE_ALERT_ROWS.many(BLE_ALERT_ROWS.rows(ble))),
+            ]),
+            ("cloud alerts", [
+                ("DRF serializer", lambda: CloudAlertSerializer(cloud.all(), many=True).data),
+                ("values_list fast path", lambda: CLOUD_ALERT_ROWS.many(CLOUD_ALERT_ROWS.rows(cloud))),
+            ]),
+        ]
+
+        try:
+            for table, variants in cases:
+                self.stdout.write(f"\n{table}")
+                self.stdout.write(f"  {'':<28} {'queries':>8} {'ms':>9} {'rows/sec':>11}")
+                expected = None
+                for label, func in variants:
+                    result, queries, seconds = self._measure(func, options["repeat"])
+                    result = [dict(row) for row in result]
+                    if expected is None:
+                        expected = result
+                    assert result == expected, f"{label} output differs from the DRF serializer"
+                    self.stdout.write(
+                        f"  {label:<28} {queries:>8} {seconds * 1000:>9.1f} {len(result) / seconds:>11,.0f}")
+        finally:
+            if not options["keep"]:
+                AccidentReport.objects.filter(description=BENCH_MARKER).delete()
+                BLEAlert.objects.filter(location_name=BENCH_MARKER).delete()
+                CloudAlert.objects.filter(device_token__startswith=BENCH_MARKER).delete()
+                User.objects.filter(username__startswith=BENCH_MARKER).delete()
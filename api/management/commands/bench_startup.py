@@ -0,0 +1,64 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# What a gunicorn worker does before serving its first request
+WORKER_BOOT = (
+    "import os; os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'accident_detection.settings');"
+    "from accident_detection.asgi import application;"
+    "import api.views"
+)
+WORKER_FIRST_PREDICTION = WORKER_BOOT + ";from api.ml_model import predict_accident_batch;predict_accident_batch([[0] * 6])"
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|\s+(.*)")
+
+
+class Command(BaseCommand):
+    help = "Measure cold-start time of manage.py and of a worker boot, with `python -X importtime` breakdown."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--top", type=int, default=15, help="Slowest top-level imports to list")
+
+    def _time(self, argv, runs):
+        durations = []
+        for _ in range(runs):
+            t0 = time.perf_counter()
+            subprocess.run(argv, cwd=settings.BASE_DIR, capture_output=True, check=True)
+            durations.append((time.perf_counter() - t0) * 1000)
+        return statistics.median(durations)
+
+    def _importtime(self, code):
+        out = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                             cwd=settings.BASE_DIR, capture_output=True, text=True, check=True)
+        imports = []
+        for line in out.stderr.splitlines():
+            match = IMPORTTIME_LINE.match(line)
+            # Only top-level packages; nested ones are included in their parent's cumulative time
+            if match and not match.group(3).startswith(" "):
+                imports.append((int(match.group(2)), match.group(3).strip()))
+        return sorted(imports, reverse=True)
+
+    def handle(self, *args, **options):
+        runs = options["runs"]
+        manage = os.path.join(settings.BASE_DIR, "manage.py")
+        scenarios = [
+            ("manage.py check", [sys.executable, manage, "check"]),
+            ("worker boot", [sys.executable, "-c", WORKER_BOOT]),
+            ("worker boot + first prediction", [sys.executable, "-c", WORKER_FIRST_PREDICTION]),
+        ]
+
+        self.stdout.write(f"Median wall time over {runs} cold runs:")
+        for label, argv in scenarios:
+            self.stdout.write(f"  {label:<32} {self._time(argv, runs):8.1f} ms")
+
+        for label, code in (("worker boot", WORKER_BOOT), ("first prediction", WORKER_FIRST_PREDICTION)):
+            self.stdout.write(f"\nSlowest top-level imports ({label}, cumulative):")
+            for micros, module in self._importtime(code)[:options["top"]]:
+                self.stdout.write(f"  {micros / 1000:8.1f} ms  {module}")
@@ -0,0 +1,140 @@
+import random
+import statistics as stats
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from api.models import BLEAlert, CloudAlert
+from api.rollups import rebuild
+from api.statistics import alert_statistics, ble_alert_statistics, cloud_alert_statistics, statistics_cache
+
+BENCH_MARKER = "__bench__"
+
+
+def legacy_statistics(now=None):
+    """The per-number COUNT(*) queries AlertStatisticsView used to run."""
+    now = now or timezone.now()
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    last_24_hours = now - timezone.timedelta(hours=24)
+    last_7_days = now - timezone.timedelta(days=7)
+    ble_total = BLEAlert.objects.count()
+    cloud_total = CloudAlert.objects.count()
+    return {
+        "ble_alerts": {
+            "total": ble_total,
+            "today": BLEAlert.objects.filter(timestamp__gte=today).count(),
+            "last_24_hours": BLEAlert.objects.filter(timestamp__gte=last_24_hours).count(),
+            "last_7_days": BLEAlert.objects.filter(timestamp__gte=last_7_days).count(),
+            "severity_breakdown": {
+                "high": BLEAlert.objects.filter(severity='high').count(),
+                "medium": BLEAlert.objects.filter(severity='medium').count(),
+                "low": BLEAlert.objects.filter(severity='low').count(),
+            },
+        },
+        "cloud_alerts": {
+            "total": cloud_total,
+            "today": CloudAlert.objects.filter(timestamp__gte=today).count(),
+            "last_24_hours": CloudAlert.objects.filter(timestamp__gte=last_24_hours).count(),
+            "last_7_days": CloudAlert.objects.filter(timestamp__gte=last_7_days).count(),
+            "emergency_alerts": CloudAlert.objects.filter(is_emergency=True).count(),
+            "status_breakdown": {
+                "pending": CloudAlert.objects.filter(status='pending').count(),
+                "sent": CloudAlert.objects.filter(status='sent').count(),
+                "delivered": CloudAlert.objects.filter(status='delivered').count(),
+                "failed": CloudAlert.objects.filter(status='failed').count(),
+            },
+        },
+        "total_alerts": ble_total + cloud_total,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed BLE/Cloud alerts and compare query count and latency of the old per-count "
+        "statistics with the conditional-aggregation and rollup versions. Use a scratch database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Rows to seed per table")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--keep", action="store_true", help="Keep the seeded rows")
+
+    def _seed(self, rows):
+        rng = random.Random(0)
+        now = timezone.now()
+        batch = 10_000
+        for start in range(0, rows, batch):
+            size = min(batch, rows - start)
+            BLEAlert.objects.bulk_create([
+                BLEAlert(
+                    location_name=BENCH_MARKER,
+                    latitude=17 + rng.random(), longitude=78 + rng.random(),
+                    severity=rng.choice(("low", "medium", "high")),
+                    status=rng.choice(("broadcast", "received", "expired")),
+                    timestamp=now - timezone.timedelta(seconds=rng.randrange(30 * 86400)),
+                ) for _ in range(size)
+            ], batch_size=batch)
+            CloudAlert.objects.bulk_create([
+                CloudAlert(
+                    device_token=BENCH_MARKER,
+                    is_emergency=rng.random() < 0.2,
+                    status=rng.choice(("pending", "sent", "delivered", "failed", "read")),
+                    timestamp=now - timezone.timedelta(seconds=rng.randrange(30 * 86400)),
+                ) for _ in range(size)
+            ], batch_size=batch)
+
+    def _measure(self, func, repeat):
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as ctx:
+                t0 = time.perf_counter()
+                result = func()
+                timings.append((time.perf_counter() - t0) * 1000)
+        return result, len(ctx.captured_queries), stats.median(timings)
+
+    def handle(self, *args, **options):
+        existing = BLEAlert.objects.filter(location_name=BENCH_MARKER).count()
+        if existing < options["rows"]:
+            self.stdout.write(f"Seeding {options['rows'] - existing} rows per table...")
+            t0 = time.perf_counter()
+            self._seed(options["rows"] - existing)
+            # bulk_create bypasses the rollup signals
+            rebuild(channels=["ble", "cloud"])
+            self.stdout.write(f"  seeded in {time.perf_counter() - t0:.1f}s")
+
+        try:
+            statistics_cache.ttl = 0
+            _, legacy_queries, legacy_ms = self._measure(legacy_statistics, options["repeat"])
+            with override_settings(ALERT_STATISTICS_SOURCE="raw"):
+                _, raw_queries, raw_ms = self._measure(alert_statistics, options["repeat"])
+            with override_settings(ALERT_STATISTICS_SOURCE="rollup"):
+                _, rollup_queries, rollup_ms = self._measure(alert_statistics, options["repeat"])
+
+            # Same payload from every source at one fixed instant
+            now = timezone.now()
+            expected = legacy_statistics(now)
+            for source in ("raw", "rollup"):
+                with override_settings(ALERT_STATISTICS_SOURCE=source):
+                    payload = {"ble_alerts": ble_alert_statistics(now), "cloud_alerts": cloud_alert_statistics(now)}
+                payload["total_alerts"] = payload["ble_alerts"]["total"] + payload["cloud_alerts"]["total"]
+                assert payload == expected, f"{source} statistics differ from the per-count queries"
+
+            statistics_cache.ttl = 5
+            statistics_cache.clear()
+            alert_statistics()
+            _, cached_queries, cached_ms = self._measure(alert_statistics, options["repeat"])
+
+            self.stdout.write(f"\nRows: {BLEAlert.objects.count()} BLE, {CloudAlert.objects.count()} cloud")
+            self.stdout.write(f"{'':<28} {'queries':>8} {'median ms':>10}")
+            self.stdout.write(f"{'per-count queries (old)':<28} {legacy_queries:>8} {legacy_ms:>10.1f}")
+            self.stdout.write(f"{'conditional aggregation':<28} {raw_queries:>8} {raw_ms:>10.1f}")
+            self.stdout.write(f"{'hourly rollups':<28} {rollup_queries:>8} {rollup_ms:>10.1f}")
+            self.stdout.write(f"{'  + TTL cache hit':<28} {cached_queries:>8} {cached_ms:>10.3f}")
+        finally:
+            if not options["keep"]:
+                BLEAlert.objects.filter(location_name=BENCH_MARKER).delete()
+                CloudAlert.objects.filter(device_token=BENCH_MARKER).delete()
+                rebuild(channels=["ble", "cloud"])
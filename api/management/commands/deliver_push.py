@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from api.push_delivery import PushDeliveryEngine
+from django.conf import settings
+
+
+class Command(BaseCommand):
+    help = "Run the CloudAlert push dispatcher in the foreground, delivering rows left in 'pending'."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sweep-interval", type=float, default=5,
+                            help="Seconds between scans for pending alerts")
+
+    def handle(self, *args, **options):
+        engine = PushDeliveryEngine(
+            batch_size=getattr(settings, "PUSH_BATCH_SIZE", 500),
+            max_wait_ms=getattr(settings, "PUSH_MAX_WAIT_MS", 50),
+            max_retries=getattr(settings, "PUSH_MAX_RETRIES", 5),
+            concurrency=getattr(settings, "PUSH_CONCURRENCY", 200),
+            lease_seconds=getattr(settings, "PUSH_LEASE_SECONDS", 300),
+            sweep_interval=options["sweep_interval"],
+        )
+        self.stdout.write(f"Delivering pending cloud alerts (sweep every {options['sweep_interval']}s)...")
+        try:
+            engine.run_forever()
+        except KeyboardInterrupt:
+            self.stdout.write(f"Stopped. {dict(engine.stats)}")
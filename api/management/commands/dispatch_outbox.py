@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.outbox import outbox_dispatcher
+
+
+class Command(BaseCommand):
+    help = "Drain the notification outbox (run with OUTBOX_IN_PROCESS=False to keep fan-out out of web workers)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Drain what is due and exit")
+        parser.add_argument("--poll-interval", type=float, default=1.0)
+
+    def handle(self, *args, **options):
+        if options["once"]:
+            self.stdout.write(f"Processed {outbox_dispatcher.drain()} outbox events")
+            return
+        self.stdout.write(f"Dispatching outbox events as {outbox_dispatcher.worker_id}...")
+        while True:
+            if not outbox_dispatcher.drain():
+                time.sleep(options["poll_interval"])
@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+
+from api.expiry import expire_ble_alerts, prune_ble_alerts
+
+
+class Command(BaseCommand):
+    help = (
+        "Expire BLE alerts past their broadcast_duration and prune long-expired ones. "
+        "Runs once, or every --interval seconds as a periodic worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, help="Keep running, sweeping every N seconds")
+        parser.add_argument("--prune-days", type=int, default=30,
+                            help="Delete alerts that expired more than N days ago (0 disables pruning)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows deleted per transaction")
+        parser.add_argument("--archive", help="Append pruned rows to this gzipped NDJSON file first")
+
+    def sweep(self, options):
+        now = timezone.now()
+        expired = expire_ble_alerts(now)
+        pruned = 0
+        if options["prune_days"]:
+            pruned = prune_ble_alerts(
+                now - timezone.timedelta(days=options["prune_days"]),
+                batch_size=options["batch_size"],
+                archive_path=options["archive"],
+            )
+        if expired or pruned or not options["interval"]:
+            self.stdout.write(f"Expired {expired} BLE alerts, pruned {pruned}")
+
+    def handle(self, *args, **options):
+        if not options["interval"]:
+            self.sweep(options)
+            return
+
+        self.stdout.write(f"Sweeping BLE alerts every {options['interval']}s")
+        while True:
+            try:
+                close_old_connections()
+                self.sweep(options)
+            except Exception as e:
+                print(f"❌ [BACKEND] BLE alert sweep failed: {e}")
+            time.sleep(options["interval"])
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api import querysets
+from api.models import AccidentReport, BLEAlert
+
+# Plan lines that mean "read the whole table"
+FULL_SCAN_MARKERS = ("Seq Scan", "SCAN api_", "SCAN TABLE")
+
+
+class Command(BaseCommand):
+    help = "Print EXPLAIN plans for the list endpoints' querysets and flag full table scans."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--analyze", action="store_true",
+                            help="Postgres only: EXPLAIN ANALYZE (runs the queries)")
+
+    def scenarios(self):
+        return [
+            ("accidents/ (AccidentReportView)", querysets.accident_report_list()),
+            ("ble-alerts/ default 24h", querysets.ble_alert_list()),
+            ("ble-alerts/?severity=high", querysets.ble_alert_list(severity="high")),
+            ("ble-alerts/?status=broadcast", querysets.ble_alert_list(status="broadcast")),
+            ("ble-alerts/?severity=high&status=broadcast",
+             querysets.ble_alert_list(severity="high", status="broadcast")),
+            ("ble-alerts/?active=true", querysets.ble_alert_list(active=True)),
+            ("cloud-alerts/ default 24h", querysets.cloud_alert_list()),
+            ("cloud-alerts/?status=failed", querysets.cloud_alert_list(status="failed")),
+            ("cloud-alerts/?is_emergency=true", querysets.cloud_alert_list(is_emergency=True)),
+            ("nearby/ accident reports, 5 km",
+             querysets.nearby_candidates(AccidentReport, 17.385, 78.4867, 5.0)),
+            ("nearby/ BLE alerts, 5 km", querysets.nearby_candidates(BLEAlert, 17.385, 78.4867, 5.0)),
+        ]
+
+    def handle(self, *args, **options):
+        explain_options = {}
+        if options["analyze"] and connection.vendor == "postgresql":
+            explain_options = {"analyze": True, "buffers": True}
+
+        full_scans = []
+        for label, queryset in self.scenarios():
+            plan = queryset.explain(**explain_options)
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(str(queryset.query))
+            self.stdout.write(plan + "\n")
+            # "USING COVERING INDEX"/"USING INDEX" lines are fine on SQLite
+            if any(marker in line and "INDEX" not in line
+                   for line in plan.splitlines() for marker in FULL_SCAN_MARKERS):
+                full_scans.append(label)
+
+        if full_scans:
+            self.stdout.write(self.style.WARNING("Full table scans: " + ", ".join(full_scans)))
+        else:
+            self.stdout.write(self.style.SUCCESS("No full table scans"))
@@ -0,0 +1,34 @@
+import joblib
+from django.core.management.base import BaseCommand, CommandError
+
+from api.forest_engine import export_forest
+from api.ml_model import MODEL_PATH, FOREST_PATH
+
+
+class Command(BaseCommand):
+    help = "Flatten the pickled RandomForest into memory-mappable node arrays used for inference."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", default=MODEL_PATH, help="Pickled RandomForestClassifier")
+        parser.add_argument("--output", default=FOREST_PATH, help="Directory for the .npy arrays")
+        parser.add_argument("--medium", type=float,
+                            help="Medium severity threshold (default: the model's, else the existing meta.json's)")
+        parser.add_argument("--high", type=float, help="High severity threshold (same defaults)")
+
+    def handle(self, *args, **options):
+        if (options["medium"] is None) != (options["high"] is None):
+            raise CommandError("Pass both --medium and --high, or neither")
+        thresholds = None
+        if options["medium"] is not None:
+            if not 0 <= options["medium"] <= options["high"] <= 1:
+                raise CommandError("Thresholds must satisfy 0 <= medium <= high <= 1")
+            thresholds = {"medium": options["medium"], "high": options["high"]}
+
+        model = joblib.load(options["model"])
+        meta = export_forest(model, options["output"], thresholds)
+        self.stdout.write(self.style.SUCCESS(
+            f"Exported {meta['n_trees']} trees / {meta['n_nodes']} nodes "
+            f"(max depth {meta['max_depth']}) to {options['output']}"
+        ))
+        if "severity_thresholds" not in meta:
+            self.stderr.write("No severity thresholds: grading falls back to the defaults in api/ml_model.py")
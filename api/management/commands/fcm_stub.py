@@ -0,0 +1,18 @@
+from aiohttp import web
+from django.core.management.base import BaseCommand
+
+from api.fcm_stub import make_app
+
+
+class Command(BaseCommand):
+    help = "Serve a local FCM HTTP v1 stub for offline push benchmarks (set FCM_ENDPOINT to point at it)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=9099)
+        parser.add_argument("--latency-ms", type=float, default=20)
+        parser.add_argument("--failure-rate", type=float, default=0.0)
+
+    def handle(self, *args, **options):
+        app = make_app(latency_ms=options["latency_ms"], failure_rate=options["failure_rate"])
+        web.run_app(app, host=options["host"], port=options["port"], access_log=None)
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.inference_server import InferenceServer
+from api.ml_model import versioned_accident_probabilities
+
+
+class Command(BaseCommand):
+    help = "Serve accident predictions to the web workers over a Unix socket, micro-batching concurrent requests."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--socket", default=getattr(settings, "INFERENCE_SOCKET", None),
+                            help="Unix socket path (default: INFERENCE_SOCKET)")
+        parser.add_argument("--max-batch", type=int, default=getattr(settings, "INFERENCE_MAX_BATCH", 64))
+        parser.add_argument("--max-wait-ms", type=float, default=getattr(settings, "INFERENCE_MAX_WAIT_MS", 2.0))
+
+    def handle(self, *args, **options):
+        if not options["socket"]:
+            self.stderr.write("Set INFERENCE_SOCKET or pass --socket")
+            return
+        # Load the model before accepting connections
+        versioned_accident_probabilities([[0.0] * 6])
+        server = InferenceServer(
+            options["socket"],
+            versioned_accident_probabilities,
+            max_batch=options["max_batch"],
+            max_wait_ms=options["max_wait_ms"],
+        )
+        self.stdout.write(f"Serving predictions on {options['socket']} "
+                          f"(batches of up to {options['max_batch']} rows, {options['max_wait_ms']} ms wait)")
+        self.stdout.flush()
+        try:
+            server.run_forever()
+        except KeyboardInterrupt:
+            stats = dict(server.stats)
+            if stats.get("batches"):
+                stats["mean_batch_rows"] = round(stats["rows"] / stats["batches"], 1)
+            self.stdout.write(f"Stopped. {stats}")
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.ml_model import model_registry
+
+
+class Command(BaseCommand):
+    help = (
+        "List model versions under ML_MODEL_DIR and choose the ACTIVE and SHADOW ones. "
+        "Running workers pick up the change within ML_REGISTRY_POLL_SECONDS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["list", "activate", "shadow", "unshadow", "deactivate"],
+                            help="deactivate serves the bundled model again")
+        parser.add_argument("version", nargs="?")
+
+    def handle(self, *args, **options):
+        registry = model_registry.get()
+        action, version = options["action"], options["version"]
+        if action in ("activate", "shadow") and not version:
+            raise CommandError(f"{action} needs a version")
+
+        try:
+            if action == "activate":
+                registry.write_pointer("ACTIVE", version)
+            elif action == "shadow":
+                registry.write_pointer("SHADOW", version)
+            elif action == "unshadow":
+                registry.write_pointer("SHADOW", None)
+            elif action == "deactivate":
+                registry.write_pointer("ACTIVE", None)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        active, shadow = registry.read_pointer("ACTIVE"), registry.read_pointer("SHADOW")
+        self.stdout.write(f"Versions in {registry.root}:")
+        for name in registry.versions():
+            marker = " [active]" if name == active else " [shadow]" if name == shadow else ""
+            metrics = registry.describe(name).get("metrics") or {}
+            self.stdout.write(f"  {name}{marker}  roc_auc={metrics.get('roc_auc')} f1={metrics.get('f1')}")
+        if active is None:
+            self.stdout.write("  (no ACTIVE version: serving the bundled model)")
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.rollups import CHANNEL_DIMENSIONS, rebuild
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild hourly alert rollups from the raw tables. Run periodically with --hours "
+        "to compact recent buckets, or without it to backfill all history."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, help="Only rebuild buckets from the last N hours")
+        parser.add_argument("--channel", action="append", choices=list(CHANNEL_DIMENSIONS),
+                            help="Limit to a channel (repeatable)")
+
+    def handle(self, *args, **options):
+        since = timezone.now() - timezone.timedelta(hours=options["hours"]) if options["hours"] else None
+        written = rebuild(since=since, channels=options["channel"])
+        scope = f"last {options['hours']} hours" if since else "all history"
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} rollup buckets ({scope})"))
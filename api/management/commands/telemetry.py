@@ -0,0 +1,70 @@
+import time
+from collections import Counter
+from datetime import timezone
+
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from api.telemetry import COLUMNS, HOUR, telemetry_archive
+
+
+def _time(value):
+    """Epoch seconds from an ISO datetime (UTC unless it has an offset) or a number."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    moment = parse_datetime(value)
+    if moment is None:
+        raise CommandError(f"Not a datetime or epoch seconds: {value!r}")
+    if moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc).timestamp()
+    return moment.timestamp()
+
+
+class Command(BaseCommand):
+    help = (
+        "Scan or export a time range of the raw sensor telemetry archive (TELEMETRY_DIR), "
+        "or compact finished hours into one segment per device bucket."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("action", choices=["scan", "compact"])
+        parser.add_argument("--start", help="ISO datetime or epoch seconds (default: an hour ago)")
+        parser.add_argument("--end", help="ISO datetime or epoch seconds (default: now)")
+        parser.add_argument("--device", help="Only this device's samples")
+        parser.add_argument("--output", help="scan: write the samples to this .npy file (structured array)")
+        parser.add_argument("--older-than-hours", type=int, default=1,
+                            help="compact: only hours that ended at least this long ago")
+
+    def handle(self, *args, **options):
+        if not telemetry_archive.root:
+            raise CommandError("TELEMETRY_DIR is not set")
+        if options["action"] == "compact":
+            before = time.time() - options["older_than_hours"] * HOUR
+            partitions, removed = telemetry_archive.compact(before)
+            self.stdout.write(self.style.SUCCESS(
+                f"Compacted {partitions} partitions ({removed} segments merged)"))
+            return
+
+        end = _time(options["end"]) if options["end"] else time.time()
+        start = _time(options["start"]) if options["start"] else end - HOUR
+        t0 = time.perf_counter()
+        if options["output"]:
+            samples = telemetry_archive.read(start, end, options["device"])
+            np.save(options["output"], samples)
+            self.stdout.write(self.style.SUCCESS(
+                f"Wrote {len(samples)} samples to {options['output']} in {time.perf_counter() - t0:.2f}s"))
+            return
+
+        rows = 0
+        devices = Counter()
+        for chunk in telemetry_archive.scan(start, end, options["device"], ["device"]):
+            rows += len(chunk["device"])
+            names, counts = np.unique(chunk["device"], return_counts=True)
+            devices.update(dict(zip(names.tolist(), counts.tolist())))
+        self.stdout.write(f"{rows} samples from {len(devices)} devices in {time.perf_counter() - t0:.2f}s "
+                          f"(columns: {', '.join(COLUMNS)})")
+        for device, count in devices.most_common(20):
+            self.stdout.write(f"  {device.decode() or '(anonymous)'}: {count}")
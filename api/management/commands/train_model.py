@@ -0,0 +1,84 @@
+import json
+import os
+import shutil
+
+import joblib
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.forest_engine import export_forest
+from api.ml_model import FOREST_PATH, MODEL_PATH
+from api.model_registry import ModelRegistry
+from api.training import load_dataset, save_artifacts, train
+
+
+class Command(BaseCommand):
+    help = "Train the accident RandomForest on a dataset from generate_sensor_data and write a versioned artifact."
+
+    def add_arguments(self, parser):
+        parser.add_argument("data", help="Dataset directory (manage.py generate_sensor_data)")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--test-fraction", type=float, default=0.2)
+        parser.add_argument("--n-estimators", type=int, default=100)
+        parser.add_argument("--max-depth", type=int, default=12)
+        parser.add_argument("--min-samples-leaf", type=int, default=20)
+        parser.add_argument("--max-samples", type=int, default=1_000_000,
+                            help="Bootstrap rows per tree (0 = as many as the training split)")
+        parser.add_argument("--n-jobs", type=int, default=-1, help="Fitting threads (-1 = all cores)")
+        parser.add_argument("--output", default=getattr(settings, "ML_MODEL_DIR", "ml_models"),
+                            help="Artifact root (default: ML_MODEL_DIR)")
+        parser.add_argument("--model-version", help="Artifact version (default: a timestamp)")
+        parser.add_argument("--activate", action="store_true",
+                            help="Point the registry's ACTIVE version at the new artifact")
+        parser.add_argument("--shadow", action="store_true",
+                            help="Score live traffic with the new artifact in shadow mode")
+        parser.add_argument("--install", action="store_true",
+                            help=f"Also replace the served model ({MODEL_PATH}, {FOREST_PATH})")
+
+    def handle(self, *args, **options):
+        features, labels, _ = load_dataset(options["data"])
+        self.stdout.write(f"Training on {len(labels)} rows from {options['data']}...")
+        model, metadata = train(
+            features, labels,
+            seed=options["seed"],
+            test_fraction=options["test_fraction"],
+            n_estimators=options["n_estimators"],
+            max_depth=options["max_depth"],
+            min_samples_leaf=options["min_samples_leaf"],
+            max_samples=options["max_samples"] or None,
+            n_jobs=options["n_jobs"],
+        )
+        metadata["dataset"] = os.path.abspath(options["data"])
+        directory = save_artifacts(model, metadata, options["output"], options["model_version"])
+
+        self.stdout.write(f"Fitted in {metadata['training_seconds']}s; severity thresholds "
+                          f"{metadata['severity_thresholds']}")
+        self.stdout.write(json.dumps(metadata["metrics"], indent=2))
+        if metadata["prefilter"]:
+            self.stdout.write(f"Benign pre-filter: {metadata['prefilter']}")
+        self.stdout.write(self.style.SUCCESS(f"Saved {directory}"))
+
+        version = os.path.basename(directory)
+        for flag, pointer in (("activate", "ACTIVE"), ("shadow", "SHADOW")):
+            if options[flag]:
+                registry = ModelRegistry(options["output"], FOREST_PATH, MODEL_PATH)
+                registry.write_pointer(pointer, version)
+                self.stdout.write(self.style.SUCCESS(f"{pointer} model is now {version}"))
+
+        if options["install"]:
+            self._install(model)
+            self.stdout.write(self.style.SUCCESS(f"Installed as {MODEL_PATH} and {FOREST_PATH}"))
+
+    def _install(self, model):
+        # Write beside the live files and rename into place: running workers
+        # keep their memory maps of the old arrays instead of seeing them truncated
+        joblib.dump(model, MODEL_PATH + ".new")
+        os.replace(MODEL_PATH + ".new", MODEL_PATH)
+        staged, retired = FOREST_PATH + ".new", FOREST_PATH + ".old"
+        shutil.rmtree(staged, ignore_errors=True)
+        export_forest(model, staged)
+        if os.path.exists(FOREST_PATH):
+            shutil.rmtree(retired, ignore_errors=True)
+            os.rename(FOREST_PATH, retired)
+        os.rename(staged, FOREST_PATH)
+        shutil.rmtree(retired, ignore_errors=True)
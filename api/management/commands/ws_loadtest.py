@@ -0,0 +1,80 @@
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Open many WebSocket connections to /ws/telemetry/ and stream samples over them. "
+        "Start the server first, e.g. `uvicorn accident_detection.asgi:application`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="ws://127.0.0.1:8000/ws/telemetry/")
+        parser.add_argument("--connections", type=int, default=1000)
+        parser.add_argument("--active", type=int, default=50,
+                            help="How many of the connections stream samples; the rest stay idle")
+        parser.add_argument("--rate", type=float, default=50, help="Samples/sec per active connection")
+        parser.add_argument("--duration", type=float, default=10, help="Seconds to stream for")
+
+    def handle(self, *args, **options):
+        try:
+            import websockets  # noqa: F401
+        except ImportError:
+            raise CommandError("ws_loadtest needs the `websockets` package")
+        asyncio.run(self._run(**options))
+
+    async def _run(self, url, connections, active, rate, duration, **_):
+        import websockets
+
+        # Open every connection, idle ones included
+        started = time.perf_counter()
+        sockets = await asyncio.gather(*(
+            websockets.connect(f"{url}?device_id=loadtest-{i}", max_queue=None)
+            for i in range(connections)
+        ))
+        connect_seconds = time.perf_counter() - started
+        self.stdout.write(f"Opened {len(sockets)} connections in {connect_seconds:.2f}s")
+
+        latencies = []
+        sent = 0
+
+        async def stream(ws):
+            nonlocal sent
+            interval = 1.0 / rate
+            deadline = time.perf_counter() + duration
+            while time.perf_counter() < deadline:
+                sample = {
+                    "type": "sample",
+                    "latitude": 17.385, "longitude": 78.4867,
+                    "acc_x": random.uniform(-2, 2), "acc_y": random.uniform(-2, 2), "acc_z": random.uniform(-2, 2),
+                    "gyro_x": random.uniform(-10, 10), "gyro_y": random.uniform(-10, 10), "gyro_z": random.uniform(-10, 10),
+                }
+                await ws.send(json.dumps(sample))
+                sent += 1
+                # Round trip check every second
+                if sent % max(int(rate), 1) == 0:
+                    t0 = time.perf_counter()
+                    await ws.send(json.dumps({"type": "ping"}))
+                    while json.loads(await ws.recv()).get("type") != "pong":
+                        pass
+                    latencies.append((time.perf_counter() - t0) * 1000)
+                await asyncio.sleep(interval)
+
+        t0 = time.perf_counter()
+        await asyncio.gather(*(stream(ws) for ws in sockets[:active]))
+        elapsed = time.perf_counter() - t0
+        await asyncio.gather(*(ws.close() for ws in sockets))
+
+        self.stdout.write(f"Streamed {sent} samples from {min(active, len(sockets))} connections "
+                          f"in {elapsed:.2f}s ({sent / elapsed:.0f} samples/sec)")
+        if latencies:
+            latencies.sort()
+            self.stdout.write(
+                f"Ping round trip: median {statistics.median(latencies):.2f} ms, "
+                f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.2f} ms"
+            )
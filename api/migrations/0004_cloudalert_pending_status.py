@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_alter_blealert_options_alter_cloudalert_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="cloudalert",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "Pending"),
+                    ("sent", "Sent"),
+                    ("delivered", "Delivered"),
+                    ("failed", "Failed"),
+                    ("read", "Read"),
+                ],
+                default="sent",
+                max_length=50,
+            ),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_outboxevent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AlertRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("hour", models.DateTimeField()),
+                (
+                    "channel",
+                    models.CharField(
+                        choices=[
+                            ("accident", "Accident report"),
+                            ("ble", "BLE alert"),
+                            ("cloud", "Cloud alert"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("severity", models.CharField(blank=True, default="", max_length=50)),
+                ("status", models.CharField(blank=True, default="", max_length=50)),
+                ("is_emergency", models.BooleanField(default=False)),
+                ("count", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "ordering": ["-hour"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=(
+                            "channel",
+                            "hour",
+                            "severity",
+                            "status",
+                            "is_emergency",
+                        ),
+                        name="alert_rollup_bucket_unique",
+                    )
+                ],
+            },
+        ),
+    ]
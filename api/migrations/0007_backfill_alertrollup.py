@@ -0,0 +1,49 @@
+import datetime
+
+from django.db import migrations
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+
+# Frozen copy of api.rollups at the time of this migration: columns each
+# channel is bucketed by (besides the hour)
+CHANNELS = {
+    "accident": ("AccidentReport", ("severity",)),
+    "ble": ("BLEAlert", ("severity", "status")),
+    "cloud": ("CloudAlert", ("status", "is_emergency")),
+}
+
+
+def backfill(apps, schema_editor):
+    AlertRollup = apps.get_model("api", "AlertRollup")
+    AlertRollup.objects.all().delete()
+    for channel, (model_name, dims) in CHANNELS.items():
+        grouped = (
+            apps.get_model("api", model_name)
+            .objects.order_by()
+            .annotate(bucket=TruncHour("timestamp", tzinfo=datetime.timezone.utc))
+            .values("bucket", *dims)
+            .annotate(n=Count("id"))
+        )
+        buckets = []
+        for row in grouped.iterator(chunk_size=5000):
+            key = {"severity": "", "status": "", "is_emergency": False}
+            key.update({dim: row[dim] for dim in dims})
+            buckets.append(
+                AlertRollup(channel=channel, hour=row["bucket"], count=row["n"], **key)
+            )
+        AlertRollup.objects.bulk_create(buckets, batch_size=1000)
+
+
+def clear(apps, schema_editor):
+    apps.get_model("api", "AlertRollup").objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_alertrollup"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, clear),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0007_backfill_alertrollup"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="accidentreport",
+            index=models.Index(fields=["-timestamp"], name="accident_ts_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="blealert",
+            index=models.Index(fields=["-timestamp"], name="ble_ts_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="blealert",
+            index=models.Index(
+                fields=["severity", "-timestamp"], name="ble_severity_ts_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="blealert",
+            index=models.Index(
+                fields=["status", "-timestamp"], name="ble_status_ts_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cloudalert",
+            index=models.Index(fields=["-timestamp"], name="cloud_ts_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="cloudalert",
+            index=models.Index(
+                fields=["status", "-timestamp"], name="cloud_status_ts_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cloudalert",
+            index=models.Index(
+                condition=models.Q(("is_emergency", True)),
+                fields=["-timestamp"],
+                name="cloud_emergency_ts_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:16
+
+from django.db import migrations, models
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def encode(latitude, longitude, precision=9):
+    """Frozen copy of api.geo.encode at the time of this migration."""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits, bit_count, even = 0, 0, True
+    while len(chars) < precision:
+        # Bits alternate between longitude and latitude, longitude first
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if longitude >= mid:
+                bits, lon_lo = bits * 2 + 1, mid
+            else:
+                bits, lon_hi = bits * 2, mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if latitude >= mid:
+                bits, lat_lo = bits * 2 + 1, mid
+            else:
+                bits, lat_hi = bits * 2, mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+
+def backfill(apps, schema_editor):
+    for model_name in ("AccidentReport", "BLEAlert"):
+        model = apps.get_model("api", model_name)
+        rows = model.objects.filter(
+            latitude__isnull=False, longitude__isnull=False
+        ).only("id", "latitude", "longitude")
+        batch = []
+        for row in rows.iterator(chunk_size=2000):
+            row.geohash = encode(row.latitude, row.longitude)
+            batch.append(row)
+            if len(batch) == 2000:
+                model.objects.bulk_update(batch, ["geohash"])
+                batch = []
+        model.objects.bulk_update(batch, ["geohash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0008_alert_list_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="accidentreport",
+            name="geohash",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=12
+            ),
+        ),
+        migrations.AddField(
+            model_name="blealert",
+            name="geohash",
+            field=models.CharField(
+                blank=True, default="", editable=False, max_length=12
+            ),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="accidentreport",
+            index=models.Index(fields=["geohash"], name="accident_geohash_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="blealert",
+            index=models.Index(fields=["geohash"], name="ble_geohash_idx"),
+        ),
+    ]
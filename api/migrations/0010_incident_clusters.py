@@ -0,0 +1,41 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:20
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill(apps, schema_editor):
+    # Existing rows predate clustering: each is its own incident
+    for model_name in ("AccidentReport", "BLEAlert"):
+        apps.get_model("api", model_name).objects.filter(
+            cluster_id__isnull=True
+        ).update(cluster_id=F("id"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0009_geohash_cells"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="accidentreport",
+            name="cluster_id",
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="blealert",
+            name="cluster_id",
+            field=models.UUIDField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="accidentreport",
+            index=models.Index(fields=["cluster_id"], name="accident_cluster_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="blealert",
+            index=models.Index(fields=["cluster_id"], name="ble_cluster_idx"),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:21
+
+import datetime
+
+from django.db import migrations, models
+
+
+def backfill(apps, schema_editor):
+    BLEAlert = apps.get_model("api", "BLEAlert")
+    rows = BLEAlert.objects.filter(expires_at__isnull=True).only(
+        "id", "timestamp", "broadcast_duration"
+    )
+    batch = []
+    for row in rows.iterator(chunk_size=2000):
+        row.expires_at = row.timestamp + datetime.timedelta(
+            seconds=row.broadcast_duration
+        )
+        batch.append(row)
+        if len(batch) == 2000:
+            BLEAlert.objects.bulk_update(batch, ["expires_at"])
+            batch = []
+    BLEAlert.objects.bulk_update(batch, ["expires_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0010_incident_clusters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blealert",
+            name="expires_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="blealert",
+            index=models.Index(
+                condition=models.Q(("status", "broadcast")),
+                fields=["expires_at"],
+                name="ble_broadcast_expiry_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:43
+
+import re
+
+from django.db import migrations, models
+
+AXES = ["acc_x", "acc_y", "acc_z", "gyro_x", "gyro_y", "gyro_z"]
+PREFIX = "Sensor data detected accident"
+READING = re.compile(
+    re.escape(PREFIX)
+    + ": "
+    + ", ".join(rf"{axis}=(?P<{axis}>[^,\s]+)" for axis in AXES)
+    + "$"
+)
+
+
+def backfill(apps, schema_editor):
+    """Move readings embedded in sensor report descriptions into the new columns."""
+    AccidentReport = apps.get_model("api", "AccidentReport")
+    rows = AccidentReport.objects.filter(
+        reported_via="sensor", description__startswith=PREFIX + ":"
+    ).only("id", "description")
+    batch = []
+    for row in rows.iterator(chunk_size=2000):
+        match = READING.match(row.description)
+        if match is None:
+            continue
+        for axis in AXES:
+            setattr(row, axis, float(match[axis]))
+        row.description = PREFIX
+        batch.append(row)
+        if len(batch) == 2000:
+            AccidentReport.objects.bulk_update(batch, AXES + ["description"])
+            batch = []
+    AccidentReport.objects.bulk_update(batch, AXES + ["description"])
+
+
+def restore_descriptions(apps, schema_editor):
+    AccidentReport = apps.get_model("api", "AccidentReport")
+    rows = AccidentReport.objects.filter(
+        reported_via="sensor", description=PREFIX, acc_x__isnull=False
+    ).only("id", *AXES)
+    batch = []
+    for row in rows.iterator(chunk_size=2000):
+        row.description = f"{PREFIX}: " + ", ".join(
+            f"{axis}={getattr(row, axis)}" for axis in AXES
+        )
+        batch.append(row)
+        if len(batch) == 2000:
+            AccidentReport.objects.bulk_update(batch, ["description"])
+            batch = []
+    AccidentReport.objects.bulk_update(batch, ["description"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0012_voicejob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="accidentreport",
+            name="acc_x",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="accidentreport",
+            name="acc_y",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="accidentreport",
+            name="acc_z",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="accidentreport",
+            name="device_id",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.AddField(
+            model_name="accidentreport",
+            name="gyro_x",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="accidentreport",
+            name="gyro_y",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="accidentreport",
+            name="gyro_z",
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill, restore_descriptions),
+    ]
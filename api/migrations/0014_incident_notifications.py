@@ -0,0 +1,65 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:52
+
+import django.utils.timezone
+from django.db import migrations, models
+
+TOPIC_MODELS = {
+    "accident_report.created": "AccidentReport",
+    "ble_alert.created": "BLEAlert",
+}
+
+
+def backfill(apps, schema_editor):
+    """Incidents already published (per the outbox) stay claimed."""
+    OutboxEvent = apps.get_model("api", "OutboxEvent")
+    IncidentNotification = apps.get_model("api", "IncidentNotification")
+    for topic, model_name in TOPIC_MODELS.items():
+        ids = [
+            e.payload.get("id")
+            for e in OutboxEvent.objects.filter(topic=topic).only("payload")
+        ]
+        clusters = (
+            apps.get_model("api", model_name)
+            .objects.filter(id__in=[i for i in ids if i], cluster_id__isnull=False)
+            .values_list("cluster_id", flat=True)
+            .distinct()
+        )
+        IncidentNotification.objects.bulk_create(
+            [IncidentNotification(cluster_id=c, topic=topic) for c in clusters],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0013_sensor_reading_columns"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="IncidentNotification",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("cluster_id", models.UUIDField()),
+                ("topic", models.CharField(max_length=100)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("cluster_id", "topic"), name="incident_notified_once"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0014_incident_notifications"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="voicejob",
+            name="audio",
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="voicejob",
+            name="audio_format",
+            field=models.CharField(blank=True, default="", max_length=16),
+        ),
+        migrations.AddField(
+            model_name="voicejob",
+            name="locked_by",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.AddField(
+            model_name="voicejob",
+            name="locked_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
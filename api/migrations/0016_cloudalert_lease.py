@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 15:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0015_voicejob_resume"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cloudalert",
+            name="locked_by",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+        migrations.AddField(
+            model_name="cloudalert",
+            name="locked_until",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,17 +1,235 @@
-import joblib
-import numpy as np
 import os
+import time
+
+import numpy as np
+
+from .forest_engine import CompiledForest
+from .lazy import Lazy
 
 # Load model (ensure path is correct)
 MODEL_PATH = os.path.join(os.path.dirname(__file__), "accident_model.pkl")
-model = joblib.load(MODEL_PATH)
+# Flattened copy of the same forest (manage.py export_forest); memory-mapped
+# so all workers share it through the page cache
+FOREST_PATH = os.path.join(os.path.dirname(__file__), "accident_model_forest")
+
+
+def _model_registry():
+    from django.conf import settings
+
+    from .model_registry import ModelRegistry
+    return ModelRegistry(
+        getattr(settings, "ML_MODEL_DIR", "ml_models"),
+        FOREST_PATH,
+        MODEL_PATH,
+        poll_seconds=getattr(settings, "ML_REGISTRY_POLL_SECONDS", 2.0),
+        preload=not getattr(settings, "INFERENCE_SOCKET", None),
+    )
+
+
+# Versions under ML_MODEL_DIR, hot-swapped when the ACTIVE pointer changes
+# (api/model_registry.py); serves the bundled model above until one is activated
+model_registry = Lazy("model_registry", _model_registry)
+
+
+def get_model():
+    return model_registry.get().active().model
+
+
+# Loaded on first prediction (or by api.lazy.warm_up), not at import
+accident_model = Lazy("accident_model", get_model)
+
+
+def _shadow_scorer():
+    from django.conf import settings
+
+    from .model_registry import ShadowScorer
+    return ShadowScorer(model_registry.get(), classify,
+                        queue_size=getattr(settings, "ML_SHADOW_QUEUE_SIZE", 1000))
+
+
+def _inference_cache():
+    from django.conf import settings
+
+    size = getattr(settings, "ML_CACHE_SIZE", 100_000)
+    prefilter = getattr(settings, "ML_PREFILTER", True)
+    if not size and not prefilter:
+        return None
+    from .inference_cache import InferenceCache
+    return InferenceCache(
+        max_entries=size,
+        acc_resolution=getattr(settings, "ML_CACHE_ACC_RESOLUTION", 0.05),
+        gyro_resolution=getattr(settings, "ML_CACHE_GYRO_RESOLUTION", 0.5),
+        prefilter=prefilter,
+    )
+
+
+# Quantized-vector LRU cache and benign pre-filter (api/inference_cache.py)
+inference_cache = Lazy("inference_cache", _inference_cache)
+
+
+# Compares the SHADOW candidate with the active model on live samples
+shadow_scorer = Lazy("shadow_scorer", _shadow_scorer)
+
+
+def _inference_client():
+    from django.conf import settings
+
+    path = getattr(settings, "INFERENCE_SOCKET", None)
+    if not path:
+        return None
+    from .inference_server import InferenceClient
+    return InferenceClient(path, timeout=getattr(settings, "INFERENCE_TIMEOUT", 1.0))
+
+
+# Client for the shared micro-batching sidecar (api/inference_server.py),
+# or None when INFERENCE_SOCKET is unset and workers score in-process
+inference_client = Lazy("inference_client", _inference_client)
+
+
+# Column order the model was trained on (see api/training.py)
+FEATURE_NAMES = ['acc_x', 'acc_y', 'acc_z', 'gyro_x', 'gyro_y', 'gyro_z']
+
+# Accident-class probability a row must exceed to be a "medium" / "high"
+# severity accident; at or below "medium" it is "low". Training tunes these
+# on held-out data and stores them with the model (metadata.json of a
+# registry version, meta.json of the bundled forest); ML_SEVERITY_MEDIUM /
+# ML_SEVERITY_HIGH override them. 0.5 matches model.predict().
+DEFAULT_SEVERITY_THRESHOLDS = {"medium": 0.5, "high": 0.8}
+
+
+def severity_thresholds(stored=None):
+    """Thresholds for the active model (or `stored` ones), with settings overrides applied."""
+    from django.conf import settings
 
-def predict_accident(sensor_data):
+    if stored is None:
+        stored = model_registry.get().active().thresholds
+    thresholds = {**DEFAULT_SEVERITY_THRESHOLDS, **(stored or {})}
+    for level in thresholds:
+        override = getattr(settings, f"ML_SEVERITY_{level.upper()}", None)
+        if override is not None:
+            thresholds[level] = float(override)
+    return thresholds
+
+
+def fit_severity_thresholds(y_true, probabilities, medium_recall=0.99, high_precision=0.95):
+    """
+    Thresholds from held-out accident probabilities: "medium" is the highest
+    cut that still flags `medium_recall` of the accidents, "high" the lowest
+    cut whose flagged rows are `high_precision` accidents. "high" is never
+    below 0.5, so it never flags a row that model.predict() calls benign.
+    """
+    accidents = np.asarray(y_true) == 1
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    # Candidate cuts sit halfway between observed probabilities
+    observed = np.unique(np.concatenate([[0.0, 1.0], probabilities]))
+    cuts = np.concatenate([[0.0], (observed[:-1] + observed[1:]) / 2])
+
+    # Rows flagged by each cut are those with probability > cut
+    flagged = len(probabilities) - np.searchsorted(np.sort(probabilities), cuts, side="right")
+    positives = np.sort(probabilities[accidents])
+    true_positives = len(positives) - np.searchsorted(positives, cuts, side="right")
+    recall = true_positives / max(len(positives), 1)
+    precision = np.where(flagged > 0, true_positives / np.maximum(flagged, 1), 1.0)
+
+    medium = cuts[recall >= medium_recall].max() if (recall >= medium_recall).any() else 0.0
+    high = max(cuts[precision >= high_precision].min(), 0.5, medium)
+    return {"medium": round(float(medium), 6), "high": round(float(high), 6)}
+
+
+def classify(probabilities, thresholds=None):
+    """
+    Accident probabilities -> (severities, confidences). For medium/high
+    rows the confidence is the accident probability p itself, so it grows
+    with severity even when the medium cut is below 0.5. For low rows it is
+    1 - p, the probability that nothing happened.
+    """
+    thresholds = severity_thresholds(thresholds)
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    severities = np.select(
+        [probabilities > thresholds["high"], probabilities > thresholds["medium"]],
+        ["high", "medium"],
+        "low",
+    ).astype(object)
+    return severities, np.where(severities == "low", 1.0 - probabilities, probabilities)
+
+
+def worth_notifying(severity, confidence):
+    """Accidents fan out unless their probability is below ML_FANOUT_MIN_CONFIDENCE."""
+    from django.conf import settings
+
+    return severity != "low" and confidence >= getattr(settings, "ML_FANOUT_MIN_CONFIDENCE", 0.0)
+
+
+def local_accident_probabilities(features):
+    """Accident-class probability per row, scored with this process's active model."""
+    return model_registry.get().active().accident_probabilities(features)
+
+
+def versioned_accident_probabilities(features):
+    """(probabilities, model version) scored with this process's active model."""
+    active = model_registry.get().active()
+    return active.accident_probabilities(features), active.version
+
+
+def _score(features):
+    """(probabilities, model version), from the sidecar when it is reachable."""
+    client = inference_client.get()
+    if client is not None and client.available():
+        try:
+            return client.predict_proba(features)
+        except OSError as e:
+            print(f"⚠️ [BACKEND] Inference sidecar unavailable, scoring in-process: {e}")
+    return versioned_accident_probabilities(features)
+
+
+def accident_probabilities(features):
+    """
+    Accident-class probability per row, from the inference sidecar when one
+    is configured and reachable, otherwise in-process.
+    """
+    features = np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURE_NAMES))
+    model_ms = {}
+
+    def score(rows):
+        t0 = time.perf_counter()
+        result = _score(rows)
+        # The shadow scores every row, so only a call covering all of them compares
+        if len(rows) == len(features):
+            model_ms["active"] = (time.perf_counter() - t0) * 1000
+        return result
+
+    cache = inference_cache.get()
+    if cache is None:
+        probabilities, _ = score(features)
+    else:
+        # Only rows neither pre-filtered as benign nor cached reach the model
+        probabilities = cache.probabilities(features, model_registry.get().active(), score)
+    # No-op unless a SHADOW model is set; never blocks
+    shadow_scorer.get().submit(features, probabilities, model_ms.get("active"))
+    return probabilities
+
+
+def predict_accident(sensor_data, thresholds=None):
     """
     sensor_data: dict with keys acc_x, acc_y, acc_z, gyro_x, gyro_y, gyro_z
+    Returns (severity, confidence).
     """
     features = np.array([[sensor_data['acc_x'], sensor_data['acc_y'], sensor_data['acc_z'],
                           sensor_data['gyro_x'], sensor_data['gyro_y'], sensor_data['gyro_z']]])
-    pred = model.predict(features)[0]
-    severity = "high" if pred == 1 else "low"
-    return severity
+    severities, confidences = classify(accident_probabilities(features), thresholds)
+    return severities[0], float(confidences[0])
+
+
+def predict_accident_batch(features, thresholds=None):
+    """
+    features: (N, 6) array-like with columns in FEATURE_NAMES order
+    Scores every row with a single predict_proba call.
+    Returns (severities, probabilities, confidences) as NumPy arrays of length N.
+    """
+    features = np.asarray(features, dtype=np.float64).reshape(-1, len(FEATURE_NAMES))
+    if len(features) == 0:
+        return np.empty(0, dtype=object), np.empty(0, dtype=np.float64), np.empty(0, dtype=np.float64)
+
+    probabilities = accident_probabilities(features)
+    severities, confidences = classify(probabilities, thresholds)
+    return severities, probabilities, confidences
@@ -0,0 +1,289 @@
+"""
+Versioned model registry with hot-swap and shadow scoring.
+
+Versions are the artifact directories manage.py train_model writes under
+ML_MODEL_DIR (api/training.py). Two pointer files in that directory pick
+what is served:
+
+    ACTIVE   version that scores requests
+    SHADOW   optional candidate scored alongside it, off the request path
+
+`manage.py model_registry activate|shadow` rewrites a pointer with an
+atomic rename. Every process re-reads the pointers at most every
+ML_REGISTRY_POLL_SECONDS. A new version is loaded (memory-mapped forest,
+so milliseconds) by the one request that notices the change, then swapped
+in with a single reference assignment. Concurrent requests keep scoring
+with the model they already hold. Without an ACTIVE pointer the bundled
+api/accident_model_forest (or .pkl) is served, as before.
+
+`ShadowScorer` takes (features, active probabilities, active latency) from
+the request path through a bounded queue and drops samples when it is
+full. A daemon thread scores them with the SHADOW version and records
+severity agreement, the probability gap and the latency of both models.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+
+from .forest_engine import CompiledForest
+
+BUNDLED = "bundled"
+POINTERS = ("ACTIVE", "SHADOW")
+
+
+class ModelVersion:
+    """One servable version; the model itself loads on first use."""
+
+    def __init__(self, version, forest_path, pickle_path, metadata=None):
+        self.version = version
+        self.forest_path = forest_path
+        self.pickle_path = pickle_path
+        self.metadata = metadata or {}
+        self._model = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_directory(cls, root, version):
+        directory = os.path.join(root, version)
+        with open(os.path.join(directory, "metadata.json")) as f:
+            metadata = json.load(f)
+        return cls(version, os.path.join(directory, "forest"), os.path.join(directory, "model.pkl"), metadata)
+
+    @classmethod
+    def bundled(cls, forest_path, pickle_path):
+        metadata = {}
+        if CompiledForest.exists(forest_path):
+            with open(os.path.join(forest_path, "meta.json")) as f:
+                metadata = json.load(f)
+        return cls(BUNDLED, forest_path, pickle_path, metadata)
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    if CompiledForest.exists(self.forest_path):
+                        self._model = CompiledForest.load(self.forest_path)
+                    else:
+                        import joblib  # only needed for the pickle fallback (pulls in sklearn)
+                        self._model = joblib.load(self.pickle_path)
+        return self._model
+
+    @property
+    def thresholds(self):
+        """Severity thresholds stored with this version, if any."""
+        stored = self.metadata.get("severity_thresholds")
+        if stored is None and not CompiledForest.exists(self.forest_path):
+            stored = getattr(self.model, "severity_thresholds_", None)
+        return stored
+
+    def accident_probabilities(self, features):
+        model = self.model
+        accident_col = list(model.classes_).index(1)
+        return model.predict_proba(features)[:, accident_col]
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "created_at": self.metadata.get("created_at"),
+            "severity_thresholds": self.thresholds,
+            "prefilter": self.metadata.get("prefilter"),
+            "metrics": self.metadata.get("metrics"),
+        }
+
+
+class ModelRegistry:
+    def __init__(self, root, bundled_forest, bundled_pickle, poll_seconds=2.0, preload=True):
+        self.root = root
+        self.poll_seconds = poll_seconds
+        # Processes that score through the inference sidecar only need thresholds
+        self.preload = preload
+        self._bundled = ModelVersion.bundled(bundled_forest, bundled_pickle)
+        self._current = {"ACTIVE": None, "SHADOW": None}
+        self._pointer_state = {}
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    # -- pointers -------------------------------------------------------------
+
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(v for v in os.listdir(self.root)
+                      if os.path.exists(os.path.join(self.root, v, "metadata.json")))
+
+    def describe(self, version):
+        return ModelVersion.from_directory(self.root, version).describe()
+
+    def read_pointer(self, name):
+        try:
+            with open(os.path.join(self.root, name)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def write_pointer(self, name, version):
+        """Point ACTIVE/SHADOW at `version` (None clears it); atomic for readers."""
+        path = os.path.join(self.root, name)
+        if version is None:
+            if os.path.exists(path):
+                os.unlink(path)
+            return
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version {version!r} in {self.root}")
+        staged = f"{path}.{os.getpid()}.tmp"
+        with open(staged, "w") as f:
+            f.write(version + "\n")
+        os.replace(staged, path)
+
+    # -- serving --------------------------------------------------------------
+
+    def _pointer_stamp(self, name):
+        try:
+            stat = os.stat(os.path.join(self.root, name))
+            return stat.st_mtime_ns, stat.st_ino
+        except FileNotFoundError:
+            return None
+
+    def _refresh(self, block):
+        # Only one thread loads; others keep the current versions meanwhile
+        if not self._lock.acquire(blocking=block):
+            return
+        try:
+            for name in POINTERS:
+                stamp = self._pointer_stamp(name)
+                if stamp == self._pointer_state.get(name, "unset"):
+                    continue
+                version = self.read_pointer(name)
+                current = self._current[name]
+                if version is None:
+                    loaded = self._bundled if name == "ACTIVE" else None
+                elif current is not None and current.version == version:
+                    loaded = current
+                else:
+                    try:
+                        loaded = ModelVersion.from_directory(self.root, version)
+                        if self.preload:
+                            loaded.model  # load before it takes traffic
+                    except Exception as e:
+                        print(f"❌ [BACKEND] Could not load model version {version}: {e}")
+                        if current is not None or name == "SHADOW":
+                            continue  # keep serving what we have; retried on the next poll
+                        loaded = self._bundled
+                if current is not None and loaded is not current:
+                    print(f"🔄 [BACKEND] {name.title()} model: "
+                          f"{current.version} -> {loaded.version if loaded else None}")
+                self._current[name] = loaded
+                self._pointer_state[name] = stamp
+        finally:
+            self._lock.release()
+
+    def _check(self):
+        now = time.monotonic()
+        if self._current["ACTIVE"] is None:
+            self._refresh(block=True)
+            self._next_check = now + self.poll_seconds
+        elif now >= self._next_check:
+            self._next_check = now + self.poll_seconds
+            self._refresh(block=False)
+
+    def active(self):
+        self._check()
+        return self._current["ACTIVE"]
+
+    def shadow(self):
+        self._check()
+        return self._current["SHADOW"]
+
+
+class ShadowScorer:
+    """Scores sampled requests with the SHADOW version on a daemon thread."""
+
+    def __init__(self, registry, classify, queue_size=1000, history=1000):
+        self._registry = registry
+        self._classify = classify
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._latency = {"active": deque(maxlen=history), "shadow": deque(maxlen=history)}
+        self._gaps = deque(maxlen=history)
+        self.stats = defaultdict(int)
+        self.version = None
+
+    def submit(self, features, probabilities, latency_ms):
+        """
+        Called on the request path: never blocks, drops when the queue is full.
+        `latency_ms` is the active model's call alone, None when the cache or
+        pre-filter answered some of the rows.
+        """
+        if self._registry.shadow() is None:
+            return
+        if self._thread is None or not self._thread.is_alive():
+            with self._start_lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+                    self._thread.start()
+        try:
+            self._queue.put_nowait((features, probabilities, latency_ms))
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def _run(self):
+        while True:
+            features, active_probabilities, active_ms = self._queue.get()
+            try:
+                self._score(features, active_probabilities, active_ms)
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"❌ [BACKEND] Shadow scoring failed: {e}")
+
+    def _score(self, features, active_probabilities, active_ms):
+        shadow = self._registry.shadow()
+        if shadow is None:
+            return
+        if shadow.version != self.version:
+            # Comparisons only make sense per candidate: start over
+            self.reset()
+            self.version = shadow.version
+        t0 = time.perf_counter()
+        shadow_probabilities = shadow.accident_probabilities(features)
+        shadow_ms = (time.perf_counter() - t0) * 1000
+
+        active_severities, _ = self._classify(active_probabilities, self._registry.active().thresholds)
+        shadow_severities, _ = self._classify(shadow_probabilities, shadow.thresholds)
+        self.stats["samples"] += len(features)
+        self.stats["agreements"] += int(np.sum(active_severities == shadow_severities))
+        self.stats["alarm_flips"] += int(np.sum((active_severities == "low") != (shadow_severities == "low")))
+        self._gaps.extend(np.abs(active_probabilities - shadow_probabilities).tolist())
+        if active_ms is not None:
+            self._latency["active"].append(active_ms)
+        self._latency["shadow"].append(shadow_ms)
+
+    def reset(self):
+        self.stats.clear()
+        self._gaps.clear()
+        for samples in self._latency.values():
+            samples.clear()
+
+    def report(self):
+        samples = self.stats["samples"]
+        latency = {}
+        for name, values in self._latency.items():
+            if values:
+                p50, p95 = np.percentile(np.fromiter(values, dtype=float), [50, 95])
+                latency[name] = {"p50": round(p50, 3), "p95": round(p95, 3)}
+        return {
+            "version": self.version,
+            "samples": samples,
+            "agreement": round(self.stats["agreements"] / samples, 4) if samples else None,
+            "alarm_flips": self.stats["alarm_flips"],
+            "mean_probability_gap": round(float(np.mean(self._gaps)), 4) if self._gaps else None,
+            "latency_ms": latency,
+            "dropped": self.stats["dropped"],
+            "errors": self.stats["errors"],
+        }
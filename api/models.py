@@ -3,17 +3,53 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils import timezone
 
+from . import geo
+
 class User(AbstractUser):
     phone_number = models.CharField(max_length=15, unique=True)
     is_driver = models.BooleanField(default=False)
     is_bystander = models.BooleanField(default=False)
 
+class ComputedFieldsQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create() skips save(); fill the computed columns here too
+        objs = list(objs)
+        for obj in objs:
+            obj.compute_fields()
+        return super().bulk_create(objs, *args, **kwargs)
+
+
+class ComputedFieldsMixin:
+    """
+    Keeps derived columns in step with their inputs on every write.
+    COMPUTED_FIELDS maps each derived column to the fields it is computed from.
+    """
+    COMPUTED_FIELDS = {'geohash': ('latitude', 'longitude')}
+
+    def compute_fields(self):
+        # Geohash cell of the coordinates (see api/geo.py)
+        if self.latitude is None or self.longitude is None:
+            self.geohash = ""
+        else:
+            # Views may pass coordinates through as request strings
+            self.geohash = geo.encode(float(self.latitude), float(self.longitude))
+
+    def save(self, *args, **kwargs):
+        self.compute_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            derived = {field for field, inputs in self.COMPUTED_FIELDS.items() if set(inputs) & set(update_fields)}
+            kwargs['update_fields'] = {*update_fields, *derived}
+        super().save(*args, **kwargs)
+
+
 # Accident Report
-class AccidentReport(models.Model):
+class AccidentReport(ComputedFieldsMixin, models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     latitude = models.FloatField()
     longitude = models.FloatField()
+    geohash = models.CharField(max_length=12, blank=True, default="", editable=False)
     severity = models.CharField(max_length=50, choices=[
         ('low', 'Low'),
         ('medium', 'Medium'),
@@ -26,16 +62,39 @@ class AccidentReport(models.Model):
         ('voice', 'Voice'),
         ('manual', 'Manual')
     ], default='sensor')
+    # Incident this report belongs to (api/clustering.py); equals id for the first report
+    cluster_id = models.UUIDField(null=True, blank=True, editable=False)
+    # Sensor reports: the reading that triggered it; its device's samples
+    # around it are in the telemetry archive (api/telemetry.py)
+    device_id = models.CharField(max_length=64, blank=True, default="")
+    acc_x = models.FloatField(null=True, blank=True)
+    acc_y = models.FloatField(null=True, blank=True)
+    acc_z = models.FloatField(null=True, blank=True)
+    gyro_x = models.FloatField(null=True, blank=True)
+    gyro_y = models.FloatField(null=True, blank=True)
+    gyro_z = models.FloatField(null=True, blank=True)
 
     def __str__(self):
         return f"{self.user} - {self.timestamp}"
 
+    objects = ComputedFieldsQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # AccidentReportView lists newest first
+            models.Index(fields=['-timestamp'], name='accident_ts_idx'),
+            # NearbyIncidentsView: geohash prefix ranges
+            models.Index(fields=['geohash'], name='accident_geohash_idx'),
+            models.Index(fields=['cluster_id'], name='accident_cluster_idx'),
+        ]
 
-class BLEAlert(models.Model):
+
+class BLEAlert(ComputedFieldsMixin, models.Model):
     id = models.UUIDField(default=uuid.uuid4, primary_key=True, editable=False)
     message = models.TextField(default="Emergency detected nearby!")
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    geohash = models.CharField(max_length=12, blank=True, default="", editable=False)
     severity = models.CharField(max_length=20, default="unknown", choices=[
         ('low', 'Low'),
         ('medium', 'Medium'), 
@@ -49,12 +108,40 @@ class BLEAlert(models.Model):
         ('received', 'Received'),
         ('expired', 'Expired')
     ])
+    # Incident this alert belongs to (api/clustering.py); equals id for the first row
+    cluster_id = models.UUIDField(null=True, blank=True, editable=False)
+    # timestamp + broadcast_duration; api/expiry.py flips broadcasts past it to "expired"
+    expires_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     def __str__(self):
         return f"BLE Alert: {self.message[:50]}..."
 
+    COMPUTED_FIELDS = {
+        **ComputedFieldsMixin.COMPUTED_FIELDS,
+        'expires_at': ('timestamp', 'broadcast_duration'),
+    }
+
+    def compute_fields(self):
+        super().compute_fields()
+        self.expires_at = self.timestamp + timezone.timedelta(seconds=int(self.broadcast_duration))
+
+    objects = ComputedFieldsQuerySet.as_manager()
+
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # BLEAlertListView: timestamp__gte + ORDER BY -timestamp, optionally
+            # narrowed by severity and/or status
+            models.Index(fields=['-timestamp'], name='ble_ts_idx'),
+            models.Index(fields=['severity', '-timestamp'], name='ble_severity_ts_idx'),
+            models.Index(fields=['status', '-timestamp'], name='ble_status_ts_idx'),
+            # NearbyIncidentsView: geohash prefix ranges
+            models.Index(fields=['geohash'], name='ble_geohash_idx'),
+            models.Index(fields=['cluster_id'], name='ble_cluster_idx'),
+            # Expiry sweeps and active-only listings touch just the live broadcasts
+            models.Index(fields=['expires_at'], name='ble_broadcast_expiry_idx',
+                         condition=models.Q(status='broadcast')),
+        ]
 
 
 class CloudAlert(models.Model):
@@ -66,15 +153,138 @@ class CloudAlert(models.Model):
     is_emergency = models.BooleanField(default=False)
     timestamp = models.DateTimeField(default=timezone.now)
     status = models.CharField(max_length=50, default="sent", choices=[
+        ('pending', 'Pending'),
         ('sent', 'Sent'),
         ('delivered', 'Delivered'),
         ('failed', 'Failed'),
         ('read', 'Read')
     ])
     failure_reason = models.TextField(blank=True, null=True)
+    # Lease of the push dispatcher delivering a pending alert (api/push_delivery.py)
+    locked_by = models.CharField(max_length=64, blank=True, default="")
+    locked_until = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return f"Cloud Alert: {self.title}"
 
     class Meta:
-        ordering = ['-timestamp']
\ No newline at end of file
+        ordering = ['-timestamp']
+        indexes = [
+            # CloudAlertListView: timestamp__gte + ORDER BY -timestamp, optionally
+            # narrowed by status; emergencies are a small partial index
+            models.Index(fields=['-timestamp'], name='cloud_ts_idx'),
+            models.Index(fields=['status', '-timestamp'], name='cloud_status_ts_idx'),
+            models.Index(fields=['-timestamp'], name='cloud_emergency_ts_idx',
+                         condition=models.Q(is_emergency=True)),
+        ]
+
+class OutboxEvent(models.Model):
+    """
+    Side effect (notification fan-out) recorded in the same transaction as the
+    report/alert that caused it, and drained later by api/outbox.py.
+    """
+    topic = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(default=timezone.now)
+    available_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    locked_by = models.CharField(max_length=64, blank=True, default="")
+    locked_until = models.DateTimeField(null=True, blank=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, null=True)
+
+    def __str__(self):
+        return f"Outbox {self.topic} #{self.id}"
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            # Only unprocessed events are ever scanned by the dispatcher
+            models.Index(fields=['available_at', 'id'], name='outbox_pending_idx',
+                         condition=models.Q(processed_at__isnull=True)),
+        ]
+
+
+class IncidentNotification(models.Model):
+    """
+    An incident (cluster_id, api/clustering.py) whose `topic` has been
+    published. The unique constraint lets exactly one row of an incident
+    claim the fan-out, whichever row that is.
+    """
+    cluster_id = models.UUIDField()
+    topic = models.CharField(max_length=100)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"{self.topic} for incident {self.cluster_id}"
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cluster_id', 'topic'], name='incident_notified_once'),
+        ]
+
+
+class AlertRollup(models.Model):
+    """
+    Pre-aggregated row counts per (hour, channel, severity/status) bucket so
+    statistics read O(buckets) rows instead of scanning every alert.
+    Maintained by api/rollups.py; `manage.py rollup_alerts` rebuilds it.
+    """
+    CHANNELS = [
+        ('accident', 'Accident report'),
+        ('ble', 'BLE alert'),
+        ('cloud', 'Cloud alert'),
+    ]
+
+    hour = models.DateTimeField()
+    channel = models.CharField(max_length=20, choices=CHANNELS)
+    severity = models.CharField(max_length=50, blank=True, default="")
+    status = models.CharField(max_length=50, blank=True, default="")
+    is_emergency = models.BooleanField(default=False)
+    count = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.channel} {self.hour:%Y-%m-%d %H}:00 {self.severity}/{self.status}: {self.count}"
+
+    class Meta:
+        ordering = ['-hour']
+        constraints = [
+            models.UniqueConstraint(fields=['channel', 'hour', 'severity', 'status', 'is_emergency'],
+                                    name='alert_rollup_bucket_unique'),
+        ]
+
+
+class VoiceJob(models.Model):
+    """
+    Audio clip posted to accidents/voice/audio/, transcribed off the request
+    thread by api/voice_pipeline.py. Clients poll it by id.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    status = models.CharField(max_length=20, default="queued", choices=[
+        ('queued', 'Queued'),
+        ('done', 'Done'),
+        ('failed', 'Failed')
+    ])
+    transcript = models.TextField(blank=True, default="")
+    matched_keywords = models.JSONField(default=list, blank=True)
+    severity = models.CharField(max_length=50, null=True, blank=True)
+    severity_score = models.FloatField(null=True, blank=True)
+    # Report filed when the transcript contained an emergency
+    report = models.ForeignKey(AccidentReport, on_delete=models.SET_NULL, null=True, blank=True)
+    # Milliseconds spent in each stage: queue, decode, transcribe, analyze, save
+    timings = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    # The clip, kept until the job finishes so a restarted worker can resume it
+    audio = models.BinaryField(null=True, blank=True, editable=False)
+    audio_format = models.CharField(max_length=16, blank=True, default="")
+    # Lease of the web worker transcribing it, renewed while in flight (api/voice_pipeline.py)
+    locked_by = models.CharField(max_length=64, blank=True, default="")
+    locked_until = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Voice job {self.id} ({self.status})"
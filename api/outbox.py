@@ -0,0 +1,231 @@
+"""
+Transactional outbox for notification fan-out.
+
+Views write an OutboxEvent in the same transaction as the AccidentReport /
+BLEAlert (`publish`), so the request only pays for two INSERTs and the
+event is never lost or sent for a rolled-back row. `OutboxDispatcher`
+drains events in batches off the request thread and runs the handler
+registered for each topic, in a transaction: a handler that fails leaves
+no rows behind, and work that cannot be rolled back (pushes) goes in
+`transaction.on_commit`. Handlers must tolerate an event being retried.
+Each gunicorn worker wakes its dispatcher at boot (gunicorn.conf.py), so
+events left over by a previous process are not stuck until the next one.
+
+Claiming is safe with several dispatchers: on Postgres rows are picked with
+SELECT ... FOR UPDATE SKIP LOCKED; on SQLite (no row locks) a conditional
+UPDATE takes a lease that other dispatchers skip until it expires.
+"""
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import OutboxEvent
+
+ACCIDENT_REPORT_CREATED = "accident_report.created"
+BLE_ALERT_CREATED = "ble_alert.created"
+
+_handlers = {}
+
+
+def handler(topic):
+    """Register `func(events)` to process a batch of events for `topic`."""
+    def register(func):
+        _handlers[topic] = func
+        return func
+    return register
+
+
+def publish(topic, payload):
+    """Record an event; call inside the transaction that writes the source row."""
+    return publish_many(topic, [payload])[0]
+
+
+def publish_many(topic, payloads):
+    events = OutboxEvent.objects.bulk_create([OutboxEvent(topic=topic, payload=p) for p in payloads])
+    # Wake the in-process dispatcher once the rows are visible
+    transaction.on_commit(outbox_dispatcher.wake)
+    return events
+
+
+def report_payload(report):
+    return {
+        "id": str(report.id),
+        "latitude": report.latitude,
+        "longitude": report.longitude,
+        "severity": report.severity,
+        "reported_via": report.reported_via,
+    }
+
+
+def ble_alert_payload(alert):
+    return {
+        "id": str(alert.id),
+        "latitude": alert.latitude,
+        "longitude": alert.longitude,
+        "severity": alert.severity,
+        "message": alert.message,
+    }
+
+
+def claim_batch(worker_id, limit=100, lease_seconds=60):
+    """Lease up to `limit` due events to `worker_id` and return them."""
+    now = timezone.now()
+    due = (OutboxEvent.objects
+           .filter(processed_at__isnull=True, available_at__lte=now)
+           .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+           .order_by('id'))
+    lease = {"locked_by": worker_id, "locked_until": now + timezone.timedelta(seconds=lease_seconds)}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(due.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            OutboxEvent.objects.filter(id__in=ids).update(**lease)
+    else:
+        ids = list(due.values_list('id', flat=True)[:limit])
+        # The lease condition is re-checked in the UPDATE, so a concurrent
+        # dispatcher that raced us on the SELECT simply gets fewer rows
+        due.filter(id__in=ids).update(**lease)
+
+    return list(OutboxEvent.objects.filter(id__in=ids, locked_by=worker_id).order_by('id'))
+
+
+def process_batch(worker_id, limit=100, max_attempts=10):
+    """Claim and handle one batch; returns the number of events claimed."""
+    events = claim_batch(worker_id, limit)
+    by_topic = defaultdict(list)
+    for event in events:
+        by_topic[event.topic].append(event)
+
+    for topic, topic_events in by_topic.items():
+        ids = [e.id for e in topic_events]
+        try:
+            func = _handlers.get(topic)
+            if func is None:
+                raise LookupError(f"No outbox handler for {topic}")
+            # on_commit callbacks run (and may raise) when this block exits
+            with transaction.atomic():
+                func(topic_events)
+        except Exception as e:
+            print(f"❌ [BACKEND] Outbox {topic} batch failed: {e}")
+            attempts = topic_events[0].attempts + 1
+            retry_at = timezone.now() + timezone.timedelta(seconds=min(2 ** attempts, 300))
+            OutboxEvent.objects.filter(id__in=ids).update(
+                attempts=F('attempts') + 1, last_error=str(e), locked_by="", locked_until=None,
+                available_at=retry_at,
+            )
+            # Give up on events that keep failing; last_error stays for inspection
+            OutboxEvent.objects.filter(id__in=ids, attempts__gte=max_attempts).update(processed_at=timezone.now())
+        else:
+            OutboxEvent.objects.filter(id__in=ids).update(
+                processed_at=timezone.now(), locked_by="", locked_until=None,
+            )
+    return len(events)
+
+
+class OutboxDispatcher:
+    """Drains the outbox on a daemon thread; woken on commit, polls as a fallback."""
+
+    def __init__(self, batch_size=100, poll_interval=5.0, in_process=True):
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.in_process = in_process
+        self.worker_id = uuid.uuid4().hex
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.processed = 0
+
+    def wake(self):
+        if not self.in_process:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self.run_forever, name="outbox-dispatcher", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def drain(self):
+        """Process batches until the outbox has nothing due."""
+        total = 0
+        while True:
+            claimed = process_batch(self.worker_id, self.batch_size)
+            total += claimed
+            if claimed < self.batch_size:
+                break
+        self.processed += total
+        return total
+
+    def run_forever(self):
+        while True:
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            try:
+                close_old_connections()
+                self.drain()
+            except Exception as e:
+                print(f"❌ [BACKEND] Outbox dispatcher error: {e}")
+                time.sleep(1)
+
+
+outbox_dispatcher = OutboxDispatcher(
+    batch_size=getattr(settings, "OUTBOX_BATCH_SIZE", 100),
+    poll_interval=getattr(settings, "OUTBOX_POLL_INTERVAL", 5.0),
+    in_process=getattr(settings, "OUTBOX_IN_PROCESS", True),
+)
+
+
+# -------------------------------
+# Handlers
+# -------------------------------
+@handler(ACCIDENT_REPORT_CREATED)
+def fan_out_accident_reports(events):
+    """
+    One topic push per report, plus a push to devices connected to this
+    worker. A retried event reuses the CloudAlert created for its report.
+    """
+    from . import rollups
+    from .models import CloudAlert
+    from .push_delivery import push_engine
+    from .device_socket import socket_registry
+
+    topic = getattr(settings, "ACCIDENT_ALERT_TOPIC", "accident-alerts")
+    report_ids = [e.payload["id"] for e in events]
+    alerted = set(CloudAlert.objects.filter(data__report_id__in=report_ids)
+                  .values_list("data__report_id", flat=True))
+    alerts = CloudAlert.objects.bulk_create([
+        CloudAlert(
+            device_token=f"/topics/{topic}",
+            title="Accident reported nearby",
+            alert_message=f"{e.payload['severity'].title()} severity accident reported via {e.payload['reported_via']}",
+            is_emergency=e.payload["severity"] == "high",
+            data={"report_id": e.payload["id"], "latitude": e.payload["latitude"],
+                  "longitude": e.payload["longitude"]},
+            status="pending",
+        )
+        for e in events if e.payload["id"] not in alerted
+    ])
+    rollups.increment("cloud", alerts)
+    # Including alerts of an earlier attempt that never reached the engine
+    pending = list(CloudAlert.objects.filter(data__report_id__in=report_ids, status="pending")
+                   .values_list("id", flat=True))
+
+    def send():
+        push_engine.enqueue(pending)
+        for e in events:
+            socket_registry.push_threadsafe({"type": "alert", "kind": "accident", **e.payload})
+
+    transaction.on_commit(send)
+
+
+@handler(BLE_ALERT_CREATED)
+def fan_out_ble_alerts(events):
+    from .device_socket import socket_registry
+
+    for e in events:
+        socket_registry.push_threadsafe({"type": "alert", "kind": "ble", **e.payload})
@@ -0,0 +1,112 @@
+"""
+Keyset (cursor) pagination on (timestamp, id) and NDJSON streaming for the
+list endpoints.
+
+A page is fetched with `WHERE (timestamp, id) < (cursor)` ORDER BY
+timestamp DESC, id DESC LIMIT n, so every page costs the same no matter how
+deep the client has scrolled, unlike OFFSET. `ndjson_response` walks the
+same keyset in chunks from an async generator, so under ASGI each chunk is
+sent before the next one is read.
+"""
+import base64
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = getattr(settings, "LIST_PAGE_SIZE", 100)
+MAX_PAGE_SIZE = getattr(settings, "LIST_MAX_PAGE_SIZE", 1000)
+STREAM_CHUNK_SIZE = getattr(settings, "LIST_STREAM_CHUNK_SIZE", 2000)
+
+
+class CursorError(ValueError):
+    pass
+
+
+def encode_cursor(timestamp, pk):
+    raw = json.dumps({"t": timestamp.isoformat(), "id": str(pk)}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        timestamp = parse_datetime(data["t"])
+        if timestamp is None:
+            raise ValueError(data["t"])
+        return timestamp, data["id"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise CursorError(f"Invalid cursor: {e}")
+
+
+def page_size_from(request):
+    try:
+        page_size = int(request.query_params.get("page_size", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise CursorError("page_size must be an integer")
+    return max(1, min(page_size, MAX_PAGE_SIZE))
+
+
+def _after(queryset, timestamp, pk):
+    return queryset.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=pk))
+
+
+def _last_key(rows, key):
+    return key(rows[-1]) if key else (rows[-1].timestamp, rows[-1].pk)
+
+
+def paginate(queryset, cursor=None, page_size=DEFAULT_PAGE_SIZE, key=None):
+    """
+    queryset must be ordered by ('-timestamp', '-id').
+    `key(row)` returns (timestamp, id) for rows that are not model instances
+    (e.g. RowSerializer.cursor_key for values_list() rows).
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if cursor:
+        timestamp, pk = decode_cursor(cursor)
+        try:
+            queryset = _after(queryset, timestamp, pk)
+        except ValidationError as e:
+            # e.g. an id that is not a UUID, rejected by the primary key field
+            raise CursorError(f"Invalid cursor: {'; '.join(e.messages)}")
+
+    # One extra row tells us whether another page exists
+    rows = list(queryset[:page_size + 1])
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    return rows, encode_cursor(*_last_key(rows, key))
+
+
+def wants_stream(request):
+    return request.query_params.get("stream", "").lower() in ("1", "true", "ndjson")
+
+
+def ndjson_response(queryset, serialize, key=None, chunk_size=None):
+    """
+    Stream one JSON object per line; memory stays flat regardless of row count.
+    queryset and `key` are as for `paginate`. The body must be an async
+    generator: Django collects a sync iterator into a list before sending it
+    under ASGI.
+    """
+    chunk_size = chunk_size or STREAM_CHUNK_SIZE
+
+    def fetch(after):
+        rows = list((_after(queryset, *after) if after else queryset)[:chunk_size])
+        return rows, _last_key(rows, key) if rows else None
+
+    async def lines():
+        after = None
+        while True:
+            rows, after = await sync_to_async(fetch)(after)
+            if rows:
+                yield "".join(json.dumps(serialize(row), default=str) + "\n" for row in rows)
+            if len(rows) < chunk_size:
+                return
+
+    return StreamingHttpResponse(lines(), content_type="application/x-ndjson")
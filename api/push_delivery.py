@@ -0,0 +1,322 @@
+"""
+Background delivery of CloudAlert push notifications.
+
+CloudAlertView only writes the row (status "pending") and enqueues its id;
+everything slow happens on a dedicated asyncio thread:
+
+  * ids are micro-batched (PUSH_BATCH_SIZE / PUSH_MAX_WAIT_MS),
+  * each batch is leased to this engine (PUSH_LEASE_SECONDS) with the
+    conditional UPDATE of api/outbox.py, so rows are never delivered by two
+    engines at once,
+  * every alert is its own FCM HTTP v1 request (v1 has no multicast), sent
+    concurrently over one pooled HTTP/2 client,
+  * retryable failures (429/5xx/network) back off exponentially with jitter,
+    honouring Retry-After,
+  * results are written back in bulk: one UPDATE for every delivered row and
+    one bulk_update for the failed ones with their failure_reason.
+
+`manage.py deliver_push` runs the same engine as a standalone dispatcher
+that also sweeps up rows left "pending" by a restarted worker once their
+lease has run out, and
+`manage.py fcm_stub` serves a local FCM stand-in for offline benchmarks.
+"""
+import asyncio
+import json
+import random
+import threading
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import rollups
+from .models import CloudAlert
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+FCM_SCOPE = "https://www.googleapis.com/auth/firebase.messaging"
+
+
+class FCMClient:
+    """Minimal async FCM HTTP v1 client sharing one HTTP/2 connection pool."""
+
+    def __init__(self, endpoint, project_id, credentials_file=None, timeout=10.0, max_connections=10):
+        import httpx
+
+        self.url = f"{endpoint.rstrip('/')}/v1/projects/{project_id}/messages:send"
+        self._credentials_file = credentials_file
+        self._credentials = None
+        self._client = httpx.AsyncClient(
+            http2=True,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def _auth_headers(self):
+        if not self._credentials_file:
+            return {}
+        if self._credentials is None or not self._credentials.valid:
+            from google.oauth2 import service_account
+            from google.auth.transport.requests import Request
+
+            if self._credentials is None:
+                self._credentials = service_account.Credentials.from_service_account_file(
+                    self._credentials_file, scopes=[FCM_SCOPE])
+            await asyncio.to_thread(self._credentials.refresh, Request())
+        return {"Authorization": f"Bearer {self._credentials.token}"}
+
+    async def send(self, token, title, body, data):
+        """Returns (ok, reason, retryable, retry_after_seconds)."""
+        import httpx
+
+        # "/topics/<name>" device tokens fan out to every subscriber of the topic
+        target = {"topic": token[len("/topics/"):]} if token.startswith("/topics/") else {"token": token}
+        message = {
+            "message": {
+                **target,
+                "notification": {"title": title, "body": body},
+                # FCM data values must be strings
+                "data": {str(k): v if isinstance(v, str) else json.dumps(v) for k, v in data.items()},
+            }
+        }
+        try:
+            response = await self._client.post(self.url, json=message, headers=await self._auth_headers())
+        except httpx.HTTPError as e:
+            return False, f"{type(e).__name__}: {e}", True, None
+
+        if response.status_code == 200:
+            return True, None, False, None
+        retry_after = response.headers.get("Retry-After")
+        try:
+            reason = response.json().get("error", {}).get("status") or response.text[:200]
+        except ValueError:
+            reason = response.text[:200]
+        return (False, f"HTTP {response.status_code}: {reason}", response.status_code in RETRYABLE_STATUS,
+                float(retry_after) if retry_after and retry_after.isdigit() else None)
+
+    async def aclose(self):
+        await self._client.aclose()
+
+
+class PushDeliveryEngine:
+    """Asyncio dispatcher on a daemon thread; `enqueue` is safe to call from any thread."""
+
+    def __init__(self, batch_size=500, max_wait_ms=50, max_retries=5, concurrency=200,
+                 backoff_base=0.5, backoff_cap=30.0, lease_seconds=300, sweep_interval=None, client_factory=None):
+        self.batch_size = batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_retries = max_retries
+        self.concurrency = concurrency
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.lease_seconds = lease_seconds
+        self.sweep_interval = sweep_interval
+        self.worker_id = uuid.uuid4().hex
+        self._client_factory = client_factory or default_client
+        self._loop = None
+        self._queue = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._startup_error = None
+        self._start_lock = threading.Lock()
+        self._in_flight = set()
+        self.stats = defaultdict(int)
+
+    # -- public API ---------------------------------------------------------
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._ready.clear()
+                self._startup_error = None
+                self._thread = threading.Thread(target=self._run, name="push-delivery", daemon=True)
+                self._thread.start()
+        self._ready.wait()
+        if self._startup_error is not None:
+            raise RuntimeError(f"Push delivery could not start: {self._startup_error}") from self._startup_error
+
+    def enqueue(self, alert_ids):
+        """Hand alert ids to the dispatcher; returns immediately."""
+        if self._thread is None or not self._thread.is_alive():
+            self.start()
+        alert_ids = list(alert_ids)
+        self.stats["enqueued"] += len(alert_ids)
+        self._loop.call_soon_threadsafe(self._put_many, alert_ids)
+
+    def run_forever(self):
+        """Run the dispatcher on the calling thread (used by manage.py deliver_push)."""
+        asyncio.run(self._main())
+
+    def pending(self):
+        return (self._queue.qsize() if self._queue else 0) + len(self._in_flight)
+
+    # -- dispatcher -----------------------------------------------------------
+
+    def _run(self):
+        try:
+            asyncio.run(self._main())
+        except Exception as e:
+            print(f"❌ [BACKEND] Push delivery stopped: {e}")
+
+    def _put_many(self, alert_ids):
+        for alert_id in alert_ids:
+            self._queue.put_nowait(alert_id)
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        try:
+            self._client = self._client_factory()
+        except Exception as e:
+            self._startup_error = e
+            raise
+        finally:
+            # Never leave start() (and every enqueue behind it) waiting
+            self._ready.set()
+
+        tasks = set()
+        if self.sweep_interval:
+            tasks.add(asyncio.create_task(self._sweep()))
+        try:
+            while True:
+                batch = await self._next_batch()
+                task = asyncio.create_task(self._deliver(batch))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        finally:
+            await self._client.aclose()
+
+    async def _next_batch(self):
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.max_wait
+        while len(batch) < self.batch_size:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _sweep(self):
+        """Re-enqueue rows left pending (e.g. by a worker that died before delivering)."""
+        while True:
+            ids = await asyncio.to_thread(_stale_pending_ids, max(self.sweep_interval, 1))
+            fresh = [i for i in ids if i not in self._in_flight]
+            if fresh:
+                self.stats["swept"] += len(fresh)
+                self._put_many(fresh)
+            await asyncio.sleep(self.sweep_interval)
+
+    async def _deliver(self, alert_ids):
+        alert_ids = [i for i in alert_ids if i not in self._in_flight]
+        self._in_flight.update(alert_ids)
+        try:
+            alerts = await asyncio.to_thread(claim_pending, self.worker_id, alert_ids, self.lease_seconds)
+            results = await asyncio.gather(*(
+                self._send_with_retry(alert["device_token"], alert["title"], alert["alert_message"], alert["data"])
+                for alert in alerts
+            ))
+
+            delivered = [alert["id"] for alert, (ok, _) in zip(alerts, results) if ok]
+            failed = {alert["id"]: reason for alert, (ok, reason) in zip(alerts, results) if not ok}
+            await asyncio.to_thread(_write_results, self.worker_id, delivered, failed)
+            self.stats["delivered"] += len(delivered)
+            self.stats["failed"] += len(failed)
+            self.stats["batches"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"❌ [BACKEND] Push delivery batch error: {e}")
+        finally:
+            self._in_flight.difference_update(alert_ids)
+
+    async def _send_with_retry(self, token, title, body, data):
+        reason = None
+        for attempt in range(self.max_retries + 1):
+            async with self._semaphore:
+                ok, reason, retryable, retry_after = await self._client.send(token, title, body, data)
+            if ok:
+                return True, None
+            if not retryable or attempt == self.max_retries:
+                break
+            self.stats["retries"] += 1
+            delay = retry_after or min(self.backoff_cap, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+            await asyncio.sleep(delay)
+        return False, reason
+
+
+# -- DB helpers (run via asyncio.to_thread; the ORM is sync-only) --------------
+
+def claim_pending(worker_id, alert_ids, lease_seconds=300):
+    """Lease the pending, unleased alerts among `alert_ids` to `worker_id` and return their fields."""
+    close_old_connections()
+    now = timezone.now()
+    free = (CloudAlert.objects
+            .filter(id__in=alert_ids, status="pending")
+            .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now)))
+    lease = {"locked_by": worker_id, "locked_until": now + timezone.timedelta(seconds=lease_seconds)}
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(free.select_for_update(skip_locked=True).values_list("id", flat=True))
+            CloudAlert.objects.filter(id__in=ids).update(**lease)
+    else:
+        # The lease condition is re-checked in the UPDATE, so an engine that
+        # raced us for the same ids simply gets fewer rows
+        free.update(**lease)
+
+    return list(CloudAlert.objects.filter(id__in=alert_ids, status="pending", locked_by=worker_id).values(
+        "id", "device_token", "title", "alert_message", "data"))
+
+
+def _write_results(worker_id, delivered, failed):
+    close_old_connections()
+    with transaction.atomic():
+        # Only rows we still hold: if our lease ran out, whoever took over writes the outcome
+        ours = CloudAlert.objects.filter(status="pending", locked_by=worker_id)
+        if delivered:
+            rows = ours.filter(id__in=delivered)
+            rollups.transition("cloud", rows, status="delivered")
+            rows.update(status="delivered", failure_reason=None, locked_until=None)
+        if failed:
+            rows = ours.filter(id__in=list(failed))
+            rollups.transition("cloud", rows, status="failed")
+            CloudAlert.objects.bulk_update(
+                [CloudAlert(id=alert_id, status="failed", failure_reason=failed[alert_id], locked_until=None)
+                 for alert_id in rows.values_list("id", flat=True)],
+                ["status", "failure_reason", "locked_until"],
+                batch_size=500,
+            )
+
+
+def _stale_pending_ids(older_than_seconds, limit=5000):
+    close_old_connections()
+    now = timezone.now()
+    cutoff = now - timezone.timedelta(seconds=older_than_seconds)
+    return list(CloudAlert.objects.filter(status="pending", timestamp__lt=cutoff)
+                .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+                .values_list("id", flat=True)[:limit])
+
+
+def default_client():
+    endpoint = getattr(settings, "FCM_ENDPOINT", "https://fcm.googleapis.com")
+    # The local stub (manage.py fcm_stub) needs no OAuth token
+    credentials = None if endpoint.startswith("http://") else settings.FIREBASE_CREDENTIALS
+    return FCMClient(
+        endpoint,
+        getattr(settings, "FCM_PROJECT_ID", "acpai-27f5f"),
+        credentials_file=credentials,
+    )
+
+
+push_engine = PushDeliveryEngine(
+    batch_size=getattr(settings, "PUSH_BATCH_SIZE", 500),
+    max_wait_ms=getattr(settings, "PUSH_MAX_WAIT_MS", 50),
+    max_retries=getattr(settings, "PUSH_MAX_RETRIES", 5),
+    concurrency=getattr(settings, "PUSH_CONCURRENCY", 200),
+    lease_seconds=getattr(settings, "PUSH_LEASE_SECONDS", 300),
+)
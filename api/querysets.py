@@ -0,0 +1,64 @@
+"""
+Querysets behind the list endpoints, shared by the views and by
+`manage.py explain_queries` so the plans it prints are the real ones.
+All are ordered by (-timestamp, -id) for keyset pagination (api/pagination.py).
+"""
+from django.db.models import Q
+from django.utils import timezone
+
+from . import geo
+from .models import AccidentReport, BLEAlert, CloudAlert
+
+
+def accident_report_list(queryset=None):
+    queryset = AccidentReport.objects.all() if queryset is None else queryset
+    # AccidentReportSerializer embeds the user; JOIN it instead of one query per row
+    return queryset.select_related('user').order_by('-timestamp', '-id')
+
+
+def ble_alert_list(severity=None, status=None, hours=24, active=False):
+    alerts = BLEAlert.objects.all()
+    if active:
+        # Still broadcasting: served by the partial expiry index
+        alerts = alerts.filter(status='broadcast', expires_at__gt=timezone.now())
+    if severity:
+        alerts = alerts.filter(severity=severity)
+    if status:
+        alerts = alerts.filter(status=status)
+    if hours:
+        time_threshold = timezone.now() - timezone.timedelta(hours=int(hours))
+        alerts = alerts.filter(timestamp__gte=time_threshold)
+    return alerts.order_by('-timestamp', '-id')
+
+
+def cloud_alert_list(status=None, is_emergency=None, hours=24):
+    alerts = CloudAlert.objects.all()
+    if status:
+        alerts = alerts.filter(status=status)
+    if is_emergency is not None:
+        alerts = alerts.filter(is_emergency=is_emergency)
+    if hours:
+        time_threshold = timezone.now() - timezone.timedelta(hours=int(hours))
+        alerts = alerts.filter(timestamp__gte=time_threshold)
+    return alerts.order_by('-timestamp', '-id')
+
+
+def in_cells(queryset, cells):
+    """Rows whose geohash starts with one of `cells`, as index range scans."""
+    condition = Q()
+    for cell in cells:
+        low, high = geo.prefix_range(cell)
+        condition |= Q(geohash__gte=low, geohash__lt=high) if high else Q(geohash__gte=low)
+    return queryset.filter(condition).exclude(geohash="")
+
+
+def nearby_candidates(model, latitude, longitude, radius_km, hours=24):
+    """
+    AccidentReports or BLEAlerts in the geohash cells covering the circle;
+    a superset of the rows within `radius_km` (see geo.within_radius).
+    """
+    candidates = in_cells(model.objects.all(), geo.covering_cells(latitude, longitude, radius_km))
+    if hours:
+        time_threshold = timezone.now() - timezone.timedelta(hours=int(hours))
+        candidates = candidates.filter(timestamp__gte=time_threshold)
+    return candidates.order_by()
@@ -0,0 +1,115 @@
+"""
+Hourly rollups of AccidentReport / BLEAlert / CloudAlert counts.
+
+Buckets are kept current incrementally:
+  * `increment` on insert (post_save signal in apps.py, explicit calls
+    after bulk_create),
+  * `transition` before bulk status changes (e.g. push delivery results),
+    moving counts from the old bucket to the new one.
+Anything else that edits or deletes rows out of band is corrected by the
+compaction job, `manage.py rollup_alerts`, which rebuilds buckets from the
+raw tables for a time range (or for everything, as a backfill).
+"""
+import datetime
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncHour
+
+from .models import AccidentReport, AlertRollup, BLEAlert, CloudAlert
+
+# Columns each channel is bucketed by (besides the hour)
+CHANNEL_DIMENSIONS = {
+    "accident": ("severity",),
+    "ble": ("severity", "status"),
+    "cloud": ("status", "is_emergency"),
+}
+KEY_FIELDS = ("channel", "hour", "severity", "status", "is_emergency")
+SOURCE_MODELS = {"accident": AccidentReport, "ble": BLEAlert, "cloud": CloudAlert}
+
+
+def floor_hour(value):
+    return value.astimezone(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def ceil_hour(value):
+    floored = floor_hour(value)
+    return floored if floored == value else floored + datetime.timedelta(hours=1)
+
+
+def _key(channel, hour, values):
+    key = {"channel": channel, "hour": hour, "severity": "", "status": "", "is_emergency": False}
+    for dim in CHANNEL_DIMENSIONS[channel]:
+        key[dim] = values[dim]
+    return tuple(key[f] for f in KEY_FIELDS)
+
+
+def _apply(deltas):
+    for key, n in deltas.items():
+        if not n:
+            continue
+        fields = dict(zip(KEY_FIELDS, key))
+        if AlertRollup.objects.filter(**fields).update(count=F("count") + n):
+            continue
+        try:
+            with transaction.atomic():
+                AlertRollup.objects.create(count=n, **fields)
+        except IntegrityError:
+            # Another writer created the bucket first
+            AlertRollup.objects.filter(**fields).update(count=F("count") + n)
+
+
+def increment(channel, objs):
+    """Count newly inserted rows of `channel` into their buckets."""
+    dims = CHANNEL_DIMENSIONS[channel]
+    deltas = Counter(
+        _key(channel, floor_hour(obj.timestamp), {d: getattr(obj, d) for d in dims})
+        for obj in objs
+    )
+    _apply(deltas)
+
+
+def transition(channel, queryset, **new_values):
+    """
+    Move the rows of `queryset` to the buckets for `new_values` (e.g. status="delivered").
+    Call right before the matching queryset.update(), in the same transaction.
+    """
+    dims = CHANNEL_DIMENSIONS[channel]
+    grouped = (queryset.order_by()
+               .annotate(bucket=TruncHour("timestamp", tzinfo=datetime.timezone.utc))
+               .values("bucket", *dims)
+               .annotate(n=Count("id")))
+    deltas = Counter()
+    for row in grouped:
+        deltas[_key(channel, row["bucket"], row)] -= row["n"]
+        deltas[_key(channel, row["bucket"], {**row, **new_values})] += row["n"]
+    _apply(deltas)
+
+
+def rebuild(since=None, channels=None):
+    """
+    Recompute buckets from the raw tables, for hours >= `since` (all hours by default).
+    Returns the number of buckets written.
+    """
+    written = 0
+    with transaction.atomic():
+        for channel in channels or CHANNEL_DIMENSIONS:
+            dims = CHANNEL_DIMENSIONS[channel]
+            stale = AlertRollup.objects.filter(channel=channel)
+            rows = SOURCE_MODELS[channel].objects.order_by()
+            if since is not None:
+                stale = stale.filter(hour__gte=floor_hour(since))
+                rows = rows.filter(timestamp__gte=floor_hour(since))
+            stale.delete()
+
+            grouped = (rows.annotate(bucket=TruncHour("timestamp", tzinfo=datetime.timezone.utc))
+                       .values("bucket", *dims)
+                       .annotate(n=Count("id")))
+            buckets = [
+                AlertRollup(count=row["n"], **dict(zip(KEY_FIELDS, _key(channel, row["bucket"], row))))
+                for row in grouped.iterator(chunk_size=5000)
+            ]
+            AlertRollup.objects.bulk_create(buckets, batch_size=1000)
+            written += len(buckets)
+    return written
@@ -0,0 +1,147 @@
+"""
+Read-only fast path for the high-volume list endpoints.
+
+DRF serializers instantiate a field object per column and run
+`to_representation` (and any SerializerMethodField) for every row. Here a
+list is fetched as values_list() tuples and each row is turned into a dict
+by a plan compiled once per serializer: a list of (name, getter) pairs
+where the getter is a plain itemgetter, or the column's formatter applied
+to it. Related objects (AccidentReport.user) come from the same JOINed
+query instead of one query per row.
+
+Output is identical to AccidentReportSerializer / BLEAlertSerializer /
+CloudAlertSerializer; keep the two in step when fields change.
+"""
+from operator import itemgetter
+
+from django.db import models
+from django.utils import timezone
+
+from .models import AccidentReport, BLEAlert, CloudAlert, User
+
+
+def iso_datetime(value):
+    """DRF DateTimeField output: ISO 8601 in TIME_ZONE, 'Z' for UTC."""
+    # DRF uses the current time zone; nothing here activates a per-request
+    # zone, so that is always TIME_ZONE, and get_default_timezone() is cached
+    value = value.astimezone(timezone.get_default_timezone()).isoformat()
+    return value[:-6] + "Z" if value.endswith("+00:00") else value
+
+
+def formatted_timestamp(value):
+    # Same as strftime("%Y-%m-%d %H:%M:%S"), without the format parsing
+    return value.isoformat(" ", "seconds")[:19]
+
+
+def short_device_token(value):
+    if value:
+        return f"{value[:20]}..." if len(value) > 20 else value
+    return "Unknown"
+
+
+# Columns whose DB value differs from what DRF renders; everything else
+# (floats, strings, ints, bools, JSON) is passed through as fetched
+DEFAULT_FORMATTERS = {
+    models.UUIDField: str,
+    models.DateTimeField: iso_datetime,
+}
+
+
+class Nested:
+    """Embed a related object, e.g. Nested("user", USER_ROWS) for a nullable FK."""
+
+    def __init__(self, relation, serializer):
+        self.relation = relation
+        self.serializer = serializer
+
+
+class RowSerializer:
+    """
+    fields: model field names, (name, column, formatter) for derived fields,
+    or Nested(...) for a related object serialized from JOINed columns.
+    """
+
+    def __init__(self, model, fields):
+        self.model = model
+        self.columns = []
+        self.flat_fields = []
+        self._getters = []
+        for spec in fields:
+            if isinstance(spec, Nested):
+                self._getters.append((spec.relation, self._nested_getter(spec)))
+                continue
+            if isinstance(spec, tuple):
+                name, column, formatter = spec
+            else:
+                name, column = spec, spec
+                formatter = DEFAULT_FORMATTERS.get(type(model._meta.get_field(spec)))
+            self.flat_fields.append((name, column, formatter))
+            self._getters.append((name, self._getter(self._column(column), formatter)))
+        # List models carry (timestamp, id) for keyset pagination; User does not
+        self._key = itemgetter(self.columns.index("timestamp"), self._column("id")) if "timestamp" in self.columns else None
+
+    def _column(self, column):
+        if column not in self.columns:
+            self.columns.append(column)
+        return self.columns.index(column)
+
+    @staticmethod
+    def _getter(index, formatter):
+        if formatter is None:
+            return itemgetter(index)
+
+        def get(row):
+            value = row[index]
+            return None if value is None else formatter(value)
+        return get
+
+    def _nested_getter(self, spec):
+        nested = spec.serializer
+        if len(nested.flat_fields) != len(nested._getters):
+            raise TypeError("Nested RowSerializers cannot nest further")
+        getters = [
+            (name, self._getter(self._column(f"{spec.relation}__{column}"), formatter))
+            for name, column, formatter in nested.flat_fields
+        ]
+        pk_index = self._column(f"{spec.relation}__{nested.model._meta.pk.name}")
+
+        def get(row):
+            if row[pk_index] is None:
+                return None
+            return {name: getter(row) for name, getter in getters}
+        return get
+
+    def rows(self, queryset):
+        """The queryset as bare tuples in column order; ordering and filters are kept."""
+        return queryset.values_list(*self.columns)
+
+    def cursor_key(self, row):
+        """(timestamp, id) of a row, for api/pagination.py."""
+        return self._key(row)
+
+    def to_representation(self, row):
+        return {name: get(row) for name, get in self._getters}
+
+    def many(self, rows):
+        getters = self._getters
+        return [{name: get(row) for name, get in getters} for row in rows]
+
+
+USER_ROWS = RowSerializer(User, ['id', 'username', 'email', 'phone_number', 'is_driver', 'is_bystander'])
+
+ACCIDENT_REPORT_ROWS = RowSerializer(AccidentReport, [
+    'id', Nested('user', USER_ROWS), 'latitude', 'longitude', 'severity', 'description', 'timestamp',
+    'reported_via', 'cluster_id', 'device_id', 'acc_x', 'acc_y', 'acc_z', 'gyro_x', 'gyro_y', 'gyro_z',
+])
+
+BLE_ALERT_ROWS = RowSerializer(BLEAlert, [
+    'id', ('formatted_timestamp', 'timestamp', formatted_timestamp), 'message', 'latitude', 'longitude',
+    'severity', 'location_name', 'broadcast_duration', 'timestamp', 'status', 'cluster_id',
+    'expires_at',
+])
+
+CLOUD_ALERT_ROWS = RowSerializer(CloudAlert, [
+    'id', ('formatted_timestamp', 'timestamp', formatted_timestamp),
+    ('short_device_token', 'device_token', short_device_token), 'device_token', 'title', 'alert_message',
+    'data', 'is_emergency', 'timestamp', 'status', 'failure_reason',
+])
@@ -0,0 +1,75 @@
+"""
+Compact binary body for sensor uploads (SensorAccidentReportView).
+
+Instead of JSON, a device may POST Content-Type: application/octet-stream
+with one or more packed little-endian records:
+
+    latitude, longitude, acc_x, acc_y, acc_z, gyro_x, gyro_y, gyro_z   float32
+    timestamp                                                           float64
+
+That is 40 bytes per sample. The first 32 bytes of a record are the
+SensorBatchAccidentReportView binary layout. A NaN timestamp means "use the
+arrival time". Every other value must be finite. Bodies are decoded with np.frombuffer into a read-only
+structured array over the request bytes: nothing is copied or converted
+per field. The view takes its record tuples with one tolist() call. JSON
+bodies give the same tuples through `from_fields`, kept at float64.
+
+manage.py bench_sensor_wire compares bytes on the wire and decode time
+with JSON and msgpack.
+"""
+import math
+
+import numpy as np
+
+from .ml_model import FEATURE_NAMES
+
+CONTENT_TYPE = "application/octet-stream"
+SENSOR_COLUMNS = ["latitude", "longitude"] + FEATURE_NAMES
+SENSOR_RECORD = np.dtype([(name, "<f4") for name in SENSOR_COLUMNS] + [("timestamp", "<f8")])
+# Refuse bodies larger than this many samples instead of scoring them
+MAX_RECORDS = 1000
+
+
+def decode_records(body):
+    """Structured SENSOR_RECORD array viewing `body` (bytes) without copying."""
+    if not body or len(body) % SENSOR_RECORD.itemsize:
+        raise ValueError(f"Binary body length must be a non-zero multiple of {SENSOR_RECORD.itemsize} bytes")
+    if len(body) > MAX_RECORDS * SENSOR_RECORD.itemsize:
+        raise ValueError(f"At most {MAX_RECORDS} samples per request")
+    records = np.frombuffer(body, dtype=SENSOR_RECORD)
+    for name in SENSOR_COLUMNS:
+        if not np.isfinite(records[name]).all():
+            raise ValueError(f"{name} must be a finite number")
+    if np.isinf(records["timestamp"]).any():
+        raise ValueError("timestamp must be finite (or NaN for the arrival time)")
+    return records
+
+
+def encode_records(rows, timestamps=None):
+    """Pack (n, 8) rows in SENSOR_COLUMNS order, plus optional timestamps, as a request body."""
+    rows = np.asarray(rows, dtype=np.float64).reshape(-1, len(SENSOR_COLUMNS))
+    records = np.empty(len(rows), dtype=SENSOR_RECORD)
+    for i, name in enumerate(SENSOR_COLUMNS):
+        records[name] = rows[:, i]
+    records["timestamp"] = np.nan if timestamps is None else timestamps
+    return records.tobytes()
+
+
+def finite(value, name):
+    value = float(value)
+    if not math.isfinite(value):
+        raise ValueError(f"{name} must be a finite number")
+    return value
+
+
+def from_fields(data):
+    """
+    The sample of a JSON/form body as a one-item list of record tuples.
+    Every SENSOR_COLUMNS field is required; timestamp is optional.
+    """
+    missing = [name for name in SENSOR_COLUMNS if data.get(name) in (None, "")]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+    timestamp = data.get("timestamp")
+    return [(*(finite(data[name], name) for name in SENSOR_COLUMNS),
+             finite(timestamp, "timestamp") if timestamp is not None else float("nan"))]
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from .models import AccidentReport, User  # ✅ Import custom User model
-from .models import BLEAlert, CloudAlert
+from .models import BLEAlert, CloudAlert, VoiceJob
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -12,7 +12,8 @@ class AccidentReportSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = AccidentReport
-        fields = ['id', 'user', 'latitude', 'longitude', 'severity', 'description', 'timestamp', 'reported_via']
+        fields = ['id', 'user', 'latitude', 'longitude', 'severity', 'description', 'timestamp', 'reported_via', 'cluster_id',
+                  'device_id', 'acc_x', 'acc_y', 'acc_z', 'gyro_x', 'gyro_y', 'gyro_z']
         
 
 class BLEAlertSerializer(serializers.ModelSerializer):
@@ -20,7 +21,7 @@ class BLEAlertSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = BLEAlert
-        fields = '__all__'
+        exclude = ['geohash']
     
     def get_formatted_timestamp(self, obj):
         return obj.timestamp.strftime("%Y-%m-%d %H:%M:%S")
@@ -32,7 +33,7 @@ class CloudAlertSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = CloudAlert
-        fields = '__all__'
+        exclude = ['locked_by', 'locked_until']
     
     def get_formatted_timestamp(self, obj):
         return obj.timestamp.strftime("%Y-%m-%d %H:%M:%S")
@@ -41,3 +42,11 @@ class CloudAlertSerializer(serializers.ModelSerializer):
         if obj.device_token:
             return f"{obj.device_token[:20]}..." if len(obj.device_token) > 20 else obj.device_token
         return "Unknown"
+
+
+class VoiceJobSerializer(serializers.ModelSerializer):
+    report = AccidentReportSerializer(read_only=True)
+
+    class Meta:
+        model = VoiceJob
+        exclude = ['user', 'audio', 'locked_by', 'locked_until']
@@ -0,0 +1,55 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import clustering
+from . import rollups
+from .live_grid import live_incidents
+from .models import AccidentReport, BLEAlert, CloudAlert
+
+
+# New reports/alerts join or start an incident before they are inserted;
+# bulk_create() callers run clustering.assign_clusters() themselves
+@receiver(pre_save, sender=AccidentReport)
+@receiver(pre_save, sender=BLEAlert)
+def assign_incident_cluster(sender, instance, raw=False, **kwargs):
+    if instance._state.adding and not raw:
+        clustering.assign_clusters([instance])
+
+
+# bulk_create() does not send post_save; callers count those rows themselves
+@receiver(post_save, sender=AccidentReport)
+def rollup_accident_report(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        rollups.increment("accident", [instance])
+
+
+@receiver(post_save, sender=BLEAlert)
+def rollup_ble_alert(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        rollups.increment("ble", [instance])
+
+
+@receiver(post_save, sender=CloudAlert)
+def rollup_cloud_alert(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        rollups.increment("cloud", [instance])
+
+
+# Live incident grid (api/live_grid.py); applied only once the row is committed
+@receiver(post_save, sender=AccidentReport)
+def track_live_report(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: live_incidents.add_reports([instance]))
+
+
+@receiver(post_save, sender=BLEAlert)
+def track_live_ble_alert(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: live_incidents.update_ble_alert(instance))
+
+
+@receiver(post_delete, sender=AccidentReport)
+@receiver(post_delete, sender=BLEAlert)
+def untrack_live_incident(sender, instance, **kwargs):
+    transaction.on_commit(lambda: live_incidents.discard(instance.id))
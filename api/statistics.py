@@ -0,0 +1,122 @@
+"""
+Alert statistics for AlertStatisticsView.
+
+By default (ALERT_STATISTICS_SOURCE = "rollup") counts come from the hourly
+AlertRollup buckets: one conditional aggregation over O(buckets) rows per
+channel, plus one indexed range count on the raw table for the partial hour
+at the start of each rolling window, so the numbers stay exact.
+With "raw" the same payload is computed by one conditional-aggregation query
+(COUNT(*) FILTER (WHERE ...)) over each raw table.
+"""
+import operator
+from functools import reduce
+
+from django.conf import settings
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .cache import TTLCache
+from .models import AlertRollup, BLEAlert, CloudAlert
+from .rollups import ceil_hour
+
+# Set ALERT_STATISTICS_CACHE_SECONDS > 0 to serve repeated dashboard polls from memory
+statistics_cache = TTLCache(getattr(settings, "ALERT_STATISTICS_CACHE_SECONDS", 0))
+
+BLE_BREAKDOWN = {
+    "high": Q(severity="high"),
+    "medium": Q(severity="medium"),
+    "low": Q(severity="low"),
+}
+CLOUD_BREAKDOWN = {
+    "emergency_alerts": Q(is_emergency=True),
+    # Alerts are created pending and move to delivered/failed (api/push_delivery.py)
+    "pending": Q(status="pending"),
+    "sent": Q(status="sent"),
+    "delivered": Q(status="delivered"),
+    "failed": Q(status="failed"),
+}
+
+
+def _time_ranges(now):
+    return {
+        "today": now.replace(hour=0, minute=0, second=0, microsecond=0),
+        "last_24_hours": now - timezone.timedelta(hours=24),
+        "last_7_days": now - timezone.timedelta(days=7),
+    }
+
+
+def _raw_counts(model, ranges, breakdown):
+    aggregates = {"total": Count("id")}
+    aggregates.update({name: Count("id", filter=Q(timestamp__gte=since)) for name, since in ranges.items()})
+    aggregates.update({name: Count("id", filter=q) for name, q in breakdown.items()})
+    return model.objects.order_by().aggregate(**aggregates)
+
+
+def _rollup_counts(channel, model, ranges, breakdown):
+    aggregates = {"total": Sum("count")}
+    aggregates.update({name: Sum("count", filter=Q(hour__gte=ceil_hour(since))) for name, since in ranges.items()})
+    aggregates.update({name: Sum("count", filter=q) for name, q in breakdown.items()})
+    counts = {k: v or 0 for k, v in AlertRollup.objects.filter(channel=channel).aggregate(**aggregates).items()}
+
+    # Rows between a window start and the next full hour are not covered by
+    # whole buckets; count them from the raw table (an indexed range scan)
+    partial = {name: (since, ceil_hour(since)) for name, since in ranges.items() if ceil_hour(since) != since}
+    if partial:
+        windows = {name: Q(timestamp__gte=start, timestamp__lt=end) for name, (start, end) in partial.items()}
+        edge = model.objects.order_by().filter(reduce(operator.or_, windows.values())).aggregate(
+            **{name: Count("id", filter=q) for name, q in windows.items()})
+        for name in partial:
+            counts[name] += edge[name]
+    return counts
+
+
+def _counts(channel, model, ranges, breakdown):
+    if getattr(settings, "ALERT_STATISTICS_SOURCE", "rollup") == "raw":
+        return _raw_counts(model, ranges, breakdown)
+    return _rollup_counts(channel, model, ranges, breakdown)
+
+
+def ble_alert_statistics(now=None):
+    counts = _counts("ble", BLEAlert, _time_ranges(now or timezone.now()), BLE_BREAKDOWN)
+    return {
+        "total": counts["total"],
+        "today": counts["today"],
+        "last_24_hours": counts["last_24_hours"],
+        "last_7_days": counts["last_7_days"],
+        "severity_breakdown": {
+            "high": counts["high"],
+            "medium": counts["medium"],
+            "low": counts["low"],
+        },
+    }
+
+
+def cloud_alert_statistics(now=None):
+    counts = _counts("cloud", CloudAlert, _time_ranges(now or timezone.now()), CLOUD_BREAKDOWN)
+    return {
+        "total": counts["total"],
+        "today": counts["today"],
+        "last_24_hours": counts["last_24_hours"],
+        "last_7_days": counts["last_7_days"],
+        "emergency_alerts": counts["emergency_alerts"],
+        "status_breakdown": {
+            "pending": counts["pending"],
+            "sent": counts["sent"],
+            "delivered": counts["delivered"],
+            "failed": counts["failed"],
+        },
+    }
+
+
+def alert_statistics():
+    """Payload of AlertStatisticsView, optionally cached."""
+    def compute():
+        now = timezone.now()
+        ble = ble_alert_statistics(now)
+        cloud = cloud_alert_statistics(now)
+        return {
+            "ble_alerts": ble,
+            "cloud_alerts": cloud,
+            "total_alerts": ble["total"] + cloud["total"],
+        }
+    return statistics_cache.get_or_set("alert_statistics", compute)
@@ -0,0 +1,215 @@
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+
+import numpy as np
+from django.conf import settings
+
+from .ml_model import predict_accident_batch, FEATURE_NAMES
+
+# Model severities a window remembers per sample; 0 means the model was not hit
+HIT_SEVERITIES = ["", "medium", "high"]
+
+
+class DeviceWindow:
+    """
+    Fixed-size ring buffer of the most recent samples from one device.
+
+    Window features are maintained incrementally as samples arrive:
+    running sums give the rolling variance of the acceleration magnitude and
+    the mean gyro energy, and monotonic deques give the window peaks, so a
+    push is O(1) amortized instead of a pass over the whole window.
+    """
+
+    def __init__(self, size, sample_rate):
+        self.size = size
+        self.nominal_dt = 1.0 / sample_rate
+        self.samples = np.zeros((size, len(FEATURE_NAMES)), dtype=np.float64)
+        self.acc_mag = np.zeros(size, dtype=np.float64)
+        self.gyro_energy = np.zeros(size, dtype=np.float64)
+        self.hits = np.zeros(size, dtype=np.int8)  # index into HIT_SEVERITIES
+
+        self.count = 0  # total samples ever pushed
+        self.acc_sum = 0.0
+        self.acc_sq_sum = 0.0
+        self.gyro_sum = 0.0
+        self.hit_sum = 0
+        self.peak_acc = deque()   # (sample number, magnitude), decreasing
+        self.peak_jerk = deque()  # (sample number, jerk), decreasing
+        self.last_time = None
+        self.last_fired = -math.inf
+        self.last_seen = time.monotonic()
+
+    def __len__(self):
+        return min(self.count, self.size)
+
+    @staticmethod
+    def _push_max(window_deque, n, value):
+        while window_deque and window_deque[-1][1] <= value:
+            window_deque.pop()
+        window_deque.append((n, value))
+
+    def push(self, sample, timestamp=None):
+        """Add one six-axis sample and return its (acc magnitude, jerk)."""
+        sample = np.asarray(sample, dtype=np.float64)
+        n = self.count
+        idx = n % self.size
+
+        # Evict the oldest sample once the buffer is full
+        if n >= self.size:
+            self.acc_sum -= self.acc_mag[idx]
+            self.acc_sq_sum -= self.acc_mag[idx] ** 2
+            self.gyro_sum -= self.gyro_energy[idx]
+            self.hit_sum -= int(self.hits[idx] > 0)
+
+        acc = sample[:3]
+        gyro = sample[3:]
+        magnitude = float(math.sqrt(acc @ acc))
+        energy = float(gyro @ gyro)
+
+        jerk = 0.0
+        if n > 0:
+            if timestamp is not None and self.last_time is not None and timestamp > self.last_time:
+                dt = timestamp - self.last_time
+            else:
+                dt = self.nominal_dt
+            previous = self.samples[(n - 1) % self.size, :3]
+            delta = acc - previous
+            jerk = float(math.sqrt(delta @ delta)) / dt
+
+        self.samples[idx] = sample
+        self.acc_mag[idx] = magnitude
+        self.gyro_energy[idx] = energy
+        self.hits[idx] = 0
+        self.acc_sum += magnitude
+        self.acc_sq_sum += magnitude ** 2
+        self.gyro_sum += energy
+
+        self._push_max(self.peak_acc, n, magnitude)
+        self._push_max(self.peak_jerk, n, jerk)
+        oldest = n - self.size + 1
+        for window_deque in (self.peak_acc, self.peak_jerk):
+            while window_deque[0][0] < oldest:
+                window_deque.popleft()
+
+        self.count += 1
+        self.last_time = timestamp
+        self.last_seen = time.monotonic()
+        return magnitude, jerk
+
+    def mark_hit(self, n, severity):
+        """Record that the model classified sample number `n` as an accident of `severity`."""
+        if n < self.count - self.size:
+            return  # already evicted
+        idx = n % self.size
+        if not self.hits[idx]:
+            self.hit_sum += 1
+        self.hits[idx] = max(self.hits[idx], HIT_SEVERITIES.index(severity))
+
+    def severity(self):
+        """Highest severity among the model hits in the window."""
+        return HIT_SEVERITIES[int(self.hits.max())] or "low"
+
+    def features(self, jerk):
+        n = len(self)
+        mean = self.acc_sum / n
+        return {
+            "jerk": jerk,
+            "peak_jerk": self.peak_jerk[0][1],
+            "peak_acc": self.peak_acc[0][1],
+            "acc_variance": max(self.acc_sq_sum / n - mean ** 2, 0.0),
+            "gyro_energy": self.gyro_sum / n,
+            "model_hits": self.hit_sum,
+            "samples": n,
+        }
+
+
+class StreamingCrashDetector:
+    """
+    Per-device sliding-window crash detection in front of the classifier.
+
+    A sample is only scored by the model when it is a spike (acceleration
+    magnitude or jerk above threshold), and a crash is only reported when at
+    least `min_hits` samples in the window were classified as accidents.
+    After firing, a device is silenced for `cooldown_seconds` so one crash
+    produces one report.
+
+    Windows live in this process's memory. With several web workers, a
+    device's samples only accumulate in one window when they reach the same
+    worker, e.g. over one connection of the device WebSocket
+    (api/device_socket.py) or behind a load balancer that pins devices to
+    workers; otherwise each worker sees a share of the samples and needs
+    `min_hits` of its own.
+    """
+
+    def __init__(self, window_size=50, sample_rate=50, peak_acc_threshold=6.0,
+                 jerk_threshold=500.0, min_hits=3, cooldown_seconds=30, max_devices=10000):
+        self.window_size = window_size
+        self.sample_rate = sample_rate
+        self.peak_acc_threshold = peak_acc_threshold
+        self.jerk_threshold = jerk_threshold
+        self.min_hits = min_hits
+        self.cooldown_seconds = cooldown_seconds
+        self.max_devices = max_devices
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _window(self, device_id):
+        window = self._windows.get(device_id)
+        if window is None:
+            window = DeviceWindow(self.window_size, self.sample_rate)
+            self._windows[device_id] = window
+            # Drop the least recently active device when over capacity
+            while len(self._windows) > self.max_devices:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(device_id)
+        return window
+
+    def push(self, device_id, sample, timestamp=None):
+        """
+        sample: six values in FEATURE_NAMES order
+        Returns (detected, severity, features). severity is the model's for
+        this sample or, when a crash is detected, the highest one among the
+        window's hits.
+        """
+        with self._lock:
+            window = self._window(device_id)
+            magnitude, jerk = window.push(sample, timestamp)
+            n = window.count - 1
+
+        # Scored without the lock so other devices are not held up by the model
+        severity = "low"
+        if magnitude >= self.peak_acc_threshold or jerk >= self.jerk_threshold:
+            severities, _, _ = predict_accident_batch([sample])
+            severity = severities[0]
+
+        with self._lock:
+            if severity != "low":
+                window.mark_hit(n, severity)
+            features = window.features(jerk)
+            now = time.monotonic()
+            detected = (
+                features["model_hits"] >= self.min_hits
+                and now - window.last_fired >= self.cooldown_seconds
+            )
+            if detected:
+                window.last_fired = now
+                severity = window.severity()
+            return detected, severity, features
+
+    def reset(self, device_id):
+        with self._lock:
+            self._windows.pop(device_id, None)
+
+
+crash_detector = StreamingCrashDetector(
+    window_size=getattr(settings, "STREAMING_WINDOW_SIZE", 50),
+    sample_rate=getattr(settings, "STREAMING_SAMPLE_RATE", 50),
+    peak_acc_threshold=getattr(settings, "STREAMING_PEAK_ACC_THRESHOLD", 6.0),
+    jerk_threshold=getattr(settings, "STREAMING_JERK_THRESHOLD", 500.0),
+    min_hits=getattr(settings, "STREAMING_MIN_HITS", 3),
+    cooldown_seconds=getattr(settings, "STREAMING_COOLDOWN_SECONDS", 30),
+    max_devices=getattr(settings, "STREAMING_MAX_DEVICES", 10000),
+)
@@ -0,0 +1,335 @@
+"""
+Archive of raw sensor telemetry in columnar, time- and device-partitioned
+segments.
+
+Every sample the sensor endpoints and the device socket receive is kept,
+not only the ones that became an AccidentReport. Layout under TELEMETRY_DIR
+(hours in UTC):
+
+    date=2026-10-18/hour=15/bucket=07/<segment>/
+        timestamp.npy                   float64  arrival time, epoch seconds
+        sample_time.npy                 float64  the device's own time, NaN if not sent
+        device.npy                      S64      device id, b"" for anonymous uploads
+        latitude.npy, longitude.npy     float64
+        acc_x.npy ... gyro_z.npy        float32
+        meta.json                       rows and first/last arrival time
+
+A segment holds one flush of one process into one partition, sorted by
+arrival time. Its columns are plain .npy files written to a hidden
+directory and renamed into place, so readers never see a partial segment.
+`scan` memory-maps only the columns it needs and skips segments outside the
+requested range by their meta.json. Compaction hides the segments it merged
+before it publishes the merged one, and `scan` reads a partition completely
+before yielding any of it, starting the partition over if a segment
+vanished meanwhile, so concurrent readers never count a sample twice. Devices are spread over
+TELEMETRY_DEVICE_BUCKETS partitions by CRC32 of their id, so one device's
+range scan reads one bucket per hour.
+
+`TelemetryArchive.append` only adds to an in-memory buffer. A daemon thread
+writes it out every TELEMETRY_FLUSH_SECONDS, or sooner once
+TELEMETRY_FLUSH_ROWS samples are waiting. Beyond TELEMETRY_MAX_BUFFERED_ROWS
+(disk not keeping up) new samples are dropped and counted. Samples still
+buffered in other processes are not visible to readers yet.
+
+manage.py telemetry scans or exports a range, and compacts finished hours
+into one segment per bucket.
+"""
+import atexit
+import calendar
+import itertools
+import json
+import os
+import shutil
+import threading
+import time
+import zlib
+from collections import defaultdict
+
+import numpy as np
+from django.conf import settings
+
+from .ml_model import FEATURE_NAMES
+from .sensor_wire import SENSOR_COLUMNS
+
+TELEMETRY_RECORD = np.dtype(
+    [("timestamp", "<f8"), ("sample_time", "<f8"), ("device", "S64"),
+     ("latitude", "<f8"), ("longitude", "<f8")]
+    + [(name, "<f4") for name in FEATURE_NAMES]
+)
+COLUMNS = list(TELEMETRY_RECORD.names)
+HOUR = 3600
+
+
+def _epoch(value):
+    """Epoch seconds from a number or an aware datetime."""
+    return value.timestamp() if hasattr(value, "timestamp") else float(value)
+
+
+class TelemetryArchive:
+    def __init__(self, root, device_buckets=16, flush_rows=10_000, flush_seconds=5.0, max_buffered_rows=500_000):
+        self.root = root
+        self.device_buckets = device_buckets
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self.max_buffered_rows = max_buffered_rows
+        self._buffer = defaultdict(list)  # (hour, bucket) -> [record arrays]
+        self._buffered = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._sequence = itertools.count()
+        self.stats = defaultdict(int)
+
+    # -- writing --------------------------------------------------------------
+
+    def bucket(self, device):
+        """Partition bucket of an encoded device id."""
+        return zlib.crc32(device) % self.device_buckets if device else 0
+
+    def append(self, device_id, samples, received_at=None):
+        """
+        Buffer samples of one device (None for anonymous uploads). Each sample
+        is SENSOR_COLUMNS values, optionally followed by the device's sample time.
+        """
+        if not self.root:
+            return
+        samples = np.asarray(samples, dtype=np.float64)
+        if samples.ndim == 1:
+            samples = samples[None]
+        if not len(samples):
+            return
+        received_at = time.time() if received_at is None else received_at
+        device = str(device_id).encode()[:64] if device_id else b""
+
+        records = np.empty(len(samples), dtype=TELEMETRY_RECORD)
+        records["timestamp"] = received_at
+        records["sample_time"] = samples[:, len(SENSOR_COLUMNS)] if samples.shape[1] > len(SENSOR_COLUMNS) else np.nan
+        records["device"] = device
+        for i, name in enumerate(SENSOR_COLUMNS):
+            records[name] = samples[:, i]
+
+        key = (int(received_at // HOUR), self.bucket(device))
+        with self._lock:
+            if self._buffered + len(records) > self.max_buffered_rows:
+                self.stats["dropped"] += len(records)
+                return
+            self._buffer[key].append(records)
+            self._buffered += len(records)
+            self.stats["appended"] += len(records)
+            full = self._buffered >= self.flush_rows
+        self._ensure_flusher()
+        if full:
+            self._wakeup.set()
+
+    def _ensure_flusher(self):
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name="telemetry-flusher", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_seconds)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"❌ [BACKEND] Telemetry flush failed: {e}")
+                time.sleep(1)
+
+    def flush(self):
+        """Write everything buffered so far, one segment per partition; returns the rows written."""
+        with self._flush_lock:
+            with self._lock:
+                buffer, self._buffer = self._buffer, defaultdict(list)
+                self._buffered = 0
+            written = 0
+            t0 = time.perf_counter()
+            for (hour, bucket), chunks in buffer.items():
+                records = np.concatenate(chunks) if len(chunks) > 1 else chunks[0]
+                self.write_segment(hour, bucket, records)
+                written += len(records)
+            if written:
+                self.stats["flushed"] += written
+                self.stats["flush_ms"] += int((time.perf_counter() - t0) * 1000)
+            return written
+
+    def partition(self, hour, bucket):
+        day = time.strftime("%Y-%m-%d", time.gmtime(hour * HOUR))
+        return os.path.join(self.root, f"date={day}", f"hour={time.gmtime(hour * HOUR).tm_hour:02d}",
+                            f"bucket={bucket:02d}")
+
+    def write_segment(self, hour, bucket, records, publish=True):
+        """Write `records` as a segment; with publish=False it stays hidden until `_publish`."""
+        records = records[np.argsort(records["timestamp"], kind="stable")]
+        directory = self.partition(hour, bucket)
+        name = f"{int(records['timestamp'][0] * 1000)}-{os.getpid()}-{next(self._sequence)}"
+        staged = os.path.join(directory, f".{name}")
+        os.makedirs(staged)
+        for column in COLUMNS:
+            np.save(os.path.join(staged, f"{column}.npy"), np.ascontiguousarray(records[column]))
+        meta = {
+            "rows": len(records),
+            "first": float(records["timestamp"][0]),
+            "last": float(records["timestamp"][-1]),
+        }
+        with open(os.path.join(staged, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        return self._publish(staged) if publish else staged
+
+    def _publish(self, staged):
+        directory, name = os.path.split(staged)
+        os.rename(staged, os.path.join(directory, name[1:]))
+        self.stats["segments"] += 1
+        return os.path.join(directory, name[1:])
+
+    # -- reading --------------------------------------------------------------
+
+    def segments(self, hour, bucket):
+        directory = self.partition(hour, bucket)
+        try:
+            names = sorted(n for n in os.listdir(directory) if not n.startswith("."))
+        except FileNotFoundError:
+            return []
+        return [os.path.join(directory, n) for n in names]
+
+    def scan(self, start, end, device_id=None, columns=None):
+        """
+        Yield {column: array} chunks of the samples that arrived in
+        [start, end) (epoch seconds or datetimes), optionally of one device.
+        Chunks fully inside the range are read-only memory maps.
+        """
+        if not self.root:
+            return
+        start, end = _epoch(start), _epoch(end)
+        columns = list(columns or COLUMNS)
+        device = str(device_id).encode()[:64] if device_id else None
+        buckets = [self.bucket(device)] if device is not None else range(self.device_buckets)
+        for hour in range(int(start // HOUR), int(np.ceil(end / HOUR))):
+            for bucket in buckets:
+                yield from self._scan_partition(hour, bucket, start, end, device, columns)
+
+    def _scan_partition(self, hour, bucket, start, end, device, columns, attempts=3):
+        for attempt in range(attempts):
+            try:
+                chunks = [self._read_segment(segment, start, end, device, columns)
+                          for segment in self.segments(hour, bucket)]
+            except FileNotFoundError:
+                # Compacted meanwhile: the merged segment holds rows we may
+                # already have read, so read the partition again from scratch
+                if attempt == attempts - 1:
+                    raise
+                continue
+            return [chunk for chunk in chunks if chunk is not None]
+
+    def _read_segment(self, segment, start, end, device, columns):
+        with open(os.path.join(segment, "meta.json")) as f:
+            meta = json.load(f)
+        if meta["last"] < start or meta["first"] >= end:
+            return None
+        load = lambda column: np.load(os.path.join(segment, f"{column}.npy"), mmap_mode="r")
+        timestamps = load("timestamp")
+        # Sorted by arrival time: the range is a slice
+        rows = slice(np.searchsorted(timestamps, start, "left"), np.searchsorted(timestamps, end, "left"))
+        mask = None
+        if device is not None:
+            mask = load("device")[rows] == device
+            if not mask.any():
+                return None
+        elif rows.start == rows.stop:
+            return None
+        chunk = {}
+        for column in columns:
+            values = load(column)[rows]
+            chunk[column] = values[mask] if mask is not None else values
+        return chunk
+
+    def read(self, start, end, device_id=None, columns=None):
+        """`scan` results concatenated into one structured array, ordered by arrival time."""
+        columns = list(columns or COLUMNS)
+        chunks = list(self.scan(start, end, device_id, columns))
+        records = np.empty(sum(len(c[columns[0]]) for c in chunks),
+                           dtype=[(name, TELEMETRY_RECORD[name]) for name in columns])
+        offset = 0
+        for chunk in chunks:
+            n = len(chunk[columns[0]])
+            for column in columns:
+                records[column][offset:offset + n] = chunk[column]
+            offset += n
+        if "timestamp" in columns:
+            records = records[np.argsort(records["timestamp"], kind="stable")]
+        return records
+
+    # -- maintenance ----------------------------------------------------------
+
+    def hours(self):
+        """Partition hours present on disk, oldest first."""
+        found = []
+        if not self.root or not os.path.isdir(self.root):
+            return found
+        for day in sorted(os.listdir(self.root)):
+            if not day.startswith("date="):
+                continue
+            for hour in sorted(os.listdir(os.path.join(self.root, day))):
+                if hour.startswith("hour="):
+                    stamp = time.strptime(f"{day[5:]} {hour[5:]}", "%Y-%m-%d %H")
+                    found.append(calendar.timegm(stamp) // HOUR)
+        return found
+
+    def compact(self, before):
+        """
+        Merge the segments of each bucket of every hour that ended before
+        `before` into one. Returns (partitions compacted, segments removed).
+        """
+        last_hour = int(_epoch(before) // HOUR)
+        partitions = removed = 0
+        for hour in self.hours():
+            if hour >= last_hour:
+                break
+            for bucket in range(self.device_buckets):
+                segments = self.segments(hour, bucket)
+                if len(segments) < 2:
+                    continue
+                parts = []
+                for segment in segments:
+                    loaded = {c: np.load(os.path.join(segment, f"{c}.npy")) for c in COLUMNS}
+                    part = np.empty(len(loaded["timestamp"]), dtype=TELEMETRY_RECORD)
+                    for column, values in loaded.items():
+                        part[column] = values
+                    parts.append(part)
+                merged = self.write_segment(hour, bucket, np.concatenate(parts), publish=False)
+                # Hide the old segments before the merged one appears, so no
+                # listing shows the same rows twice
+                hidden = []
+                try:
+                    for segment in segments:
+                        directory, name = os.path.split(segment)
+                        os.rename(segment, os.path.join(directory, f".old-{name}"))
+                        hidden.append(segment)
+                except FileNotFoundError:
+                    # Another compaction got to this partition first
+                    for segment in hidden:
+                        directory, name = os.path.split(segment)
+                        os.rename(os.path.join(directory, f".old-{name}"), segment)
+                    shutil.rmtree(merged)
+                    continue
+                self._publish(merged)
+                for segment in segments:
+                    directory, name = os.path.split(segment)
+                    shutil.rmtree(os.path.join(directory, f".old-{name}"))
+                partitions += 1
+                removed += len(segments)
+        return partitions, removed
+
+
+telemetry_archive = TelemetryArchive(
+    root=getattr(settings, "TELEMETRY_DIR", None),
+    device_buckets=getattr(settings, "TELEMETRY_DEVICE_BUCKETS", 16),
+    flush_rows=getattr(settings, "TELEMETRY_FLUSH_ROWS", 10_000),
+    flush_seconds=getattr(settings, "TELEMETRY_FLUSH_SECONDS", 5.0),
+    max_buffered_rows=getattr(settings, "TELEMETRY_MAX_BUFFERED_ROWS", 500_000),
+)
@@ -1,3 +1,1202 @@
-from django.test import TestCase
+import asyncio
+import contextlib
+import datetime
+import gzip
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
 
-# Create your tests here.
+import joblib
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from . import geo, querysets, rollups, sensor_wire
+from .clustering import claim_fanout
+from .device_socket import telemetry_socket
+from .expiry import expire_ble_alerts, prune_ble_alerts
+from .forest_engine import ARRAY_NAMES, CompiledForest, export_forest
+from .inference_cache import InferenceCache
+from .inference_server import InferenceClient, InferenceServer
+from .keywords import DEFAULT_LEXICON, KeywordMatcher, VoiceAnalysis, _normalize, build_matcher, keyword_matcher
+from .lazy import Lazy, _registry, warm_up
+from .live_grid import LiveIncident, LiveIncidentGrid, LiveIncidents
+from .management.commands.explain_queries import Command as ExplainQueriesCommand
+from .ml_model import (FEATURE_NAMES, FOREST_PATH, MODEL_PATH, accident_probabilities, classify,
+                       fit_severity_thresholds, worth_notifying)
+from .model_registry import ModelVersion
+from .models import AccidentReport, AlertRollup, BLEAlert, CloudAlert, IncidentNotification, OutboxEvent, User, VoiceJob
+from .outbox import ACCIDENT_REPORT_CREATED, BLE_ALERT_CREATED, _handlers, claim_batch, process_batch, report_payload
+from .pagination import encode_cursor
+from .push_delivery import PushDeliveryEngine, _stale_pending_ids, _write_results, claim_pending
+from .row_serializers import ACCIDENT_REPORT_ROWS, BLE_ALERT_ROWS, CLOUD_ALERT_ROWS
+from .serializers import AccidentReportSerializer, BLEAlertSerializer, CloudAlertSerializer
+from .statistics import ble_alert_statistics, cloud_alert_statistics
+from .streaming import StreamingCrashDetector
+from .telemetry import HOUR, TELEMETRY_RECORD, TelemetryArchive
+from .training import generate_dataset, load_dataset, save_artifacts, train
+from .voice_pipeline import VoicePipeline
+
+SENSOR_READING = {"latitude": 17.3850, "longitude": 78.4867, "acc_x": 1.0, "acc_y": 2.0, "acc_z": 9.8,
+                  "gyro_x": 0.5, "gyro_y": 0.5, "gyro_z": 0.5}
+# ~11 m north of SENSOR_READING
+NEARBY = {"latitude": 17.3851, "longitude": 78.4867}
+
+
+class APITestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        # Keep raw samples out of TELEMETRY_DIR
+        patcher = mock.patch("api.views.telemetry_archive")
+        self.telemetry = patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class IncidentFanoutTests(APITestCase):
+    def topics(self):
+        return list(OutboxEvent.objects.values_list("topic", flat=True))
+
+    def test_unpublished_low_report_does_not_silence_nearby_crash(self):
+        with mock.patch("api.views.predict_accident", side_effect=[("low", 0.9), ("high", 0.95)]):
+            low = self.client.post("/api/accidents/sensor/", SENSOR_READING, format="json").json()["report"]
+            high = self.client.post("/api/accidents/sensor/", {**SENSOR_READING, **NEARBY},
+                                    format="json").json()["report"]
+
+        self.assertEqual(low["cluster_id"], high["cluster_id"])
+        events = OutboxEvent.objects.filter(topic=ACCIDENT_REPORT_CREATED)
+        self.assertEqual([e.payload["id"] for e in events], [high["id"]])
+
+    def test_duplicate_crash_reports_fan_out_once(self):
+        with mock.patch("api.views.predict_accident", return_value=("high", 0.95)):
+            first = self.client.post("/api/accidents/sensor/", SENSOR_READING, format="json").json()["report"]
+            self.client.post("/api/accidents/sensor/", {**SENSOR_READING, **NEARBY}, format="json")
+
+        self.assertEqual(AccidentReport.objects.count(), 2)
+        events = OutboxEvent.objects.filter(topic=ACCIDENT_REPORT_CREATED)
+        self.assertEqual([e.payload["id"] for e in events], [first["id"]])
+
+    def test_ble_alert_does_not_silence_emergency_report(self):
+        self.client.post("/api/accidents/ble-alert/", {**NEARBY, "severity": "high"}, format="json")
+        response = self.client.post("/api/accidents/emergency/notify/", {**SENSOR_READING, "severity": "high"},
+                                    format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertCountEqual(self.topics(), [BLE_ALERT_CREATED, ACCIDENT_REPORT_CREATED])
+
+    def test_claim_is_unique_per_incident_and_topic(self):
+        report = AccidentReport.objects.create(severity="high", **NEARBY)
+        self.assertTrue(claim_fanout(report, ACCIDENT_REPORT_CREATED))
+        self.assertFalse(claim_fanout(report, ACCIDENT_REPORT_CREATED))
+        self.assertTrue(claim_fanout(report, BLE_ALERT_CREATED))
+        self.assertEqual(IncidentNotification.objects.count(), 2)
+
+
+class SensorInputTests(APITestCase):
+    def post_binary(self, url, body):
+        return self.client.post(url, body, content_type="application/octet-stream")
+
+    def test_json_sample_requires_position_and_axes(self):
+        for body in ({}, {k: v for k, v in SENSOR_READING.items() if k.startswith(("acc", "gyro"))},
+                     {k: v for k, v in SENSOR_READING.items() if k != "gyro_z"}):
+            response = self.client.post("/api/accidents/sensor/", body, format="json")
+            self.assertEqual(response.status_code, 400, body)
+        self.assertFalse(AccidentReport.objects.exists())
+
+    def test_json_sample_rejects_non_finite_values(self):
+        for value in ("nan", "inf", "-inf", "abc"):
+            response = self.client.post("/api/accidents/sensor/", {**SENSOR_READING, "acc_x": value}, format="json")
+            self.assertEqual(response.status_code, 400, value)
+        self.assertFalse(AccidentReport.objects.exists())
+
+    def test_binary_sample_matches_json(self):
+        row = [SENSOR_READING[name] for name in sensor_wire.SENSOR_COLUMNS]
+        with mock.patch("api.views.predict_accident", return_value=("high", 0.9)) as predict:
+            response = self.post_binary("/api/accidents/sensor/", sensor_wire.encode_records(row))
+        self.assertEqual(response.status_code, 200)
+        report = AccidentReport.objects.get()
+        self.assertAlmostEqual(report.latitude, SENSOR_READING["latitude"], places=4)
+        self.assertAlmostEqual(report.acc_z, SENSOR_READING["acc_z"], places=5)
+        self.assertAlmostEqual(predict.call_args[0][0]["acc_z"], SENSOR_READING["acc_z"], places=5)
+
+    def test_binary_sample_rejects_bad_bodies(self):
+        row = [SENSOR_READING[name] for name in sensor_wire.SENSOR_COLUMNS]
+        nan_latitude = [float("nan")] + row[1:]
+        for body in (b"", b"x" * 41, sensor_wire.encode_records(nan_latitude),
+                     sensor_wire.encode_records(row, [float("inf")]),
+                     sensor_wire.encode_records([row, row])):  # several samples need a device_id
+            response = self.post_binary("/api/accidents/sensor/", body)
+            self.assertEqual(response.status_code, 400)
+        self.assertFalse(AccidentReport.objects.exists())
+
+    def test_batch_rejects_missing_and_non_finite_values(self):
+        partial = {k: v for k, v in SENSOR_READING.items() if k != "latitude"}
+        for readings in ([partial], [SENSOR_READING, {**SENSOR_READING, "gyro_x": "nan"}]):
+            response = self.client.post("/api/accidents/sensor/batch/", {"readings": readings}, format="json")
+            self.assertEqual(response.status_code, 400)
+        body = np.array([[float("nan")] + [1.0] * 7], dtype="<f4").tobytes()
+        self.assertEqual(self.post_binary("/api/accidents/sensor/batch/", body).status_code, 400)
+        self.assertFalse(AccidentReport.objects.exists())
+
+    def test_batch_scores_valid_readings(self):
+        response = self.client.post("/api/accidents/sensor/batch/", {"readings": [SENSOR_READING] * 3},
+                                    format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["severities"]), 3)
+
+
+class SeverityGradingTests(TestCase):
+    THRESHOLDS = {"medium": 0.42, "high": 0.5}
+
+    def test_grades_by_thresholds(self):
+        severities, _ = classify([0.1, 0.43, 0.5, 0.51, 0.99], self.THRESHOLDS)
+        self.assertEqual(list(severities), ["low", "medium", "medium", "high", "high"])
+
+    def test_confidence_increases_with_severity_below_half(self):
+        severities, confidences = classify([0.43, 0.5, 0.51], self.THRESHOLDS)
+        self.assertEqual(list(severities), ["medium", "medium", "high"])
+        self.assertTrue(np.all(np.diff(confidences) > 0), confidences)
+
+    def test_low_confidence_is_probability_of_no_accident(self):
+        _, confidences = classify([0.05, 0.3], self.THRESHOLDS)
+        np.testing.assert_allclose(confidences, [0.95, 0.7])
+
+    def test_fanout_gate_keeps_high_over_weak_medium(self):
+        (medium, high), (medium_conf, high_conf) = classify([0.43, 0.51], self.THRESHOLDS)
+        with self.settings(ML_FANOUT_MIN_CONFIDENCE=0.5):
+            self.assertFalse(worth_notifying(medium, medium_conf))
+            self.assertTrue(worth_notifying(high, high_conf))
+        self.assertFalse(worth_notifying("low", 0.99))
+
+    def test_fitted_thresholds_are_ordered(self):
+        rng = np.random.default_rng(0)
+        labels = rng.random(5000) < 0.1
+        probabilities = np.clip(labels * 0.7 + rng.normal(0.15, 0.1, 5000), 0, 1)
+        thresholds = fit_severity_thresholds(labels, probabilities)
+        self.assertLessEqual(thresholds["medium"], thresholds["high"])
+        self.assertGreaterEqual(thresholds["high"], 0.5)
+
+
+class CompiledForestTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.model = joblib.load(MODEL_PATH)
+        cls.forest = CompiledForest.load(FOREST_PATH)
+
+    def rows(self):
+        rng = np.random.default_rng(0)
+        random = rng.normal(0, 5, (2000, len(FEATURE_NAMES)))
+        # Rows sitting exactly on split thresholds exercise the <= branch
+        splits = np.flatnonzero(self.forest.left != np.arange(len(self.forest.left)))[:len(random)]
+        on_split = random[:len(splits)].copy()
+        on_split[np.arange(len(splits)), self.forest.feature[splits]] = self.forest.threshold[splits]
+        return pd.DataFrame(np.vstack([random, on_split]), columns=FEATURE_NAMES)
+
+    def test_predict_proba_matches_pickle(self):
+        rows = self.rows()
+        np.testing.assert_array_equal(self.forest.predict_proba(rows), self.model.predict_proba(rows))
+        np.testing.assert_array_equal(self.forest.predict(rows), self.model.predict(rows))
+        np.testing.assert_array_equal(self.forest.classes_, self.model.classes_)
+
+    def test_fresh_export_matches_pickle(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        export_forest(self.model, directory)
+        rows = self.rows()
+        for mmap in (True, False):
+            forest = CompiledForest.load(directory, mmap=mmap)
+            np.testing.assert_array_equal(forest.predict_proba(rows), self.model.predict_proba(rows))
+
+
+class TrainingDeterminismTests(TestCase):
+    def dataset(self, seed, **kwargs):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        generate_dataset(directory, 6000, seed=seed, chunk_rows=2500, **kwargs)
+        features, labels, _ = load_dataset(directory)
+        return directory, features, labels
+
+    def test_same_seed_gives_the_same_dataset(self):
+        _, features, labels = self.dataset(7)
+        _, same_features, same_labels = self.dataset(7)
+        _, other_features, _ = self.dataset(8)
+        np.testing.assert_array_equal(features, same_features)
+        np.testing.assert_array_equal(labels, same_labels)
+        self.assertFalse(np.array_equal(features, other_features))
+        self.assertTrue(0 < labels.sum() < len(labels))
+
+    def test_same_seed_gives_the_same_model(self):
+        _, features, labels = self.dataset(7)
+        runs = [train(features, labels, seed=3, n_estimators=8, max_depth=6, n_jobs=n_jobs) for n_jobs in (1, 2)]
+        (model, metadata), (same_model, same_metadata) = runs
+        # Fitting threads change neither the forest nor anything but timings in the metadata
+        for run in (metadata, same_metadata):
+            for timing in ("training_seconds", "test_scoring_seconds"):
+                run.pop(timing)
+            run["params"].pop("n_jobs")
+        self.assertEqual(metadata, same_metadata)
+        # Threaded predict_proba may sum the trees in a different order
+        np.testing.assert_allclose(model.predict_proba(features), same_model.predict_proba(features), atol=1e-12)
+
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        exported = [save_artifacts(m, dict(meta), root, version) for (m, meta), version in zip(runs, ("a", "b"))]
+        for name in ARRAY_NAMES:
+            np.testing.assert_array_equal(*(np.load(os.path.join(d, "forest", f"{name}.npy")) for d in exported))
+
+
+class ForestExportTests(TestCase):
+    def export(self, **kwargs):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        shutil.copy(os.path.join(FOREST_PATH, "meta.json"), directory)
+        call_command("export_forest", output=directory, stdout=io.StringIO(), **kwargs)
+        with open(os.path.join(directory, "meta.json")) as f:
+            return json.load(f), ModelVersion.bundled(directory, MODEL_PATH)
+
+    def test_reexport_keeps_bundled_thresholds(self):
+        bundled = ModelVersion.bundled(FOREST_PATH, MODEL_PATH).thresholds
+        self.assertEqual(set(bundled), {"medium", "high"})
+        meta, version = self.export()
+        self.assertEqual(meta["severity_thresholds"], bundled)
+        self.assertEqual(version.thresholds, bundled)
+
+    def test_explicit_thresholds_win(self):
+        meta, version = self.export(medium=0.3, high=0.6)
+        self.assertEqual(meta["severity_thresholds"], {"medium": 0.3, "high": 0.6})
+        self.assertEqual(version.thresholds, meta["severity_thresholds"])
+
+
+class KeywordMatcherTests(TestCase):
+    def test_terms_match_whole_words_only(self):
+        self.assertEqual(keyword_matcher.find("A white car hit a hitman"), ["hit"])
+        self.assertEqual(keyword_matcher.find("a white car, a helpful hitchhiker"), [])
+        self.assertEqual(keyword_matcher.find("hit-and-run on Main St"), ["hit"])
+
+    def test_phrases_tolerate_case_and_spacing(self):
+        self.assertEqual(keyword_matcher.find("Please CALL   Ambulance\nnow, ambulance!"),
+                         ["call ambulance", "ambulance"])
+        self.assertEqual(keyword_matcher.find("he is NOT breathing"), ["not breathing"])
+
+    def test_severity_mapping(self):
+        self.assertEqual(keyword_matcher.analyze("it hurts").severity, None)  # "hurts" is not "hurt"
+        self.assertEqual(keyword_matcher.analyze("pain").severity, "low")
+        self.assertEqual(keyword_matcher.analyze("hit-and-run").severity, "low")
+        self.assertEqual(keyword_matcher.analyze("take me to the hospital").severity, "medium")
+        # 1 - (1 - 0.4) * (1 - 0.3) = 0.58: weak terms add up
+        self.assertEqual(keyword_matcher.analyze("hit, pain").score, 0.58)
+        self.assertEqual(keyword_matcher.analyze("hit, pain").severity, "medium")
+        self.assertEqual(keyword_matcher.analyze("crash crash crash").score, 0.8)
+        self.assertEqual(keyword_matcher.analyze("crash crash crash").severity, "high")
+        self.assertEqual(keyword_matcher.analyze("bleeding, help"), VoiceAnalysis(["bleeding", "help"], 0.93, "high"))
+        self.assertEqual(keyword_matcher.analyze(None), VoiceAnalysis([], 0.0, None))
+
+    def test_trie_matches_like_a_plain_alternation(self):
+        terms = sorted(map(_normalize, DEFAULT_LEXICON), key=len, reverse=True)
+        plain = re.compile(r"\b(?:" + "|".join(re.escape(t).replace(r"\ ", r"\s+") for t in terms) + r")\b")
+        rng = np.random.default_rng(0)
+        words = [w for t in terms for w in t.split()] + ["white", "helpful", "car", "a", "hitting", "call"]
+        for _ in range(200):
+            text = " ".join(rng.choice(words, 12))
+            self.assertEqual(keyword_matcher.pattern.findall(text), plain.findall(text), text)
+
+    def test_rejects_bad_lexicons(self):
+        for lexicon in ({}, ["crash"], {"crash": 0}, {"crash": 1.5}, {"crash": "0.8"}, {"crash": True},
+                        {"crash": float("nan")}, {"": 0.5}, {"!!": 0.5}, {"crash": 0.8, "CRASH": 0.5}):
+            with self.subTest(lexicon=lexicon), self.assertRaises(ValueError):
+                KeywordMatcher(lexicon)
+        for high, medium in ((0.5, 0.8), (0.8, 0), (1.5, 0.5), (float("nan"), 0.5)):
+            with self.subTest(high=high, medium=medium), self.assertRaises(ValueError):
+                KeywordMatcher(DEFAULT_LEXICON, high=high, medium=medium)
+        self.assertEqual(KeywordMatcher({"Crash": 0.8, "crash": 0.8}).weights, {"crash": 0.8})
+
+    def test_bad_keywords_file_fails_at_startup(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, "keywords.json")
+        for content in ('{"crash": 2}', '{"crash": 0.8', '["crash"]'):
+            with open(path, "w") as f:
+                f.write(content)
+            with self.subTest(content=content), self.settings(VOICE_KEYWORDS_FILE=path), \
+                    self.assertRaisesRegex(ImproperlyConfigured, "keywords.json"):
+                build_matcher()
+        with self.settings(VOICE_KEYWORDS_FILE=os.path.join(directory, "missing.json")), \
+                self.assertRaises(ImproperlyConfigured):
+            build_matcher()
+        with open(path, "w") as f:
+            json.dump({"pile up": 0.9}, f)
+        with self.settings(VOICE_KEYWORDS_FILE=path, VOICE_SEVERITY_HIGH=0.9):
+            self.assertEqual(build_matcher().analyze("a pile  up ahead").severity, "high")
+        with self.settings(VOICE_SEVERITY_MEDIUM=0.9, VOICE_SEVERITY_HIGH=0.8), \
+                self.assertRaisesRegex(ImproperlyConfigured, "built-in lexicon"):
+            build_matcher()
+
+    def test_voice_text_endpoint(self):
+        client = APIClient()
+        response = client.post("/api/accidents/voice/", {"voice_text": "White car, no one hurt?", "latitude": 17.4,
+                                                          "longitude": 78.5}, format="json")
+        self.assertEqual(response.json()["matched_keywords"], ["hurt"])
+        self.assertEqual(response.json()["report"]["severity"], "medium")
+        response = client.post("/api/accidents/voice/", {"voice_text": "a white car"}, format="json")
+        self.assertFalse(response.json()["status"])
+
+
+class VoiceJobTests(APITestCase):
+    def upload(self, name="clip.wav"):
+        return self.client.post("/api/accidents/voice/audio/", {"audio": SimpleUploadedFile(name, b"RIFF" + b"\0" * 40),
+                                                               **NEARBY}, format="multipart")
+
+    def test_upload_is_refused_when_recognizer_is_unavailable(self):
+        with mock.patch("api.views.voice_pipeline") as pipeline:
+            pipeline.problem.return_value = "pocketsphinx is not installed"
+            response = self.upload()
+        self.assertEqual(response.status_code, 503)
+        self.assertIn("pocketsphinx", response.json()["message"])
+        self.assertFalse(VoiceJob.objects.exists())
+
+    def test_compressed_clip_without_ffmpeg_is_refused(self):
+        with mock.patch("api.views.voice_pipeline") as pipeline, \
+                mock.patch("api.transcription.shutil.which", return_value=None):
+            pipeline.problem.return_value = None
+            response = self.upload("clip.m4a")
+        self.assertEqual(response.status_code, 415)
+        self.assertFalse(VoiceJob.objects.exists())
+
+    def test_abandoned_jobs_are_resumed_once(self):
+        expired = timezone.now() - timezone.timedelta(seconds=1)
+        abandoned = VoiceJob.objects.create(audio=b"clip", audio_format="wav", locked_by="gone", locked_until=expired)
+        VoiceJob.objects.create(audio=b"clip", locked_by="alive",
+                                locked_until=timezone.now() + timezone.timedelta(seconds=60))
+        VoiceJob.objects.create(status="done", locked_until=expired)
+
+        pipeline = VoicePipeline(lease_seconds=60)
+        with mock.patch.object(pipeline, "submit") as submit:
+            self.assertEqual(pipeline.resume_abandoned(), 1)
+            submit.assert_called_once_with(abandoned.id, b"clip", "wav")
+            # Now leased to this worker, so a second pass leaves it alone
+            self.assertEqual(pipeline.resume_abandoned(), 0)
+        abandoned.refresh_from_db()
+        self.assertEqual(abandoned.locked_by, pipeline.worker_id)
+        self.assertGreater(abandoned.locked_until, timezone.now())
+
+
+class PushDeliveryTests(TestCase):
+    def test_start_raises_when_client_cannot_be_created(self):
+        engine = PushDeliveryEngine(client_factory=mock.Mock(side_effect=OSError("no credentials")))
+        with self.assertRaisesRegex(RuntimeError, "no credentials"):
+            engine.enqueue(["id"])
+
+    def test_pending_alert_is_leased_to_one_engine(self):
+        alert = CloudAlert.objects.create(device_token="token", status="pending",
+                                          timestamp=timezone.now() - timezone.timedelta(minutes=5))
+        self.assertEqual([a["id"] for a in claim_pending("a", [alert.id])], [alert.id])
+        self.assertEqual(claim_pending("b", [alert.id]), [])
+        self.assertEqual(_stale_pending_ids(60), [])
+
+        _write_results("b", [alert.id], {})  # lost the claim: no effect
+        alert.refresh_from_db()
+        self.assertEqual(alert.status, "pending")
+        _write_results("a", [alert.id], {})
+        alert.refresh_from_db()
+        self.assertEqual(alert.status, "delivered")
+
+    def test_expired_lease_is_swept_up(self):
+        alert = CloudAlert.objects.create(device_token="token", status="pending", locked_by="gone",
+                                          locked_until=timezone.now() - timezone.timedelta(seconds=1),
+                                          timestamp=timezone.now() - timezone.timedelta(minutes=5))
+        self.assertEqual(_stale_pending_ids(60), [alert.id])
+        self.assertEqual(len(claim_pending("b", [alert.id])), 1)
+
+
+class InferenceCacheTests(TestCase):
+    ROWS = np.array([[0.5, 0.5, 9.8, 2.0, 2.0, 2.0]])
+
+    def version(self, name):
+        return mock.Mock(version=name, metadata={})
+
+    def test_results_are_cached_per_version(self):
+        cache = InferenceCache(prefilter=False)
+        score = mock.Mock(return_value=(np.array([0.3]), "v1"))
+        cache.probabilities(self.ROWS, self.version("v1"), score)
+        cache.probabilities(self.ROWS, self.version("v1"), score)
+        self.assertEqual(score.call_count, 1)
+
+        score.return_value = (np.array([0.9]), "v2")
+        np.testing.assert_allclose(cache.probabilities(self.ROWS, self.version("v2"), score), [0.9])
+        self.assertEqual(score.call_count, 2)
+
+    def test_results_of_another_version_are_not_cached(self):
+        cache = InferenceCache(prefilter=False)
+        # The sidecar has not picked up v2 yet
+        score = mock.Mock(return_value=(np.array([0.3]), "v1"))
+        cache.probabilities(self.ROWS, self.version("v2"), score)
+        score.return_value = (np.array([0.9]), "v2")
+        np.testing.assert_allclose(cache.probabilities(self.ROWS, self.version("v2"), score), [0.9])
+        self.assertEqual(cache.report()["stale_results"], 1)
+
+    def test_request_finishing_after_version_change_does_not_insert(self):
+        cache = InferenceCache(prefilter=False)
+
+        def score_during_switch(rows):
+            cache.probabilities(self.ROWS, self.version("v2"), lambda rows: (np.array([0.9]), "v2"))
+            return np.array([0.3]), "v1"
+
+        cache.probabilities(self.ROWS, self.version("v1"), score_during_switch)
+        score = mock.Mock()
+        np.testing.assert_allclose(cache.probabilities(self.ROWS, self.version("v2"), score), [0.9])
+        score.assert_not_called()
+
+    def test_distant_rows_never_share_a_bucket(self):
+        cache = InferenceCache(prefilter=False)
+        # Bucket indices of +-2**31 would wrap onto each other in int32
+        rows = np.zeros((2, 6))
+        rows[:, 0] = [2 ** 31 * 0.05, -2 ** 31 * 0.05]
+        score = mock.Mock(side_effect=lambda r: (np.arange(len(r)) / 10, "v1"))
+        np.testing.assert_allclose(cache.probabilities(rows, self.version("v1"), score), [0.0, 0.1])
+        np.testing.assert_allclose(cache.probabilities(rows, self.version("v1"), score), [0.0, 0.1])
+        self.assertEqual(score.call_count, 1)
+
+    def test_rows_out_of_bucket_range_are_scored_but_not_cached(self):
+        cache = InferenceCache(prefilter=False)
+        rows = np.array([[1e300, 0, 0, 0, 0, 0], [np.inf, 0, 0, 0, 0, 0], [np.nan, 0, 0, 0, 0, 0],
+                         [0.5, 0.5, 9.8, 2.0, 2.0, 2.0]])
+        score = mock.Mock(side_effect=lambda r: (np.full(len(r), 0.5), "v1"))
+        cache.probabilities(rows, self.version("v1"), score)
+        cache.probabilities(rows, self.version("v1"), score)
+        self.assertEqual([len(call.args[0]) for call in score.call_args_list], [4, 3])
+        self.assertEqual(cache.report()["entries"], 1)
+
+
+class ModelStatusTests(APITestCase):
+    def test_requires_staff(self):
+        self.assertIn(self.client.get("/api/accidents/model/").status_code, (401, 403))
+        self.client.force_authenticate(User.objects.create_user("driver", password="x", phone_number="100"))
+        self.assertEqual(self.client.get("/api/accidents/model/").status_code, 403)
+        self.client.force_authenticate(User.objects.create_user("ops", password="x", phone_number="101", is_staff=True))
+        self.assertEqual(self.client.get("/api/accidents/model/").status_code, 200)
+
+    def test_shadow_latency_is_the_active_model_call_only(self):
+        rows = InferenceCacheTests.ROWS
+        cache = InferenceCache(prefilter=False)
+        scorer = mock.Mock()
+        with mock.patch("api.ml_model.inference_cache", mock.Mock(get=lambda: cache)), \
+                mock.patch("api.ml_model.shadow_scorer", mock.Mock(get=lambda: scorer)), \
+                mock.patch("api.ml_model.model_registry") as registry, \
+                mock.patch("api.ml_model._score", return_value=(np.array([0.3]), "v1")):
+            registry.get().active.return_value = mock.Mock(version="v1", metadata={})
+            accident_probabilities(rows)
+            accident_probabilities(rows)  # answered by the cache
+        first, cached = scorer.submit.call_args_list
+        self.assertIsNotNone(first.args[2])
+        self.assertIsNone(cached.args[2])
+
+
+class LazyInitTests(TestCase):
+    def test_nothing_loads_at_import(self):
+        script = (
+            "import json, sys, django; django.setup()\n"
+            "import accident_detection.urls, accident_detection.asgi, api.views, api.ml_model, api.utils\n"
+            "from api.lazy import _registry\n"
+            "loaded = [name for name, resource in _registry.items() if resource.loaded]\n"
+            "heavy = [m for m in ('firebase_admin', 'pyfcm', 'sklearn', 'joblib') if m in sys.modules]\n"
+            "print(json.dumps([loaded, heavy]))\n"
+        )
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": "accident_detection.settings"}
+        output = subprocess.run([sys.executable, "-c", script], env=env, cwd=settings.BASE_DIR,
+                                capture_output=True, text=True, check=True).stdout
+        self.assertEqual(json.loads(output.splitlines()[-1]), [[], []])
+
+    def test_loader_runs_once_across_threads(self):
+        loader = mock.Mock(side_effect=lambda: time.sleep(0.05) or object())
+        resource = Lazy("test_resource", loader)
+        self.addCleanup(_registry.pop, "test_resource")
+        with ThreadPoolExecutor(8) as pool:
+            values = list(pool.map(lambda _: resource.get(), range(8)))
+        loader.assert_called_once()
+        self.assertTrue(all(value is values[0] for value in values))
+        self.assertIsNotNone(resource.load_seconds)
+
+    def test_warm_up_reports_failures_without_raising(self):
+        Lazy("test_ok", lambda: 1)
+        Lazy("test_broken", mock.Mock(side_effect=OSError("missing credentials")))
+        self.addCleanup(_registry.pop, "test_ok")
+        self.addCleanup(_registry.pop, "test_broken")
+        timings = warm_up("test_ok", "test_broken")
+        self.assertIsNotNone(timings["test_ok"])
+        self.assertIsNone(timings["test_broken"])
+        self.assertFalse(_registry["test_broken"].loaded)
+
+
+class InferenceSidecarTests(TestCase):
+    def start_server(self, score, **kwargs):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        server = InferenceServer(os.path.join(directory, "inference.sock"), score, **kwargs)
+        loop = asyncio.new_event_loop()
+        main = loop.create_task(server._main())
+
+        def run():
+            with contextlib.suppress(asyncio.CancelledError):
+                loop.run_until_complete(main)
+            loop.close()
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        self.addCleanup(loop.call_soon_threadsafe, main.cancel)
+        while not os.path.exists(server.path):
+            time.sleep(0.01)
+        return server
+
+    def test_concurrent_requests_are_scored_as_one_batch(self):
+        batches = []
+
+        def score(features):
+            batches.append(len(features))
+            return features.sum(axis=1), "v-test"
+
+        server = self.start_server(score, max_batch=64, max_wait_ms=1000)
+        client = InferenceClient(server.path, timeout=5)
+        n_workers = 8
+        ready = threading.Barrier(n_workers)
+
+        def worker(i):
+            client._socket()
+            while server._open < n_workers:
+                time.sleep(0.005)
+            ready.wait()
+            rows = np.full((i + 1, len(FEATURE_NAMES)), float(i))
+            try:
+                return client.predict_proba(rows)
+            finally:
+                client.close()
+
+        with ThreadPoolExecutor(n_workers) as pool:
+            results = list(pool.map(worker, range(n_workers)))
+        for i, (probabilities, version) in enumerate(results):
+            np.testing.assert_array_equal(probabilities, np.full(i + 1, i * len(FEATURE_NAMES)))
+            self.assertEqual(version, "v-test")
+        self.assertEqual(batches, [sum(range(1, n_workers + 1))])
+        self.assertEqual((server.stats["batches"], server.stats["requests"]), (1, n_workers))
+
+    def test_batch_closes_at_max_batch_rows(self):
+        batches = []
+        server = self.start_server(lambda f: (batches.append(len(f)) or np.zeros(len(f)), "v"),
+                                   max_batch=4, max_wait_ms=1000)
+        client = InferenceClient(server.path, timeout=5)
+        probabilities, _ = client.predict_proba(np.zeros((4, len(FEATURE_NAMES))))
+        client.close()
+        self.assertEqual(len(probabilities), 4)
+        self.assertEqual(batches, [4])
+
+    def test_scoring_error_closes_the_connection(self):
+        server = self.start_server(mock.Mock(side_effect=RuntimeError("model missing")))
+        client = InferenceClient(server.path, timeout=5)
+        with self.assertRaises(OSError):
+            client.predict_proba(np.zeros((1, len(FEATURE_NAMES))))
+        self.assertFalse(client.available())
+        self.assertEqual(server.stats["errors"], 1)
+
+    def test_falls_back_to_in_process_scoring(self):
+        client = InferenceClient(os.path.join(tempfile.gettempdir(), "no-such-sidecar.sock"))
+        rows = np.zeros((2, len(FEATURE_NAMES)))
+        local = mock.Mock(return_value=(np.array([0.1, 0.2]), "local"))
+        with mock.patch("api.ml_model.inference_client", mock.Mock(get=lambda: client)), \
+                mock.patch("api.ml_model.inference_cache", mock.Mock(get=lambda: None)), \
+                mock.patch("api.ml_model.shadow_scorer"), \
+                mock.patch("api.ml_model.versioned_accident_probabilities", local), \
+                mock.patch.object(client, "_socket", wraps=client._socket) as connect:
+            np.testing.assert_array_equal(accident_probabilities(rows), [0.1, 0.2])
+            # Marked down: the next call goes straight to the local model
+            np.testing.assert_array_equal(accident_probabilities(rows), [0.1, 0.2])
+        self.assertEqual(connect.call_count, 1)
+        self.assertEqual(local.call_count, 2)
+
+
+class TelemetryArchiveTests(TestCase):
+    START = 1_790_000_000.0  # an hour boundary plus 800 s
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.archive = TelemetryArchive(directory.name, device_buckets=4)
+        for i in range(6):
+            # Three flushes of two devices, ten samples a second
+            for device in ("phone-a", "phone-b"):
+                self.archive.append(device, [list(SENSOR_READING.values())] * 10, self.START + i)
+            self.archive.flush()
+
+    def test_range_scan_of_one_device(self):
+        samples = self.archive.read(self.START + 1, self.START + 3, "phone-a")
+        self.assertEqual(len(samples), 20)
+        self.assertEqual(set(samples["device"]), {b"phone-a"})
+        self.assertEqual(len(self.archive.read(self.START, self.START + 6)), 120)
+
+    def test_compaction_keeps_every_sample_once(self):
+        self.archive.compact(self.START + 2 * HOUR)
+        hour = int(self.START // HOUR)
+        self.assertEqual(len(self.archive.segments(hour, self.archive.bucket(b"phone-a"))), 1)
+        self.assertEqual(len(self.archive.read(self.START, self.START + 6)), 120)
+
+    def test_scan_during_compaction_does_not_double_count(self):
+        read_segment = self.archive._read_segment
+        calls = []
+
+        def compact_after_first_read(*args):
+            chunk = read_segment(*args)
+            if not calls:
+                calls.append(self.archive.compact(self.START + 2 * HOUR))
+            return chunk
+
+        with mock.patch.object(self.archive, "_read_segment", side_effect=compact_after_first_read):
+            samples = self.archive.read(self.START, self.START + 6, "phone-a")
+        self.assertTrue(calls[0][0])  # partitions compacted
+        self.assertEqual(len(samples), 60)
+
+
+class AccidentTelemetryViewTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.telemetry.read.return_value = np.empty(0, dtype=TELEMETRY_RECORD)
+        self.owner = User.objects.create_user("owner", password="x", phone_number="200")
+        self.report = AccidentReport.objects.create(user=self.owner, severity="high", device_id="phone-a",
+                                                    **NEARBY)
+        self.url = f"/api/accidents/{self.report.id}/telemetry/"
+
+    def test_only_owner_and_staff_can_read(self):
+        self.client.force_authenticate(User.objects.create_user("other", password="x", phone_number="201"))
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        self.client.force_authenticate(self.owner)
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.client.force_authenticate(User.objects.create_user("ops", password="x", phone_number="202",
+                                                                is_staff=True))
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_window_must_be_finite_and_in_range(self):
+        self.client.force_authenticate(self.owner)
+        for query in ("before=nan", "after=inf", "before=-5", "after=3601", "before=abc"):
+            self.assertEqual(self.client.get(f"{self.url}?{query}").status_code, 400, query)
+        self.assertEqual(self.client.get(f"{self.url}?before=0&after=3600").status_code, 200)
+        self.telemetry.read.assert_called_once()
+
+
+class StreamingDetectionTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch("api.views.crash_detector", StreamingCrashDetector())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post_samples(self, severities):
+        with mock.patch("api.streaming.predict_accident_batch",
+                        side_effect=[([severity], None, None) for severity in severities]):
+            for _ in severities:
+                response = self.client.post("/api/accidents/sensor/", {**SENSOR_READING, "device_id": "phone-a"},
+                                            format="json")
+        return response.json()
+
+    def test_report_keeps_the_detector_severity(self):
+        result = self.post_samples(["medium"] * 3)
+        self.assertTrue(result["detected"])
+        self.assertEqual(AccidentReport.objects.get().severity, "medium")
+
+    def test_report_takes_the_highest_severity_in_the_window(self):
+        result = self.post_samples(["medium", "high", "medium"])
+        self.assertEqual(result["report"]["severity"], "high")
+
+
+class AlertStatisticsTests(TestCase):
+    NOW = datetime.datetime(2026, 3, 10, 14, 37, 12, tzinfo=datetime.timezone.utc)
+    # Around every window edge, including the partial hours at the start of
+    # the 24 h and 7 day windows and both sides of midnight
+    AGES = [datetime.timedelta(**age) for age in (
+        {"minutes": 5}, {"minutes": 40}, {"hours": 14, "minutes": 37, "seconds": 12}, {"hours": 14, "minutes": 38},
+        {"hours": 23, "minutes": 50}, {"hours": 24, "minutes": 10}, {"days": 3},
+        {"days": 6, "hours": 23, "minutes": 55}, {"days": 7, "minutes": 1}, {"days": 10},
+    )]
+    CLOUD_STATUSES = ["sent", "delivered", "failed", "pending", "read"]
+
+    def setUp(self):
+        for i, age in enumerate(self.AGES):
+            BLEAlert.objects.create(severity=["low", "medium", "high"][i % 3], timestamp=self.NOW - age,
+                                    latitude=10.0 + i, longitude=20.0)
+            CloudAlert.objects.create(device_token="t", status=self.CLOUD_STATUSES[i % 5], is_emergency=i % 2 == 0,
+                                      timestamp=self.NOW - age)
+
+    def expected_windows(self):
+        starts = {
+            "today": self.NOW.replace(hour=0, minute=0, second=0),
+            "last_24_hours": self.NOW - datetime.timedelta(hours=24),
+            "last_7_days": self.NOW - datetime.timedelta(days=7),
+        }
+        return {name: sum(self.NOW - age >= start for age in self.AGES) for name, start in starts.items()}
+
+    def statistics(self, source):
+        with self.settings(ALERT_STATISTICS_SOURCE=source):
+            return ble_alert_statistics(self.NOW), cloud_alert_statistics(self.NOW)
+
+    def assert_rollups_match_raw(self):
+        rollup, raw = self.statistics("rollup"), self.statistics("raw")
+        self.assertEqual(rollup, raw)
+        return rollup
+
+    def test_rollups_match_raw_counts_across_window_edges(self):
+        ble, cloud = self.assert_rollups_match_raw()
+        windows = self.expected_windows()
+        self.assertEqual(windows, {"today": 3, "last_24_hours": 5, "last_7_days": 8})
+        for stats in (ble, cloud):
+            self.assertEqual(stats["total"], len(self.AGES))
+            self.assertEqual({name: stats[name] for name in windows}, windows)
+        self.assertEqual(ble["severity_breakdown"], {"low": 4, "medium": 3, "high": 3})
+        self.assertEqual(cloud["emergency_alerts"], 5)
+        self.assertEqual(cloud["status_breakdown"], {"pending": 2, "sent": 2, "delivered": 2, "failed": 2})
+
+    def test_rollups_follow_status_transitions(self):
+        with transaction.atomic():
+            rows = CloudAlert.objects.filter(status__in=["sent", "pending"])
+            rollups.transition("cloud", rows, status="delivered")
+            rows.update(status="delivered")
+        _, cloud = self.assert_rollups_match_raw()
+        self.assertEqual(cloud["status_breakdown"], {"pending": 0, "sent": 0, "delivered": 6, "failed": 2})
+
+        buckets = sorted(AlertRollup.objects.filter(count__gt=0).values_list(*rollups.KEY_FIELDS, "count"))
+        rollups.rebuild()
+        self.assertEqual(sorted(AlertRollup.objects.values_list(*rollups.KEY_FIELDS, "count")), buckets)
+
+
+    def test_cloud_alert_list_counts_pending_and_failed(self):
+        response = APIClient().get("/api/accidents/cloud-alerts/", {"hours": 24 * 365 * 5})
+        statistics = response.json()["statistics"]
+        self.assertEqual(response.json()["count"], len(self.AGES))
+        self.assertEqual({k: statistics[k] for k in ("pending", "sent", "delivered", "failed")},
+                         {"pending": 2, "sent": 2, "delivered": 2, "failed": 2})
+
+class QueryPlanTests(TestCase):
+    # Index each list endpoint's query should be served from
+    EXPECTED_INDEXES = {
+        "accidents/ (AccidentReportView)": ("accident_ts_idx",),
+        "ble-alerts/ default 24h": ("ble_ts_idx",),
+        "ble-alerts/?severity=high": ("ble_severity_ts_idx",),
+        "ble-alerts/?status=broadcast": ("ble_status_ts_idx",),
+        "ble-alerts/?severity=high&status=broadcast": ("ble_severity_ts_idx", "ble_status_ts_idx"),
+        "ble-alerts/?active=true": ("ble_status_ts_idx", "ble_broadcast_expiry_idx"),
+        "cloud-alerts/ default 24h": ("cloud_ts_idx",),
+        "cloud-alerts/?status=failed": ("cloud_status_ts_idx",),
+        "cloud-alerts/?is_emergency=true": ("cloud_emergency_ts_idx",),
+        "nearby/ accident reports, 5 km": ("accident_geohash_idx",),
+        "nearby/ BLE alerts, 5 km": ("ble_geohash_idx",),
+    }
+
+    def setUp(self):
+        if connection.vendor == "postgresql":
+            # Tiny test tables are cheaper to scan; ask whether the indexes can be used at all
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+
+    def test_list_queries_use_their_indexes(self):
+        scenarios = dict(ExplainQueriesCommand().scenarios())
+        self.assertEqual(set(scenarios), set(self.EXPECTED_INDEXES))
+        for label, queryset in scenarios.items():
+            with self.subTest(label):
+                plan = queryset.explain()
+                self.assertTrue(any(index in plan for index in self.EXPECTED_INDEXES[label]), plan)
+
+    def test_command_reports_no_full_scans(self):
+        out = io.StringIO()
+        call_command("explain_queries", stdout=out)
+        self.assertIn("No full table scans", out.getvalue())
+
+
+class RowSerializerTests(TestCase):
+    def assert_same_output(self, rows, queryset, serializer_class):
+        fast = rows.many(rows.rows(queryset))
+        drf = [serializer_class(obj).data for obj in queryset]
+        self.assertEqual(fast, drf)
+        # Key order too, since clients may rely on it in the JSON
+        self.assertEqual([list(row) for row in fast], [list(row) for row in drf])
+        self.assertEqual(json.dumps(fast), json.dumps(drf))
+
+    def test_accident_reports_match_drf(self):
+        user = User.objects.create_user("driver", password="x", phone_number="100", email="d@example.com")
+        AccidentReport.objects.create(user=user, latitude=17.385, longitude=78.4867, severity="high",
+                                      device_id="dev-1", acc_x=1.5, gyro_z=-0.25)
+        AccidentReport.objects.create(latitude=-33.9, longitude=151.2, severity="low", description="ünïcode",
+                                      reported_via="voice")
+        self.assert_same_output(ACCIDENT_REPORT_ROWS, querysets.accident_report_list(), AccidentReportSerializer)
+
+    def test_ble_alerts_match_drf(self):
+        BLEAlert.objects.create(severity="high", latitude=17.4, longitude=78.5, location_name="Main St",
+                                timestamp=timezone.now().replace(microsecond=123456))
+        BLEAlert.objects.create(severity="low", timestamp=timezone.now().replace(microsecond=0))
+        self.assert_same_output(BLE_ALERT_ROWS, BLEAlert.objects.all(), BLEAlertSerializer)
+
+    def test_cloud_alerts_match_drf(self):
+        for token in ("", "short", "a-device-token-longer-than-twenty-characters"):
+            CloudAlert.objects.create(device_token=token, data={"report_id": "r1", "nested": [1, 2.5, None]},
+                                      is_emergency=bool(token), failure_reason=None if token else "no token")
+        self.assert_same_output(CLOUD_ALERT_ROWS, CloudAlert.objects.all(), CloudAlertSerializer)
+
+
+class NearbyIncidentsTests(APITestCase):
+    # Just south of the top edge of its 5 km search cell ("tepf", lat < 17.40234375)
+    LAT, LON = 17.402, 78.5
+
+    def report(self, latitude, longitude, **fields):
+        return AccidentReport.objects.create(latitude=latitude, longitude=longitude, severity="high", **fields)
+
+    def nearby(self, **params):
+        response = self.client.get("/api/accidents/nearby/", {"lat": self.LAT, "lon": self.LON, "radius": 5, **params})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_finds_reports_across_a_cell_boundary_nearest_first(self):
+        across = self.report(self.LAT + 0.01, self.LON)  # ~1.1 km north, in the next cell
+        edge = self.report(self.LAT - 0.044, self.LON)  # ~4.9 km south
+        self.report(self.LAT + 0.048, self.LON)  # ~5.3 km north
+        self.report(self.LAT, self.LON + 1.0)  # ~106 km east
+        self.assertNotEqual(across.geohash[:4], geo.encode(self.LAT, self.LON, 4))
+
+        reports = self.nearby()["reports"]
+        self.assertEqual([r["id"] for r in reports], [str(across.id), str(edge.id)])
+        self.assertAlmostEqual(reports[0]["distance_km"], 1.11, places=2)
+        self.assertLess(reports[1]["distance_km"], 5)
+
+    def test_candidates_cover_every_row_within_the_radius(self):
+        rng = np.random.default_rng(0)
+        spread = np.repeat([0.06, 0.5], 150)
+        points = np.column_stack([self.LAT + rng.uniform(-spread, spread), self.LON + rng.uniform(-spread, spread)])
+        for latitude, longitude in points:
+            BLEAlert.objects.create(severity="low", latitude=latitude, longitude=longitude)
+        candidates = querysets.nearby_candidates(BLEAlert, self.LAT, self.LON, 5.0)
+        distances = geo.haversine_km(self.LAT, self.LON, points[:, 0], points[:, 1])
+        inside = {(round(lat, 9), round(lon, 9)) for (lat, lon), d in zip(points, distances) if d <= 5.0}
+        found = {(round(lat, 9), round(lon, 9)) for lat, lon in candidates.values_list("latitude", "longitude")}
+        self.assertTrue(inside)
+        self.assertLessEqual(inside, found)
+        self.assertLess(len(found), len(points))
+        self.assertEqual(len(self.nearby()["ble_alerts"]), len(inside))
+
+    def test_old_reports_are_left_out(self):
+        old = self.report(self.LAT, self.LON)
+        AccidentReport.objects.filter(id=old.id).update(timestamp=timezone.now() - timezone.timedelta(hours=30))
+        self.assertEqual(self.nearby()["reports"], [])
+        self.assertEqual(len(self.nearby(hours=48)["reports"]), 1)
+
+    def test_covering_cells_wrap_the_antimeridian(self):
+        cells = geo.covering_cells(0.5, 179.99, 5.0)
+        self.assertEqual(len(cells), 9)
+        self.assertTrue(any(geo.bounds(cell)[2] < 0 for cell in cells))
+
+    def test_rejects_bad_queries(self):
+        for params in ({"lat": "x"}, {"lat": 91}, {"radius": 0}, {"radius": 500}):
+            response = self.client.get("/api/accidents/nearby/", {"lat": self.LAT, "lon": self.LON, **params})
+            self.assertEqual(response.status_code, 400)
+
+
+class LiveGridTests(TestCase):
+    NOW = 1_790_000_000.0
+
+    def incident(self, incident_id, latitude, longitude, ttl):
+        return LiveIncident(incident_id, "accident", latitude, longitude, "high", self.NOW + ttl, {})
+
+    def test_entries_expire_by_time(self):
+        grid = LiveIncidentGrid()
+        grid.add_many([self.incident("short", 17.4, 78.5, 10), self.incident("long", 17.4, 78.5, 100)], now=self.NOW)
+        grid.add(self.incident("dead", 17.4, 78.5, -1), now=self.NOW)
+        self.assertEqual([i.id for i, _ in grid.query(17.4, 78.5, 1, now=self.NOW)], ["short", "long"])
+        self.assertEqual([i.id for i, _ in grid.query(17.4, 78.5, 1, now=self.NOW + 50)], ["long"])
+        self.assertEqual(len(grid), 1)
+        self.assertEqual(grid.query(17.4, 78.5, 1, now=self.NOW + 100), [])
+        self.assertEqual(len(grid), 0)
+
+    def test_readding_moves_and_extends_an_entry(self):
+        grid = LiveIncidentGrid()
+        grid.add(self.incident("a", 17.4, 78.5, 10), now=self.NOW)
+        grid.add(self.incident("a", 17.5, 78.5, 100), now=self.NOW)
+        self.assertEqual(grid.query(17.4, 78.5, 1, now=self.NOW + 50), [])
+        self.assertEqual([i.id for i, _ in grid.query(17.5, 78.5, 1, now=self.NOW + 50)], ["a"])
+
+    def test_query_matches_brute_force_across_cells_and_the_antimeridian(self):
+        grid = LiveIncidentGrid(cell_degrees=0.02)
+        rng = np.random.default_rng(0)
+        points = np.column_stack([rng.uniform(-0.2, 0.2, 500), rng.uniform(179.8, 180.2, 500)])
+        points[:, 1] = (points[:, 1] + 180) % 360 - 180
+        grid.add_many([self.incident(str(i), lat, lon, 60) for i, (lat, lon) in enumerate(points)], now=self.NOW)
+        for (latitude, longitude), radius in zip(((0.0, 179.99), (0.05, -179.95), (-0.1, 179.9)), (5, 15, 40)):
+            with self.subTest(latitude=latitude, longitude=longitude, radius=radius):
+                distances = geo.haversine_km(latitude, longitude, points[:, 0], points[:, 1])
+                expected = [str(i) for i in np.argsort(distances, kind="stable") if distances[i] <= radius]
+                found = grid.query(latitude, longitude, radius, now=self.NOW)
+                self.assertEqual([i.id for i, _ in found], expected)
+
+
+class LiveIncidentsViewTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.live = LiveIncidents(sync_interval=0)
+        patcher = mock.patch("api.views.live_incidents", self.live)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def live_ids(self):
+        response = self.client.get("/api/accidents/live/", {"lat": 17.4, "lon": 78.5, "radius": 5})
+        self.assertEqual(response.status_code, 200)
+        return [incident["id"] for incident in response.json()["incidents"]]
+
+    def test_serves_live_rows_from_the_database(self):
+        report = AccidentReport.objects.create(latitude=17.41, longitude=78.5, severity="high")
+        alert = BLEAlert.objects.create(severity="medium", latitude=17.4, longitude=78.5, broadcast_duration=60)
+        BLEAlert.objects.create(severity="high", latitude=17.4, longitude=78.5, status="expired")
+        BLEAlert.objects.create(severity="high", latitude=17.4, longitude=78.5, broadcast_duration=30,
+                                timestamp=timezone.now() - timezone.timedelta(minutes=5))
+        old = AccidentReport.objects.create(latitude=17.4, longitude=78.5, severity="low")
+        AccidentReport.objects.filter(id=old.id).update(timestamp=timezone.now() - timezone.timedelta(hours=2))
+        self.assertEqual(self.live_ids(), [str(alert.id), str(report.id)])
+
+    def test_alerts_leave_the_grid_when_they_stop_broadcasting(self):
+        alert = BLEAlert.objects.create(severity="medium", latitude=17.4, longitude=78.5, broadcast_duration=60)
+        self.assertEqual(self.live_ids(), [str(alert.id)])
+        alert.status = "expired"
+        self.live.update_ble_alert(alert)
+        self.assertEqual(self.live_ids(), [])
+
+
+class BLEAlertExpiryTests(TestCase):
+    def alert(self, age, duration=30, status="broadcast"):
+        return BLEAlert.objects.create(severity="low", status=status, broadcast_duration=duration,
+                                       timestamp=timezone.now() - age)
+
+    def test_sweep_expires_only_broadcasts_past_their_duration(self):
+        due = self.alert(timezone.timedelta(seconds=60))
+        live = self.alert(timezone.timedelta(seconds=60), duration=300)
+        received = self.alert(timezone.timedelta(seconds=60), status="received")
+        self.assertEqual(expire_ble_alerts(), 1)
+        self.assertEqual(expire_ble_alerts(), 0)
+        statuses = dict(BLEAlert.objects.values_list("id", "status"))
+        self.assertEqual(statuses, {due.id: "expired", live.id: "broadcast", received.id: "received"})
+        # Rollup buckets moved along with the rows
+        buckets = dict(AlertRollup.objects.filter(channel="ble", count__gt=0).values_list("status", "count"))
+        self.assertEqual(buckets, {"expired": 1, "broadcast": 1, "received": 1})
+
+    def stale_alerts(self):
+        stale = [self.alert(timezone.timedelta(days=40, minutes=i), status="expired") for i in range(5)]
+        self.alert(timezone.timedelta(days=1), status="expired")
+        self.alert(timezone.timedelta(days=40))  # not swept yet, so kept
+        return {alert.id for alert in stale}
+
+    def prune(self, **kwargs):
+        with CaptureQueriesContext(connection) as queries:
+            pruned = prune_ble_alerts(timezone.now() - timezone.timedelta(days=30), batch_size=2, **kwargs)
+        deletes = [q for q in queries.captured_queries if q["sql"].startswith("DELETE")]
+        return pruned, len(deletes)
+
+    def test_prune_deletes_in_batches(self):
+        stale = self.stale_alerts()
+        self.assertEqual(self.prune(), (5, 3))
+        self.assertEqual(BLEAlert.objects.count(), 2)
+        self.assertFalse(BLEAlert.objects.filter(id__in=stale).exists())
+        self.assertEqual(self.prune(), (0, 0))
+
+    def test_prune_archives_rows_before_deleting(self):
+        stale = self.stale_alerts()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        archive = os.path.join(directory, "pruned.ndjson.gz")
+        self.assertEqual(self.prune(archive_path=archive), (5, 3))
+        self.prune(archive_path=archive)
+        with gzip.open(archive, "rt") as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual({uuid.UUID(row["id"]) for row in rows}, stale)
+        self.assertEqual(len(rows), 5)
+        self.assertEqual({row["status"] for row in rows}, {"expired"})
+
+
+class CursorPaginationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        for i in range(5):
+            report = AccidentReport.objects.create(severity="high", **NEARBY)
+            # Two share a timestamp, so the id breaks the tie
+            AccidentReport.objects.filter(id=report.id).update(timestamp=now - timezone.timedelta(minutes=i // 2))
+
+    def test_pages_cover_every_row_once(self):
+        seen, cursor = [], None
+        while True:
+            params = {"page_size": 2, **({"cursor": cursor} if cursor else {})}
+            body = self.client.get("/api/accidents/", params).json()
+            seen += [r["id"] for r in body["reports"]]
+            cursor = body["next_cursor"]
+            if not cursor:
+                break
+        expected = AccidentReport.objects.order_by("-timestamp", "-id").values_list("id", flat=True)
+        self.assertEqual(seen, [str(pk) for pk in expected])
+
+    async def test_stream_sends_every_row_in_keyset_chunks_under_asgi(self):
+        from asgiref.sync import sync_to_async
+
+        with mock.patch("api.pagination.STREAM_CHUNK_SIZE", 2):
+            response = await self.async_client.get("/api/accidents/", {"stream": "true"})
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 3)
+        lines = b"".join(chunks).decode().splitlines()
+        expected = await sync_to_async(list)(
+            AccidentReport.objects.order_by("-timestamp", "-id").values_list("id", flat=True))
+        self.assertEqual([json.loads(line)["id"] for line in lines], [str(pk) for pk in expected])
+
+    def test_malformed_cursor_is_a_bad_request(self):
+        for cursor in ("not-base64!", encode_cursor(timezone.now(), "not-a-uuid"), encode_cursor(timezone.now(), 7)):
+            response = self.client.get("/api/accidents/", {"cursor": cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertIn("Invalid cursor", response.json()["message"])
+
+
+class OutboxLeaseTests(TestCase):
+    TOPIC = "test.event"
+
+    def setUp(self):
+        self.handler = mock.Mock()
+        patcher = mock.patch.dict(_handlers, {self.TOPIC: self.handler})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.events = OutboxEvent.objects.bulk_create([OutboxEvent(topic=self.TOPIC, payload={"n": i})
+                                                       for i in range(3)])
+
+    def test_claimed_events_are_skipped_by_other_dispatchers(self):
+        self.assertEqual(len(claim_batch("a", limit=2)), 2)
+        self.assertEqual([e.payload["n"] for e in claim_batch("b")], [2])
+        self.assertEqual(claim_batch("c"), [])
+
+    def test_expired_lease_can_be_claimed_again(self):
+        claim_batch("a", lease_seconds=-1)
+        self.assertEqual(len(claim_batch("b")), 3)
+
+    def test_processed_events_are_released_and_not_claimed_again(self):
+        self.assertEqual(process_batch("a"), 3)
+        self.handler.assert_called_once()
+        self.assertFalse(OutboxEvent.objects.filter(processed_at__isnull=True).exists())
+        self.assertFalse(OutboxEvent.objects.exclude(locked_by="").exists())
+        self.assertEqual(process_batch("b"), 0)
+
+    def test_failed_batch_backs_off_then_gives_up(self):
+        self.handler.side_effect = RuntimeError("push failed")
+        process_batch("a")
+        event = OutboxEvent.objects.get(id=self.events[0].id)
+        self.assertEqual((event.attempts, event.last_error, event.locked_by), (1, "push failed", ""))
+        self.assertGreater(event.available_at, timezone.now())
+        self.assertEqual(process_batch("b"), 0)  # not due yet
+
+        OutboxEvent.objects.update(available_at=timezone.now())
+        process_batch("b", max_attempts=2)
+        self.assertFalse(OutboxEvent.objects.filter(processed_at__isnull=True).exists())
+
+
+class AccidentFanoutRetryTests(TransactionTestCase):
+    def test_retry_after_enqueue_failure_creates_one_alert(self):
+        report = AccidentReport.objects.create(severity="high", **NEARBY)
+        # Not publish(): its on_commit would wake the in-process dispatcher
+        OutboxEvent.objects.create(topic=ACCIDENT_REPORT_CREATED, payload=report_payload(report))
+        with mock.patch("api.push_delivery.push_engine.enqueue",
+                        side_effect=[RuntimeError("no credentials"), RuntimeError("no credentials"), None]) as enqueue:
+            for _ in range(3):
+                process_batch("a")
+                OutboxEvent.objects.update(available_at=timezone.now())
+
+        alert = CloudAlert.objects.get()
+        self.assertEqual(alert.data["report_id"], str(report.id))
+        self.assertEqual(enqueue.call_args.args[0], [alert.id])
+        event = OutboxEvent.objects.get()
+        self.assertEqual(event.attempts, 2)
+        self.assertIsNotNone(event.processed_at)
+
+
+class DeviceSocketTests(TransactionTestCase):
+    """The socket handler ingests on executor threads, which need committed rows."""
+
+    def setUp(self):
+        patcher = mock.patch("api.device_socket.telemetry_archive")
+        self.telemetry = patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch("api.device_socket.crash_detector")
+        self.detector = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.detector.push.return_value = (False, "low", {})
+        # Reports publish outbox events; keep the dispatcher thread out of the test database
+        patcher = mock.patch("api.outbox.outbox_dispatcher.in_process", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def connect(self):
+        from asgiref.testing import ApplicationCommunicator
+
+        socket = ApplicationCommunicator(telemetry_socket, {
+            "type": "websocket", "path": "/ws/telemetry/", "query_string": b"device_id=phone-a"})
+        await socket.send_input({"type": "websocket.connect"})
+        self.assertEqual((await socket.receive_output(5))["type"], "websocket.accept")
+        return socket
+
+    async def disconnect(self, socket):
+        await socket.send_input({"type": "websocket.disconnect", "code": 1000})
+        await socket.wait(5)
+
+    async def exchange(self, socket, frame):
+        await socket.send_input({"type": "websocket.receive", **frame})
+        # Every frame is followed by a ping, so a silent frame shows up as the pong
+        await socket.send_input({"type": "websocket.receive", "text": json.dumps({"type": "ping"})})
+        reply = json.loads((await socket.receive_output(5))["text"])
+        if reply["type"] != "pong":
+            self.assertEqual(json.loads((await socket.receive_output(5))["text"]), {"type": "pong"})
+        return reply
+
+    async def test_valid_frames_reach_the_detector(self):
+        socket = await self.connect()
+        reply = await self.exchange(socket, {"text": json.dumps({"type": "sample", **SENSOR_READING})})
+        self.assertEqual(reply, {"type": "pong"})
+        row = [SENSOR_READING[name] for name in sensor_wire.SENSOR_COLUMNS]
+        reply = await self.exchange(socket, {"bytes": sensor_wire.encode_records([row, row], [1.0, 2.0])})
+        self.assertEqual(reply, {"type": "pong"})
+        await self.disconnect(socket)
+        self.assertEqual(self.detector.push.call_count, 3)
+        self.assertEqual(self.detector.push.call_args.args[2], 2.0)
+
+    async def test_bad_frames_get_an_error_and_keep_the_connection(self):
+        socket = await self.connect()
+        partial = {k: v for k, v in SENSOR_READING.items() if k != "latitude"}
+        row = [float("nan")] + [1.0] * 7
+        for frame in ({"text": json.dumps(partial)}, {"text": json.dumps({**SENSOR_READING, "acc_x": "inf"})},
+                      {"text": "not json"}, {"bytes": b"x" * 32}, {"bytes": sensor_wire.encode_records(row)}):
+            reply = await self.exchange(socket, frame)
+            self.assertEqual(reply["type"], "error", frame)
+        await self.disconnect(socket)
+        self.detector.push.assert_not_called()
+
+    async def test_ingest_failure_is_reported_per_frame(self):
+        self.detector.push.side_effect = [RuntimeError("model unavailable"), (True, "medium", {})]
+        socket = await self.connect()
+        frame = {"text": json.dumps({"type": "sample", **SENSOR_READING})}
+        reply = await self.exchange(socket, frame)
+        self.assertEqual(reply["type"], "error")
+        self.assertIn("model unavailable", reply["message"])
+
+        reply = await self.exchange(socket, frame)
+        self.assertEqual(reply["type"], "accident")
+        self.assertEqual(reply["report"]["severity"], "medium")
+        await self.disconnect(socket)
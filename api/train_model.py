@@ -1,26 +0,0 @@
-import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.metrics import accuracy_score
-import joblib
-
-# Load dataset
-data = pd.read_csv("sensor_data.csv")  # Place CSV in same folder or give full path
-
-X = data[['acc_x','acc_y','acc_z','gyro_x','gyro_y','gyro_z']]
-y = data['label']
-
-# Split dataset
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-
-# Train model
-model = RandomForestClassifier(n_estimators=100)
-model.fit(X_train, y_train)
-
-# Test
-y_pred = model.predict(X_test)
-print("Accuracy:", accuracy_score(y_test, y_pred))
-
-# Save model
-joblib.dump(model, "accident_model.pkl")
-print("Model saved as accident_model.pkl")
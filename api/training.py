@@ -0,0 +1,229 @@
+"""
+Training pipeline for the accident model (manage.py generate_sensor_data,
+manage.py train_model).
+
+Datasets are directories of NumPy arrays that are written and read as
+memory maps, so neither generation nor training holds more than a chunk of
+rows in Python objects:
+
+    features.npy  float32  (n_rows, 6) in FEATURE_NAMES order
+    labels.npy    uint8    (n_rows,) 1 = accident
+    meta.json     row count, seed, generator parameters
+
+Rows are generated independently of each other, so the last `test_fraction`
+of a dataset is an unbiased hold-out and both splits are plain slices of the
+maps, not copies. The forest is fitted with n_jobs threads on bootstrap
+samples of at most `max_samples` rows per tree.
+
+Every run writes a versioned artifact directory under ML_MODEL_DIR:
+
+    <version>/model.pkl       the fitted RandomForestClassifier
+    <version>/forest/         its compiled export (api/forest_engine.py)
+    <version>/metadata.json   feature order, severity thresholds, benign
+                              pre-filter bounds, parameters, training time
+                              and hold-out metrics
+"""
+import json
+import os
+import platform
+import time
+
+import numpy as np
+from django.utils import timezone
+
+from .forest_engine import export_forest
+from .inference_cache import fit_prefilter
+from .ml_model import FEATURE_NAMES, fit_severity_thresholds
+
+CHUNK_ROWS = 1_000_000
+
+
+def _chunk(rng, n_rows, accident_fraction):
+    """Synthetic rows: calm driving with rough-road outliers, and crashes of varying force."""
+    labels = (rng.random(n_rows) < accident_fraction).astype(np.uint8)
+    features = np.empty((n_rows, len(FEATURE_NAMES)), dtype=np.float32)
+
+    # Normal driving: small accelerations/rotations, ~3% potholes and hard braking
+    rough = rng.random(n_rows) < 0.03
+    acc_scale = np.where(rough, 6.0, 1.2)[:, None]
+    gyro_scale = np.where(rough, 45.0, 6.0)[:, None]
+    features[:, :3] = rng.normal(0.0, 1.0, (n_rows, 3)) * acc_scale
+    features[:, 3:] = rng.normal(0.0, 1.0, (n_rows, 3)) * gyro_scale
+
+    # Crashes: a random direction scaled by an impact force; low-speed ones
+    # overlap with rough roads
+    crashes = np.flatnonzero(labels)
+    force = rng.uniform(4.0, 25.0, len(crashes))
+    rotation = rng.uniform(20.0, 200.0, len(crashes))
+    direction = rng.normal(0.0, 1.0, (len(crashes), 3))
+    direction /= np.linalg.norm(direction, axis=1, keepdims=True)
+    spin = rng.normal(0.0, 1.0, (len(crashes), 3))
+    spin /= np.linalg.norm(spin, axis=1, keepdims=True)
+    features[crashes, :3] = direction * force[:, None] + rng.normal(0.0, 1.0, (len(crashes), 3))
+    features[crashes, 3:] = spin * rotation[:, None]
+    return features, labels
+
+
+def generate_dataset(directory, n_rows, seed=0, accident_fraction=0.05, chunk_rows=CHUNK_ROWS):
+    """
+    Write `n_rows` synthetic rows to `directory`, chunk by chunk. The output
+    depends only on (n_rows, seed, accident_fraction, chunk_rows).
+    """
+    os.makedirs(directory, exist_ok=True)
+    features = np.lib.format.open_memmap(os.path.join(directory, "features.npy"), mode="w+",
+                                         dtype=np.float32, shape=(n_rows, len(FEATURE_NAMES)))
+    labels = np.lib.format.open_memmap(os.path.join(directory, "labels.npy"), mode="w+",
+                                       dtype=np.uint8, shape=(n_rows,))
+    # One independent stream per chunk
+    streams = np.random.SeedSequence(seed).spawn(-(-n_rows // chunk_rows) or 1)
+    for index, start in enumerate(range(0, n_rows, chunk_rows)):
+        stop = min(start + chunk_rows, n_rows)
+        features[start:stop], labels[start:stop] = _chunk(np.random.default_rng(streams[index]),
+                                                          stop - start, accident_fraction)
+    features.flush()
+    labels.flush()
+
+    meta = {
+        "rows": n_rows,
+        "seed": seed,
+        "accident_fraction": accident_fraction,
+        "chunk_rows": chunk_rows,
+        "feature_names": FEATURE_NAMES,
+        "source": "synthetic",
+    }
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def import_csv(csv_path, directory, chunk_rows=CHUNK_ROWS):
+    """Convert a CSV with FEATURE_NAMES and `label` columns into a dataset directory, chunk by chunk."""
+    import pandas as pd
+
+    with open(csv_path) as f:
+        n_rows = sum(1 for _ in f) - 1
+    os.makedirs(directory, exist_ok=True)
+    features = np.lib.format.open_memmap(os.path.join(directory, "features.npy"), mode="w+",
+                                         dtype=np.float32, shape=(n_rows, len(FEATURE_NAMES)))
+    labels = np.lib.format.open_memmap(os.path.join(directory, "labels.npy"), mode="w+",
+                                       dtype=np.uint8, shape=(n_rows,))
+    start = 0
+    for chunk in pd.read_csv(csv_path, usecols=FEATURE_NAMES + ["label"], chunksize=chunk_rows):
+        stop = start + len(chunk)
+        features[start:stop] = chunk[FEATURE_NAMES].to_numpy(dtype=np.float32)
+        labels[start:stop] = chunk["label"].to_numpy(dtype=np.uint8)
+        start = stop
+    features.flush()
+    labels.flush()
+
+    meta = {"rows": n_rows, "feature_names": FEATURE_NAMES, "source": os.path.abspath(csv_path)}
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def load_dataset(directory):
+    """(features, labels, meta) with the arrays memory-mapped read-only."""
+    with open(os.path.join(directory, "meta.json")) as f:
+        meta = json.load(f)
+    if meta["feature_names"] != FEATURE_NAMES:
+        raise ValueError(f"Dataset columns {meta['feature_names']} do not match {FEATURE_NAMES}")
+    features = np.load(os.path.join(directory, "features.npy"), mmap_mode="r")
+    labels = np.load(os.path.join(directory, "labels.npy"), mmap_mode="r")
+    return features, labels, meta
+
+
+def _metrics(y_true, probabilities, thresholds):
+    from sklearn.metrics import accuracy_score, brier_score_loss, f1_score, precision_score, recall_score, roc_auc_score
+
+    predicted = probabilities > 0.5
+    flagged = probabilities > thresholds["medium"]
+    return {
+        "rows": int(len(y_true)),
+        "accident_rate": round(float(np.mean(y_true)), 6),
+        "accuracy": round(float(accuracy_score(y_true, predicted)), 6),
+        "precision": round(float(precision_score(y_true, predicted, zero_division=0)), 6),
+        "recall": round(float(recall_score(y_true, predicted, zero_division=0)), 6),
+        "f1": round(float(f1_score(y_true, predicted, zero_division=0)), 6),
+        "roc_auc": round(float(roc_auc_score(y_true, probabilities)), 6) if 0 < np.sum(y_true) < len(y_true) else None,
+        "brier": round(float(brier_score_loss(y_true, probabilities)), 6),
+        "recall_at_medium": round(float(recall_score(y_true, flagged, zero_division=0)), 6),
+        "precision_at_high": round(float(precision_score(y_true, probabilities > thresholds["high"],
+                                                         zero_division=0)), 6),
+    }
+
+
+def train(features, labels, seed=0, test_fraction=0.2, n_estimators=100, max_depth=12,
+          min_samples_leaf=20, max_samples=1_000_000, n_jobs=-1):
+    """Fit on the leading rows, evaluate on the trailing `test_fraction`; returns (model, metadata)."""
+    import sklearn
+    from sklearn.ensemble import RandomForestClassifier
+
+    n_test = int(len(labels) * test_fraction)
+    n_train = len(labels) - n_test
+    X_train, y_train = features[:n_train], labels[:n_train]
+    X_test, y_test = features[n_train:], labels[n_train:]
+
+    params = {
+        "n_estimators": n_estimators,
+        "max_depth": max_depth,
+        "min_samples_leaf": min_samples_leaf,
+        # Bootstrap sample per tree; bounds fit time on very large datasets
+        "max_samples": min(max_samples, n_train) if max_samples else None,
+        "n_jobs": n_jobs,
+        "random_state": seed,
+    }
+    model = RandomForestClassifier(**params)
+    t0 = time.perf_counter()
+    model.fit(X_train, y_train)
+    training_seconds = time.perf_counter() - t0
+
+    accident_col = list(model.classes_).index(1)
+    t0 = time.perf_counter()
+    probabilities = model.predict_proba(X_test)[:, accident_col]
+    scoring_seconds = time.perf_counter() - t0
+    thresholds = fit_severity_thresholds(y_test, probabilities)
+    model.severity_thresholds_ = thresholds
+    # Bounds from the training accidents; coverage and leakage measured on the hold-out
+    prefilter = fit_prefilter(X_train, y_train, holdout=(X_test, y_test, probabilities))
+
+    metadata = {
+        "feature_names": FEATURE_NAMES,
+        "classes": [int(c) for c in model.classes_],
+        "severity_thresholds": thresholds,
+        "prefilter": prefilter,
+        "params": params,
+        "seed": seed,
+        "train_rows": n_train,
+        "test_rows": n_test,
+        "training_seconds": round(training_seconds, 3),
+        "test_scoring_seconds": round(scoring_seconds, 3),
+        "metrics": _metrics(np.asarray(y_test), probabilities, thresholds),
+        "sklearn_version": sklearn.__version__,
+        "numpy_version": np.__version__,
+        "python_version": platform.python_version(),
+    }
+    return model, metadata
+
+
+def save_artifacts(model, metadata, root, version=None):
+    """Write model.pkl, forest/ and metadata.json to root/<version>/; returns that path."""
+    import joblib
+
+    version = version or timezone.now().strftime("%Y%m%d-%H%M%S")
+    directory = os.path.join(root, version)
+    if os.path.exists(directory):
+        raise FileExistsError(f"Model version {version} already exists in {root}")
+    os.makedirs(directory)
+
+    joblib.dump(model, os.path.join(directory, "model.pkl"))
+    forest = export_forest(model, os.path.join(directory, "forest"))
+    metadata = {
+        "version": version,
+        "created_at": timezone.now().isoformat(),
+        **metadata,
+        "forest": {key: forest[key] for key in ("n_trees", "n_nodes", "max_depth")},
+    }
+    with open(os.path.join(directory, "metadata.json"), "w") as f:
+        json.dump(metadata, f, indent=2)
+    return directory
@@ -0,0 +1,116 @@
+"""
+Audio decoding and offline speech recognition for voice clips.
+
+This module runs inside the worker processes of api/voice_pipeline.py and
+deliberately does not touch Django, so workers can be started with
+"forkserver" instead of forking a threaded web worker.
+
+Clips are decoded with pydub (WAV natively; compressed formats such as
+ogg/opus, mp3, m4a or amr need ffmpeg on PATH) to 16 kHz mono 16-bit PCM
+and passed to an offline recognizer, loaded once per worker process:
+
+  * "sphinx": CMU PocketSphinx through SpeechRecognition (needs `pocketsphinx`)
+  * "vosk": a Kaldi model through `vosk`; the model directory is required
+
+`backend_problem` and `needs_ffmpeg` let the web process refuse clips it can
+never transcribe instead of queueing them.
+"""
+import importlib
+import io
+import json
+import os
+import shutil
+import time
+
+SAMPLE_RATE = 16000
+
+_recognizer = None
+
+
+def load_recognizer(backend, model_path=None):
+    """Returns a callable mapping 16 kHz mono 16-bit PCM bytes to text."""
+    if backend == "sphinx":
+        import speech_recognition as sr
+
+        recognizer = sr.Recognizer()
+
+        def recognize(pcm):
+            try:
+                return recognizer.recognize_sphinx(sr.AudioData(pcm, SAMPLE_RATE, 2))
+            except sr.UnknownValueError:
+                return ""
+        return recognize
+
+    if backend == "vosk":
+        from vosk import KaldiRecognizer, Model, SetLogLevel
+
+        if not model_path:
+            raise ValueError("The vosk recognizer needs VOICE_VOSK_MODEL (an unpacked model directory)")
+        SetLogLevel(-1)
+        model = Model(model_path)
+
+        def recognize(pcm):
+            recognizer = KaldiRecognizer(model, SAMPLE_RATE)
+            recognizer.AcceptWaveform(pcm)
+            return json.loads(recognizer.FinalResult()).get("text", "")
+        return recognize
+
+    raise ValueError(f"Unknown voice recognizer {backend!r}")
+
+
+def backend_problem(backend, model_path=None):
+    """Why `backend` cannot transcribe in this environment, or None if it can."""
+    if backend == "sphinx":
+        for module in ("speech_recognition", "pocketsphinx"):
+            try:
+                importlib.import_module(module)
+            except ImportError as e:
+                return f"The sphinx recognizer needs {module}: {e}"
+        return None
+    if backend == "vosk":
+        try:
+            import vosk  # noqa: F401
+        except ImportError as e:
+            return f"The vosk recognizer needs vosk: {e}"
+        if not model_path or not os.path.isdir(model_path):
+            return f"VOICE_VOSK_MODEL is not a model directory: {model_path!r}"
+        return None
+    return f"Unknown voice recognizer {backend!r}"
+
+
+def needs_ffmpeg(audio_format):
+    """True when clips in `audio_format` cannot be decoded here (only WAV works without ffmpeg)."""
+    return audio_format not in ("wav", "wave") and shutil.which("ffmpeg") is None
+
+
+def init_worker(backend, model_path=None):
+    """ProcessPoolExecutor initializer: load the recognizer once per process."""
+    global _recognizer
+    _recognizer = load_recognizer(backend, model_path)
+
+
+def decode_audio(data, audio_format=None):
+    """Compressed or WAV clip bytes -> 16 kHz mono 16-bit PCM bytes."""
+    from pydub import AudioSegment
+
+    segment = AudioSegment.from_file(io.BytesIO(data), format=audio_format)
+    return segment.set_channels(1).set_frame_rate(SAMPLE_RATE).set_sample_width(2).raw_data
+
+
+def transcribe_clip(data, audio_format, submitted_at):
+    """
+    Worker entry point. Returns (transcript, timings) with milliseconds spent
+    waiting in the queue, decoding and recognizing.
+    """
+    started = time.time()
+    timings = {"queue": (started - submitted_at) * 1000}
+
+    t0 = time.perf_counter()
+    pcm = decode_audio(data, audio_format)
+    t1 = time.perf_counter()
+    transcript = _recognizer(pcm)
+    t2 = time.perf_counter()
+
+    timings["decode"] = (t1 - t0) * 1000
+    timings["transcribe"] = (t2 - t1) * 1000
+    return transcript, timings
@@ -6,7 +6,15 @@ from . import views
 urlpatterns = [
     path('accidents/', AccidentReportView.as_view(), name='accident_reports'),
     path('accidents/voice/', VoiceAccidentReportView.as_view(), name='voice_accident'),
+    path('accidents/voice/audio/', views.VoiceAudioJobView.as_view(), name='voice_audio_job'),
+    path('accidents/voice/jobs/<uuid:job_id>/', views.VoiceJobDetailView.as_view(), name='voice_job_detail'),
+    path('accidents/voice/pipeline/', views.VoicePipelineStatsView.as_view(), name='voice_pipeline_stats'),
     path('accidents/sensor/', SensorAccidentReportView.as_view(), name='sensor_accident'),
+    path('accidents/sensor/batch/', views.SensorBatchAccidentReportView.as_view(), name='sensor_accident_batch'),
+    path('accidents/<uuid:report_id>/telemetry/', views.AccidentTelemetryView.as_view(), name='accident_telemetry'),
+    path('accidents/model/', views.ModelStatusView.as_view(), name='model_status'),
+    path('accidents/nearby/', views.NearbyIncidentsView.as_view(), name='nearby_incidents'),
+    path('accidents/live/', views.LiveIncidentsView.as_view(), name='live_incidents'),
     # path('accidents/ble-alert/', BLEAlertView.as_view(), name='ble_alert'),
     # path('accidents/cloud-alert/', CloudAlertView.as_view(), name='cloud_alert'),
     # path('accidents/ble-alerts/', BLEAlertListView.as_view(), name='ble-alerts'),
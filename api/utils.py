@@ -1,10 +1,29 @@
-from pyfcm import FCMNotification
+from django.conf import settings
+
+from .lazy import Lazy
+
+
+def _create_push_service():
+    from pyfcm import FCMNotification
+    # Add your Firebase Server Key
+    return FCMNotification(api_key=getattr(settings, "FCM_SERVER_KEY", "YOUR_FIREBASE_SERVER_KEY"))
+
+
+def _create_firebase_app():
+    import firebase_admin
+    from firebase_admin import credentials
+
+    cred = credentials.Certificate(settings.FIREBASE_CREDENTIALS)
+    return firebase_admin.initialize_app(cred)
+
+
+# Created on first use (or by api.lazy.warm_up), not at import
+push_service = Lazy("push_service", _create_push_service)
+firebase_app = Lazy("firebase_app", _create_firebase_app)
 
-# Add your Firebase Server Key
-push_service = FCMNotification(api_key="YOUR_FIREBASE_SERVER_KEY")
 
 def send_push_notification(title, message, registration_ids):
-    result = push_service.notify_multiple_devices(
+    result = push_service.get().notify_multiple_devices(
         registration_ids=registration_ids,
         message_title=title,
         message_body=message
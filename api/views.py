@@ -1,28 +1,57 @@
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from .models import AccidentReport, User  # ✅ FIX: Import your custom User model
 from .serializers import AccidentReportSerializer
-from .ml_model import predict_accident
+from .ml_model import predict_accident, predict_accident_batch, worth_notifying, FEATURE_NAMES
+from .ml_model import inference_cache, model_registry, shadow_scorer
+from .streaming import crash_detector
+from .keywords import keyword_matcher
+from .voice_pipeline import PipelineFull, file_voice_report, voice_pipeline
+from . import transcription
+from .push_delivery import push_engine
+from .outbox import publish, publish_many, report_payload, ble_alert_payload, ACCIDENT_REPORT_CREATED, BLE_ALERT_CREATED
+from django.db import transaction
+from django.db.models import Count, Q
+from .statistics import alert_statistics
+from . import rollups
+from . import querysets
+from . import geo
+from . import clustering
+from .pagination import CursorError, ndjson_response, page_size_from, paginate, wants_stream
+from .row_serializers import ACCIDENT_REPORT_ROWS, BLE_ALERT_ROWS, CLOUD_ALERT_ROWS
+from .live_grid import live_incidents
+from . import sensor_wire
+from .telemetry import telemetry_archive
+import math
+import numpy as np
 import requests
 from django.conf import settings
 import uuid
 from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
+from django.urls import reverse
 from django.utils import timezone
 import json
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from .models import BLEAlert, CloudAlert
-from .serializers import BLEAlertSerializer, CloudAlertSerializer
+from .models import BLEAlert, CloudAlert, VoiceJob
+from .serializers import BLEAlertSerializer, CloudAlertSerializer, VoiceJobSerializer
 
 class AccidentReportView(APIView):
     permission_classes = [AllowAny]  # anyone can access
 
     def get(self, request):
-        reports = AccidentReport.objects.all().order_by('-timestamp')
-        serializer = AccidentReportSerializer(reports, many=True)
-        return Response({"status": True, "reports": serializer.data})
+        # Read-only fast path: values_list() rows, same output as AccidentReportSerializer
+        reports = ACCIDENT_REPORT_ROWS.rows(querysets.accident_report_list())
+        if wants_stream(request):
+            return ndjson_response(reports, ACCIDENT_REPORT_ROWS.to_representation, key=ACCIDENT_REPORT_ROWS.cursor_key)
+        try:
+            page, next_cursor = paginate(reports, request.query_params.get('cursor'), page_size_from(request),
+                                         key=ACCIDENT_REPORT_ROWS.cursor_key)
+        except CursorError as e:
+            return Response({"status": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"status": True, "reports": ACCIDENT_REPORT_ROWS.many(page), "next_cursor": next_cursor})
 
     def post(self, request):
         data = request.data
@@ -44,45 +73,171 @@ class VoiceAccidentReportView(APIView):
         latitude = request.data.get("latitude")
         longitude = request.data.get("longitude")
 
-        # Keywords for accident/emergency
-        keywords = ["accident", "help", "emergency", "crash", "injury", "collision", "hit", "ambulance", "hospital", "injured", "hurt", "bleeding", "pain", "trapped", "call police", "call ambulance", "need help", "save me", "rescue", "urgent", "critical", "dying", "unconscious"]
-        detected = any(word.lower() in voice_text.lower() for word in keywords)
+        # Whole-word match against the weighted emergency lexicon (api/keywords.py)
+        analysis = keyword_matcher.analyze(voice_text)
 
-        if detected:
+        if analysis.matches:
             # ✅ FIX: Use request.user if authenticated, otherwise None
             user = request.user if request.user.is_authenticated else None
-            
-            report = AccidentReport.objects.create(
-                user=user,
-                latitude=latitude,
-                longitude=longitude,
-                severity="high",
-                description=f"Voice detected: {voice_text}",
-                reported_via="voice"
-            )
+            report = file_voice_report(user, latitude, longitude, voice_text, analysis)
             serializer = AccidentReportSerializer(report)
-            # Trigger notification here (next step)
-            return Response({"status": True, "report": serializer.data})
+            return Response({
+                "status": True,
+                "report": serializer.data,
+                "matched_keywords": analysis.matches,
+                "severity_score": analysis.score,
+            })
         else:
             return Response({"status": False, "message": "No emergency detected in voice"})
 
 
+class VoiceAudioJobView(APIView):
+    """Accept an audio clip and transcribe it in the background (api/voice_pipeline.py)."""
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        clip = request.FILES.get("audio")
+        if clip is None:
+            return Response({"status": False, "message": "An 'audio' file is required"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        max_bytes = getattr(settings, "VOICE_MAX_CLIP_BYTES", 5 * 1024 * 1024)
+        if clip.size > max_bytes:
+            return Response({"status": False, "message": f"Audio clips are limited to {max_bytes} bytes"},
+                            status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        try:
+            latitude = float(request.data["latitude"])
+            longitude = float(request.data["longitude"])
+        except (KeyError, TypeError, ValueError):
+            return Response({"status": False, "message": "latitude and longitude are required numbers"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        # Container format for the decoder: explicit, else the file extension
+        audio_format = request.data.get("format") or clip.name.rpartition(".")[2].lower() or None
+
+        problem = voice_pipeline.problem()
+        if problem:
+            return Response({"status": False, "message": f"Voice transcription is unavailable: {problem}"},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        if transcription.needs_ffmpeg(audio_format):
+            return Response({"status": False, "message": "Only WAV clips can be decoded on this server"},
+                            status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+        user = request.user if request.user.is_authenticated else None
+        data = clip.read()
+        # The clip is stored so another worker can resume the job if this one restarts
+        job = VoiceJob.objects.create(user=user, latitude=latitude, longitude=longitude, audio=data,
+                                      audio_format=audio_format or "", **voice_pipeline.lease())
+        try:
+            voice_pipeline.submit(job.id, data, audio_format)
+        except PipelineFull:
+            job.delete()
+            return Response({"status": False, "message": "Voice pipeline is busy, retry later"},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        return Response({
+            "status": True,
+            "job_id": job.id,
+            "job_status": job.status,
+            "poll_url": request.build_absolute_uri(reverse("voice_job_detail", args=[job.id])),
+        }, status=status.HTTP_202_ACCEPTED)
+
+
+class VoiceJobDetailView(APIView):
+    """Poll a voice clip job"""
+    permission_classes = [AllowAny]
+
+    def get(self, request, job_id):
+        try:
+            job = VoiceJob.objects.get(id=job_id)
+            serializer = VoiceJobSerializer(job)
+            return Response({
+                "status": True,
+                "job": serializer.data
+            })
+        except VoiceJob.DoesNotExist:
+            return Response({
+                "status": False,
+                "message": "Voice job not found"
+            }, status=status.HTTP_404_NOT_FOUND)
+
+
+class VoicePipelineStatsView(APIView):
+    """Queue depth and per-stage timings of the voice pipeline"""
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return Response({
+            "status": True,
+            "pipeline": voice_pipeline.metrics(),
+            # Across all web workers, unlike the in-process queue_depth
+            "queued_jobs": VoiceJob.objects.filter(status="queued").count(),
+        })
+
+
 class SensorAccidentReportView(APIView):
+    """
+    Score one sensor sample. The body is JSON/form fields, or binary
+    (Content-Type: application/octet-stream) packed records as laid out in
+    api/sensor_wire.py. For binary bodies, device_id goes in the query string
+    and several consecutive samples of that device may be sent at once.
+    """
     permission_classes = [AllowAny]
 
+    def _parse_samples(self, request):
+        """(record tuples in SENSOR_COLUMNS + timestamp order, device_id)"""
+        if request.content_type == sensor_wire.CONTENT_TYPE:
+            samples = sensor_wire.decode_records(request.body).tolist()
+            return samples, request.query_params.get("device_id")
+        return sensor_wire.from_fields(request.data), request.data.get("device_id")
+
     def post(self, request):
-        # Sensor data from request
-        latitude = float(request.data.get("latitude", 0))
-        longitude = float(request.data.get("longitude", 0))
-        acc_x = float(request.data.get("acc_x", 0))
-        acc_y = float(request.data.get("acc_y", 0))
-        acc_z = float(request.data.get("acc_z", 0))
-        gyro_x = float(request.data.get("gyro_x", 0))
-        gyro_y = float(request.data.get("gyro_y", 0))
-        gyro_z = float(request.data.get("gyro_z", 0))
+        try:
+            samples, device_id = self._parse_samples(request)
+        except (ValueError, TypeError) as e:
+            return Response({"status": False, "message": f"Invalid sensor data: {e}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if not device_id and len(samples) != 1:
+            return Response({"status": False, "message": "Send several samples with a device_id, "
+                                                         "or use accidents/sensor/batch/"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        # Every sample is archived, whether or not it becomes a report
+        telemetry_archive.append(device_id, samples)
+
+        # Streaming mode: devices that send a device_id go through the
+        # sliding-window detector and only a confirmed crash is saved. The
+        # windows are per worker process (see StreamingCrashDetector)
+        if device_id:
+            detection = None
+            for latitude, longitude, *sample, timestamp in samples:
+                detected, severity, features = crash_detector.push(
+                    str(device_id), sample, None if math.isnan(timestamp) else timestamp,
+                )
+                if detected and detection is None:
+                    detection = (latitude, longitude, sample, severity)
+            if detection is None:
+                return Response({"status": True, "detected": False, "report": None, "features": features})
+
+            latitude, longitude, (acc_x, acc_y, acc_z, gyro_x, gyro_y, gyro_z), severity = detection
+            user = request.user if request.user.is_authenticated else None
+            with transaction.atomic():
+                report = AccidentReport.objects.create(
+                    user=user,
+                    latitude=latitude,
+                    longitude=longitude,
+                    severity=severity,
+                    description="Sensor data detected accident",
+                    device_id=str(device_id)[:64],
+                    acc_x=acc_x, acc_y=acc_y, acc_z=acc_z, gyro_x=gyro_x, gyro_y=gyro_y, gyro_z=gyro_z,
+                    reported_via="sensor"
+                )
+                # Duplicates of an incident already notified are stored but not fanned out
+                if clustering.claim_fanout(report, ACCIDENT_REPORT_CREATED):
+                    publish(ACCIDENT_REPORT_CREATED, report_payload(report))
+            serializer = AccidentReportSerializer(report)
+            return Response({"status": True, "detected": True, "report": serializer.data, "features": features})
+
+        latitude, longitude, acc_x, acc_y, acc_z, gyro_x, gyro_y, gyro_z, _ = samples[0]
 
         # Use ML model to predict severity
-        severity = predict_accident({
+        severity, confidence = predict_accident({
             "acc_x": acc_x,
             "acc_y": acc_y,
             "acc_z": acc_z,
@@ -95,16 +250,285 @@ class SensorAccidentReportView(APIView):
         user = request.user if request.user.is_authenticated else None
 
         # Save accident report
-        report = AccidentReport.objects.create(
-            user=user,
-            latitude=latitude,
-            longitude=longitude,
-            severity=severity,
-            description=f"Sensor data detected accident: acc_x={acc_x}, acc_y={acc_y}, acc_z={acc_z}, gyro_x={gyro_x}, gyro_y={gyro_y}, gyro_z={gyro_z}",
-            reported_via="sensor"
-        )
+        with transaction.atomic():
+            report = AccidentReport.objects.create(
+                user=user,
+                latitude=latitude,
+                longitude=longitude,
+                severity=severity,
+                description="Sensor data detected accident",
+                acc_x=acc_x, acc_y=acc_y, acc_z=acc_z, gyro_x=gyro_x, gyro_y=gyro_y, gyro_z=gyro_z,
+                reported_via="sensor"
+            )
+            if worth_notifying(severity, confidence):
+                # Duplicates of an incident already notified are stored but not fanned out
+                if clustering.claim_fanout(report, ACCIDENT_REPORT_CREATED):
+                    publish(ACCIDENT_REPORT_CREATED, report_payload(report))
         serializer = AccidentReportSerializer(report)
-        return Response({"status": True, "report": serializer.data})
+        return Response({"status": True, "report": serializer.data, "confidence": round(confidence, 4)})
+
+
+class SensorBatchAccidentReportView(APIView):
+    """
+    Score many sensor readings in one request.
+
+    Accepts either JSON:
+        {"readings": [{"latitude": .., "longitude": .., "acc_x": .., ..., "gyro_z": ..}, ...]}
+    or a binary body (Content-Type: application/octet-stream) of packed
+    little-endian float32 records laid out as SENSOR_BATCH_COLUMNS.
+    """
+    permission_classes = [AllowAny]
+
+    SENSOR_BATCH_COLUMNS = ['latitude', 'longitude'] + FEATURE_NAMES
+    MAX_READINGS = getattr(settings, "SENSOR_BATCH_MAX_READINGS", 5000)
+
+    def _parse_readings(self, request):
+        if request.content_type == "application/octet-stream":
+            body = request.body
+            record_size = 4 * len(self.SENSOR_BATCH_COLUMNS)
+            if len(body) % record_size:
+                raise ValueError(f"Binary body length must be a multiple of {record_size} bytes")
+            rows = np.frombuffer(body, dtype='<f4').reshape(-1, len(self.SENSOR_BATCH_COLUMNS))
+        else:
+            readings = request.data.get("readings", [])
+            if not isinstance(readings, list):
+                raise ValueError("'readings' must be a list")
+            for i, r in enumerate(readings):
+                missing = [col for col in self.SENSOR_BATCH_COLUMNS if r.get(col) in (None, "")]
+                if missing:
+                    raise ValueError(f"reading {i} is missing {', '.join(missing)}")
+            rows = np.array(
+                [[float(r[col]) for col in self.SENSOR_BATCH_COLUMNS] for r in readings],
+                dtype=np.float64,
+            ).reshape(-1, len(self.SENSOR_BATCH_COLUMNS))
+        bad = np.flatnonzero(~np.isfinite(rows).all(axis=1))
+        if len(bad):
+            raise ValueError(f"reading {bad[0]} has a non-finite value")
+        return rows
+
+    def post(self, request):
+        try:
+            rows = self._parse_readings(request)
+        except (ValueError, TypeError, AttributeError) as e:
+            return Response({"status": False, "message": f"Invalid readings: {e}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if len(rows) > self.MAX_READINGS:
+            return Response({"status": False, "message": f"At most {self.MAX_READINGS} readings per batch"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        telemetry_archive.append(None, rows)
+
+        # One predict_proba call for the whole (N, 6) feature matrix
+        severities, probabilities, confidences = predict_accident_batch(rows[:, 2:])
+
+        user = request.user if request.user.is_authenticated else None
+
+        # Only rows that crossed the medium threshold become reports, in one INSERT
+        accident_rows = np.flatnonzero(severities != "low")
+        reports = []
+        for i in accident_rows:
+            latitude, longitude, acc_x, acc_y, acc_z, gyro_x, gyro_y, gyro_z = rows[i].tolist()
+            reports.append(AccidentReport(
+                user=user,
+                latitude=latitude,
+                longitude=longitude,
+                severity=severities[i],
+                description="Sensor data detected accident",
+                acc_x=acc_x, acc_y=acc_y, acc_z=acc_z, gyro_x=gyro_x, gyro_y=gyro_y, gyro_z=gyro_z,
+                reported_via="sensor"
+            ))
+        if reports:
+            with transaction.atomic():
+                # bulk_create() sends no pre_save/post_save: cluster, count and track explicitly
+                clustering.assign_clusters(reports)
+                AccidentReport.objects.bulk_create(reports)
+                rollups.increment("accident", reports)
+                transaction.on_commit(lambda: live_incidents.add_reports(reports))
+                publish_many(ACCIDENT_REPORT_CREATED, [
+                    report_payload(r) for i, r in zip(accident_rows, reports)
+                    if worth_notifying(severities[i], confidences[i])
+                    and clustering.claim_fanout(r, ACCIDENT_REPORT_CREATED)
+                ])
+
+        report_ids = [None] * len(rows)
+        for i, report in zip(accident_rows, reports):
+            report_ids[i] = str(report.id)
+
+        return Response({
+            "status": True,
+            "count": len(rows),
+            "accidents": len(reports),
+            "severities": severities.tolist(),
+            "probabilities": np.round(probabilities, 4).tolist(),
+            "confidences": np.round(confidences, 4).tolist(),
+            "report_ids": report_ids,
+        })
+
+
+class ModelStatusView(APIView):
+    """
+    Active and shadow model versions, how the shadow compares on live
+    samples, and how many rows the inference cache kept from the model.
+    Staff only: it exposes the severity thresholds and pre-filter bounds.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        registry = model_registry.get()
+        shadow = registry.shadow()
+        cache = inference_cache.get()
+        return Response({
+            "status": True,
+            "active": registry.active().describe(),
+            "shadow": shadow.describe() if shadow else None,
+            # Per worker process
+            "shadow_comparison": shadow_scorer.get().report() if shadow else None,
+            "inference_cache": cache.report() if cache else None,
+        })
+
+
+class AccidentTelemetryView(APIView):
+    """
+    Raw samples the report's device sent around it, from the telemetry archive:
+        GET accidents/<id>/telemetry/[?before=30][&after=30]   (seconds, 0 to MAX_WINDOW each)
+    Columns are returned as parallel lists. Samples reach the archive
+    TELEMETRY_FLUSH_SECONDS after they arrive. Only the report's own user
+    and staff can read them.
+    """
+    permission_classes = [IsAuthenticated]
+
+    MAX_WINDOW = 3600
+    COLUMNS = ["timestamp", "sample_time", "latitude", "longitude"] + FEATURE_NAMES
+
+    def get(self, request, report_id):
+        reports = AccidentReport.objects.only("id", "timestamp", "device_id")
+        if not request.user.is_staff:
+            reports = reports.filter(user=request.user)
+        try:
+            report = reports.get(id=report_id)
+        except AccidentReport.DoesNotExist:
+            return Response({"status": False, "message": "Accident report not found"},
+                            status=status.HTTP_404_NOT_FOUND)
+        if not report.device_id:
+            return Response({"status": False, "message": "Report has no device to look up samples for"},
+                            status=status.HTTP_404_NOT_FOUND)
+        try:
+            before = float(request.query_params.get("before", 30))
+            after = float(request.query_params.get("after", 30))
+        except ValueError:
+            before = after = math.nan
+        # NaN fails both comparisons
+        if not (0 <= before <= self.MAX_WINDOW and 0 <= after <= self.MAX_WINDOW):
+            return Response({"status": False,
+                             "message": f"before and after must be between 0 and {self.MAX_WINDOW} seconds"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        at = report.timestamp.timestamp()
+        samples = telemetry_archive.read(at - before, at + after, report.device_id, self.COLUMNS)
+        return Response({
+            "status": True,
+            "report_id": str(report.id),
+            "device_id": report.device_id,
+            "count": len(samples),
+            # NaN (no device time) is not valid JSON
+            "samples": {column: [None if v != v else v for v in samples[column].tolist()]
+                        for column in self.COLUMNS},
+        })
+
+
+class NearbyIncidentsView(APIView):
+    """
+    Accident reports and BLE alerts within `radius` km of a point, nearest first:
+        GET accidents/nearby/?lat=..&lon=..[&radius=5][&hours=24][&limit=100]
+    Candidates come from the geohash cells covering the circle; exact
+    distances are computed for those only (see api/geo.py).
+    """
+    permission_classes = [AllowAny]
+
+    DEFAULT_RADIUS_KM = getattr(settings, "NEARBY_DEFAULT_RADIUS_KM", 5.0)
+    MAX_RADIUS_KM = getattr(settings, "NEARBY_MAX_RADIUS_KM", 50.0)
+    MAX_RESULTS = getattr(settings, "NEARBY_MAX_RESULTS", 100)
+
+    def _nearby(self, model, rows_serializer, latitude, longitude, radius, hours, limit):
+        candidates = querysets.nearby_candidates(model, latitude, longitude, radius, hours)
+        rows = list(rows_serializer.rows(candidates))
+        if not rows:
+            return []
+        lat_index = rows_serializer.columns.index('latitude')
+        lon_index = rows_serializer.columns.index('longitude')
+        coordinates = np.array([(row[lat_index], row[lon_index]) for row in rows], dtype=np.float64)
+        nearest, distances = geo.within_radius(
+            latitude, longitude, coordinates[:, 0], coordinates[:, 1], radius, limit)
+        results = []
+        for i, distance in zip(nearest.tolist(), distances.tolist()):
+            item = rows_serializer.to_representation(rows[i])
+            item["distance_km"] = round(distance, 3)
+            results.append(item)
+        return results
+
+    def _parse_query(self, request):
+        """(lat, lon, radius_km, hours, limit) from the query string; ValueError on bad input."""
+        try:
+            latitude = float(request.query_params['lat'])
+            longitude = float(request.query_params['lon'])
+            radius = float(request.query_params.get('radius', self.DEFAULT_RADIUS_KM))
+            hours = int(request.query_params.get('hours', 24))
+            limit = min(int(request.query_params.get('limit', self.MAX_RESULTS)), self.MAX_RESULTS)
+        except (KeyError, ValueError):
+            raise ValueError("lat and lon are required; radius, hours and limit must be numbers")
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValueError("lat/lon out of range")
+        if not 0 < radius <= self.MAX_RADIUS_KM:
+            raise ValueError(f"radius must be in (0, {self.MAX_RADIUS_KM}] km")
+        return latitude, longitude, radius, hours, limit
+
+    def get(self, request):
+        try:
+            latitude, longitude, radius, hours, limit = self._parse_query(request)
+        except ValueError as e:
+            return Response({"status": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            reports = self._nearby(AccidentReport, ACCIDENT_REPORT_ROWS, latitude, longitude, radius, hours, limit)
+            alerts = self._nearby(BLEAlert, BLE_ALERT_ROWS, latitude, longitude, radius, hours, limit)
+            return Response({
+                "status": True,
+                "radius_km": radius,
+                "reports": reports,
+                "ble_alerts": alerts,
+            })
+        except Exception as e:
+            print(f"❌ [BACKEND] Nearby query failed: {e}")
+            return Response({
+                "status": False,
+                "message": f"Failed to fetch nearby incidents: {str(e)}"
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class LiveIncidentsView(NearbyIncidentsView):
+    """
+    Incidents a device near (lat, lon) should see right now, from the in-memory
+    live grid (api/live_grid.py) rather than the database:
+        GET accidents/live/?lat=..&lon=..[&radius=5][&limit=100]
+    """
+
+    def get(self, request):
+        try:
+            latitude, longitude, radius, _, limit = self._parse_query(request)
+        except ValueError as e:
+            return Response({"status": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        now = timezone.now().timestamp()
+        incidents = [
+            {
+                **incident.payload,
+                "kind": incident.kind,
+                "distance_km": round(distance, 3),
+                "expires_in": round(incident.expires_at - now),
+            }
+            for incident, distance in live_incidents.query(latitude, longitude, radius, limit=limit)
+        ]
+        return Response({"status": True, "count": len(incidents), "incidents": incidents})
 
 
 # -------------------------------
@@ -123,15 +547,18 @@ class BLEAlertView(APIView):
             broadcast_duration = request.data.get("duration_seconds", 30)
 
             # ✅ Save BLE alert to database
-            alert = BLEAlert.objects.create(
-                latitude=latitude,
-                longitude=longitude,
-                message=message,
-                severity=severity,
-                location_name=location_name,
-                broadcast_duration=broadcast_duration,
-                status="broadcast"
-            )
+            with transaction.atomic():
+                alert = BLEAlert.objects.create(
+                    latitude=latitude,
+                    longitude=longitude,
+                    message=message,
+                    severity=severity,
+                    location_name=location_name,
+                    broadcast_duration=broadcast_duration,
+                    status="broadcast"
+                )
+                if clustering.claim_fanout(alert, BLE_ALERT_CREATED):
+                    publish(BLE_ALERT_CREATED, ble_alert_payload(alert))
 
             print(f"📡 [BACKEND] BLE Alert Created: {message}")
 
@@ -158,42 +585,45 @@ class BLEAlertListView(APIView):
         try:
             # Get query parameters for filtering
             severity = request.query_params.get('severity')
-            status = request.query_params.get('status')
+            status_filter = request.query_params.get('status')
             hours = request.query_params.get('hours', 24)  # Default last 24 hours
             
-            alerts = BLEAlert.objects.all()
-            
-            # Apply filters
-            if severity:
-                alerts = alerts.filter(severity=severity)
-            if status:
-                alerts = alerts.filter(status=status)
-            if hours:
-                time_threshold = timezone.now() - timezone.timedelta(hours=int(hours))
-                alerts = alerts.filter(timestamp__gte=time_threshold)
+            # Apply filters (see api/querysets.py)
+            active = request.query_params.get('active', '').lower() == 'true'
+            alerts = querysets.ble_alert_list(severity=severity, status=status_filter, hours=hours, active=active)
+            # Read-only fast path: values_list() rows, same output as BLEAlertSerializer
+            rows = BLE_ALERT_ROWS.rows(alerts)
+            if wants_stream(request):
+                return ndjson_response(rows, BLE_ALERT_ROWS.to_representation, key=BLE_ALERT_ROWS.cursor_key)
+            page, next_cursor = paginate(rows, request.query_params.get('cursor'), page_size_from(request),
+                                         key=BLE_ALERT_ROWS.cursor_key)
             
-            alerts = alerts.order_by('-timestamp')
-            serializer = BLEAlertSerializer(alerts, many=True)
-            
-            # Statistics
-            total_count = alerts.count()
-            high_severity_count = alerts.filter(severity='high').count()
-            medium_severity_count = alerts.filter(severity='medium').count()
-            low_severity_count = alerts.filter(severity='low').count()
+            # Statistics (single conditional-aggregation query)
+            counts = alerts.order_by().aggregate(
+                total=Count('id'),
+                high_severity=Count('id', filter=Q(severity='high')),
+                medium_severity=Count('id', filter=Q(severity='medium')),
+                low_severity=Count('id', filter=Q(severity='low')),
+                broadcast_status=Count('id', filter=Q(status='broadcast')),
+                received_status=Count('id', filter=Q(status='received')),
+            )
 
             return Response({
                 "status": True,
-                "count": total_count,
+                "count": counts['total'],
                 "statistics": {
-                    "high_severity": high_severity_count,
-                    "medium_severity": medium_severity_count,
-                    "low_severity": low_severity_count,
-                    "broadcast_status": alerts.filter(status='broadcast').count(),
-                    "received_status": alerts.filter(status='received').count(),
+                    "high_severity": counts['high_severity'],
+                    "medium_severity": counts['medium_severity'],
+                    "low_severity": counts['low_severity'],
+                    "broadcast_status": counts['broadcast_status'],
+                    "received_status": counts['received_status'],
                 },
-                "alerts": serializer.data
+                "alerts": BLE_ALERT_ROWS.many(page),
+                "next_cursor": next_cursor,
             })
 
+        except CursorError as e:
+            return Response({"status": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({
                 "status": False,
@@ -252,17 +682,24 @@ class CloudAlertView(APIView):
                 alert_message=alert_message,
                 is_emergency=is_emergency,
                 data=additional_data,
-                status="sent"
+                status="pending"
             )
 
             print(f"☁️ [BACKEND] Cloud Alert Created: {title} - {alert_message}")
 
-            # Here you would integrate with actual FCM service
-            # For now, we'll simulate successful sending
-            
+            # FCM delivery happens on the background dispatcher, which marks
+            # the row delivered/failed when it is done
+            message = "Cloud alert queued for delivery."
+            try:
+                push_engine.enqueue([alert.id])
+            except RuntimeError as e:
+                # The row stays pending; manage.py deliver_push sweeps it up
+                print(f"❌ [BACKEND] {e}")
+                message = "Cloud alert saved; it will be sent once push delivery is available."
+
             return Response({
                 "status": True,
-                "message": "Cloud alert sent successfully.",
+                "message": message,
                 "alert_id": str(alert.id),
                 "data": CloudAlertSerializer(alert).data
             }, status=status.HTTP_201_CREATED)
@@ -282,43 +719,49 @@ class CloudAlertListView(APIView):
     def get(self, request):
         try:
             # Get query parameters for filtering
-            status = request.query_params.get('status')
+            status_filter = request.query_params.get('status')
             is_emergency = request.query_params.get('is_emergency')
             hours = request.query_params.get('hours', 24)
             
-            alerts = CloudAlert.objects.all()
-            
-            # Apply filters
-            if status:
-                alerts = alerts.filter(status=status)
-            if is_emergency is not None:
-                alerts = alerts.filter(is_emergency=is_emergency.lower() == 'true')
-            if hours:
-                time_threshold = timezone.now() - timezone.timedelta(hours=int(hours))
-                alerts = alerts.filter(timestamp__gte=time_threshold)
-            
-            alerts = alerts.order_by('-timestamp')
-            serializer = CloudAlertSerializer(alerts, many=True)
+            # Apply filters (see api/querysets.py)
+            alerts = querysets.cloud_alert_list(
+                status=status_filter,
+                is_emergency=None if is_emergency is None else is_emergency.lower() == 'true',
+                hours=hours,
+            )
+            # Read-only fast path: values_list() rows, same output as CloudAlertSerializer
+            rows = CLOUD_ALERT_ROWS.rows(alerts)
+            if wants_stream(request):
+                return ndjson_response(rows, CLOUD_ALERT_ROWS.to_representation, key=CLOUD_ALERT_ROWS.cursor_key)
+            page, next_cursor = paginate(rows, request.query_params.get('cursor'), page_size_from(request),
+                                         key=CLOUD_ALERT_ROWS.cursor_key)
             
-            # Statistics
-            total_count = alerts.count()
-            emergency_count = alerts.filter(is_emergency=True).count()
-            sent_count = alerts.filter(status='sent').count()
-            delivered_count = alerts.filter(status='delivered').count()
-            failed_count = alerts.filter(status='failed').count()
+            # Statistics (single conditional-aggregation query)
+            counts = alerts.order_by().aggregate(
+                total=Count('id'),
+                emergency_alerts=Count('id', filter=Q(is_emergency=True)),
+                pending=Count('id', filter=Q(status='pending')),
+                sent=Count('id', filter=Q(status='sent')),
+                delivered=Count('id', filter=Q(status='delivered')),
+                failed=Count('id', filter=Q(status='failed')),
+            )
 
             return Response({
                 "status": True,
-                "count": total_count,
+                "count": counts['total'],
                 "statistics": {
-                    "emergency_alerts": emergency_count,
-                    "sent": sent_count,
-                    "delivered": delivered_count,
-                    "failed": failed_count,
+                    "emergency_alerts": counts['emergency_alerts'],
+                    "pending": counts['pending'],
+                    "sent": counts['sent'],
+                    "delivered": counts['delivered'],
+                    "failed": counts['failed'],
                 },
-                "alerts": serializer.data
+                "alerts": CLOUD_ALERT_ROWS.many(page),
+                "next_cursor": next_cursor,
             })
 
+        except CursorError as e:
+            return Response({"status": False, "message": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             return Response({
                 "status": False,
@@ -356,60 +799,10 @@ class AlertStatisticsView(APIView):
 
     def get(self, request):
         try:
-            # Time ranges for statistics
-            now = timezone.now()
-            today = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            last_24_hours = now - timezone.timedelta(hours=24)
-            last_7_days = now - timezone.timedelta(days=7)
-
-            # BLE Alert Statistics
-            ble_total = BLEAlert.objects.count()
-            ble_today = BLEAlert.objects.filter(timestamp__gte=today).count()
-            ble_24h = BLEAlert.objects.filter(timestamp__gte=last_24_hours).count()
-            ble_7d = BLEAlert.objects.filter(timestamp__gte=last_7_days).count()
-
-            # Cloud Alert Statistics
-            cloud_total = CloudAlert.objects.count()
-            cloud_today = CloudAlert.objects.filter(timestamp__gte=today).count()
-            cloud_24h = CloudAlert.objects.filter(timestamp__gte=last_24_hours).count()
-            cloud_7d = CloudAlert.objects.filter(timestamp__gte=last_7_days).count()
-
-            # Severity breakdown
-            high_severity = BLEAlert.objects.filter(severity='high').count()
-            medium_severity = BLEAlert.objects.filter(severity='medium').count()
-            low_severity = BLEAlert.objects.filter(severity='low').count()
-
-            # Emergency alerts
-            emergency_alerts = CloudAlert.objects.filter(is_emergency=True).count()
-
+            # One conditional-aggregation query per table (see api/statistics.py)
             return Response({
                 "status": True,
-                "statistics": {
-                    "ble_alerts": {
-                        "total": ble_total,
-                        "today": ble_today,
-                        "last_24_hours": ble_24h,
-                        "last_7_days": ble_7d,
-                        "severity_breakdown": {
-                            "high": high_severity,
-                            "medium": medium_severity,
-                            "low": low_severity
-                        }
-                    },
-                    "cloud_alerts": {
-                        "total": cloud_total,
-                        "today": cloud_today,
-                        "last_24_hours": cloud_24h,
-                        "last_7_days": cloud_7d,
-                        "emergency_alerts": emergency_alerts,
-                        "status_breakdown": {
-                            "sent": CloudAlert.objects.filter(status='sent').count(),
-                            "delivered": CloudAlert.objects.filter(status='delivered').count(),
-                            "failed": CloudAlert.objects.filter(status='failed').count()
-                        }
-                    },
-                    "total_alerts": ble_total + cloud_total
-                }
+                "statistics": alert_statistics()
             })
 
         except Exception as e:
@@ -451,16 +844,19 @@ def emergency_notify(request):
         # ✅ FIX: Use request.user if authenticated, otherwise None
         user = request.user if request.user.is_authenticated else None
 
-        report = AccidentReport.objects.create(
-            id=uuid.uuid4(),
-            user=user,
-            latitude=latitude,
-            longitude=longitude,
-            severity=severity,
-            description=description,
-            reported_via=reported_via,
-            timestamp=timezone.now()
-        )
+        with transaction.atomic():
+            report = AccidentReport.objects.create(
+                id=uuid.uuid4(),
+                user=user,
+                latitude=latitude,
+                longitude=longitude,
+                severity=severity,
+                description=description,
+                reported_via=reported_via,
+                timestamp=timezone.now()
+            )
+            if clustering.claim_fanout(report, ACCIDENT_REPORT_CREATED):
+                publish(ACCIDENT_REPORT_CREATED, report_payload(report))
 
         response_data = {
             "success": True,
@@ -0,0 +1,295 @@
+"""
+Server-side transcription of voice clips.
+
+VoiceAudioJobView stores a VoiceJob, hands the clip to `voice_pipeline` and
+returns 202 with the job id straight away. Decoding and offline speech
+recognition (api/transcription.py) run in a bounded process pool, so they
+use other cores and never hold a request thread. When a transcript comes
+back, a finisher thread in this process runs the keyword/severity stage
+(api/keywords.py), files a voice AccidentReport if an emergency was heard
+and completes the job. The report's outbox event fans out the push, and
+clients can also poll accidents/voice/jobs/<id>/.
+
+At most VOICE_MAX_PENDING clips are queued or in flight per web worker;
+beyond that `submit` raises PipelineFull and the view answers 503 instead
+of queueing without bound. `metrics()` reports the queue depth and timing
+percentiles of every stage.
+
+Pool workers are started with "forkserver" rather than forked from a web
+worker that already runs background threads (outbox, push, live grid).
+
+The clip is stored with its job, and the web worker transcribing it holds a
+lease of VOICE_JOB_LEASE_SECONDS on the row that it keeps renewing. Each
+worker's lease keeper (started at boot from gunicorn.conf.py, or on first
+submit) claims queued jobs whose lease ran out because their worker
+restarted or died, and transcribes them again. Claims use the conditional
+UPDATE of api/outbox.py. If the configured recognizer cannot run here (see
+`problem()`), the view answers 503 rather than queueing jobs that would
+never finish.
+"""
+import multiprocessing
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import clustering
+from . import transcription
+from .keywords import keyword_matcher
+from .models import AccidentReport, VoiceJob
+from .outbox import ACCIDENT_REPORT_CREATED, publish, report_payload
+
+STAGES = ("queue", "decode", "transcribe", "analyze", "save")
+
+
+class PipelineFull(Exception):
+    pass
+
+
+def file_voice_report(user, latitude, longitude, voice_text, analysis):
+    """Save a voice AccidentReport for a transcript with an emergency and publish it."""
+    # Notification fan-out is recorded in the same transaction and
+    # sent by the outbox dispatcher, off the request thread
+    with transaction.atomic():
+        report = AccidentReport.objects.create(
+            user=user,
+            latitude=latitude,
+            longitude=longitude,
+            severity=analysis.severity,
+            description=f"Voice detected: {voice_text}",
+            reported_via="voice"
+        )
+        # Duplicates of an incident already notified are stored but not fanned out
+        if clustering.claim_fanout(report, ACCIDENT_REPORT_CREATED):
+            publish(ACCIDENT_REPORT_CREATED, report_payload(report))
+    return report
+
+
+def complete_job(job_id, transcript, timings):
+    """Keyword/severity stage and database writes for a transcribed clip."""
+    t0 = time.perf_counter()
+    analysis = keyword_matcher.analyze(transcript)
+    t1 = time.perf_counter()
+    timings["analyze"] = (t1 - t0) * 1000
+
+    job = VoiceJob.objects.select_related("user").get(id=job_id)
+    if job.status != "queued":
+        return  # a worker that resumed it after our lease lapsed got there first
+    report = None
+    if analysis.matches and job.latitude is not None and job.longitude is not None:
+        report = file_voice_report(job.user, job.latitude, job.longitude, transcript, analysis)
+    timings["save"] = (time.perf_counter() - t1) * 1000
+
+    VoiceJob.objects.filter(id=job_id).update(
+        status="done",
+        audio=None,
+        locked_until=None,
+        transcript=transcript,
+        matched_keywords=analysis.matches,
+        severity=analysis.severity,
+        severity_score=analysis.score,
+        report=report,
+        timings={stage: round(ms, 2) for stage, ms in timings.items()},
+        completed_at=timezone.now(),
+    )
+
+
+class VoicePipeline:
+    """Process pool for transcription plus one finisher thread for the database stage."""
+
+    def __init__(self, workers=2, max_pending=32, backend="sphinx", model_path=None, lease_seconds=60,
+                 history=1000):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.backend = backend
+        self.model_path = model_path
+        self.lease_seconds = lease_seconds
+        self.worker_id = uuid.uuid4().hex
+        self._executor = None
+        self._finisher = None
+        self._keeper = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._jobs = set()  # ids in flight in this process, whose leases we renew
+        self._problem = None
+        self._checked = False
+        self._timings = defaultdict(lambda: deque(maxlen=history))
+        self.stats = defaultdict(int)
+
+    def problem(self):
+        """Why the recognizer cannot run in this environment (checked once), or None."""
+        if not self._checked:
+            self._problem = transcription.backend_problem(self.backend, self.model_path)
+            self._checked = True
+            if self._problem:
+                print(f"⚠️ [BACKEND] Voice transcription unavailable: {self._problem}")
+        return self._problem
+
+    def lease(self):
+        """Field values that lease a VoiceJob to this worker."""
+        return {"locked_by": self.worker_id,
+                "locked_until": timezone.now() + timezone.timedelta(seconds=self.lease_seconds)}
+
+    def _pools(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("forkserver"),
+                    initializer=transcription.init_worker,
+                    initargs=(self.backend, self.model_path),
+                )
+            if self._finisher is None:
+                self._finisher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="voice-finish")
+            return self._executor, self._finisher
+
+    def submit(self, job_id, data, audio_format=None):
+        """Queue a clip for transcription; raises PipelineFull when the queue is at capacity."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.stats["rejected"] += 1
+                raise PipelineFull(f"{self._pending} voice clips already pending")
+            self._pending += 1
+            self._jobs.add(job_id)
+        try:
+            executor, finisher = self._pools()
+            future = executor.submit(transcription.transcribe_clip, data, audio_format, time.time())
+        except Exception:
+            self._done(job_id)
+            raise
+        self.stats["submitted"] += 1
+        future.add_done_callback(lambda f: finisher.submit(self._finish, job_id, f))
+        self.start()
+
+    def _done(self, job_id):
+        with self._lock:
+            self._pending -= 1
+            self._jobs.discard(job_id)
+
+    def _finish(self, job_id, future):
+        timings = {}
+        try:
+            close_old_connections()
+            transcript, timings = future.result()
+            complete_job(job_id, transcript, timings)
+            self.stats["completed"] += 1
+        except Exception as e:
+            self.stats["failed"] += 1
+            print(f"❌ [BACKEND] Voice job {job_id} failed: {e}")
+            if isinstance(e, BrokenProcessPool):
+                # A worker died (e.g. out of memory); start a fresh pool on the next submit
+                with self._lock:
+                    self._executor = None
+            try:
+                VoiceJob.objects.filter(id=job_id).update(status="failed", error=str(e), audio=None,
+                                                          locked_until=None, completed_at=timezone.now())
+            except Exception as db_error:
+                print(f"❌ [BACKEND] Could not mark voice job {job_id} failed: {db_error}")
+        finally:
+            self._done(job_id)
+            for stage, ms in timings.items():
+                self._timings[stage].append(ms)
+
+    # -- leases ---------------------------------------------------------------
+
+    def start(self):
+        """Start the lease keeper thread, which also resumes abandoned jobs; no-op if already running."""
+        if self.problem():
+            return
+        with self._lock:
+            if self._keeper is None or not self._keeper.is_alive():
+                self._keeper = threading.Thread(target=self._keep_leases, name="voice-leases", daemon=True)
+                self._keeper.start()
+
+    def _keep_leases(self):
+        while True:
+            try:
+                close_old_connections()
+                self.renew_leases()
+                self.resume_abandoned()
+            except Exception as e:
+                print(f"❌ [BACKEND] Voice job lease keeper error: {e}")
+            time.sleep(self.lease_seconds / 3)
+
+    def renew_leases(self):
+        with self._lock:
+            ids = list(self._jobs)
+        if ids:
+            VoiceJob.objects.filter(id__in=ids, status="queued").update(**self.lease())
+
+    def resume_abandoned(self):
+        """Claim queued jobs whose lease expired and transcribe them here; returns how many."""
+        free = self.max_pending - self._pending
+        if free <= 0:
+            return 0
+        now = timezone.now()
+        due = (VoiceJob.objects
+               .filter(status="queued", audio__isnull=False)
+               .filter(Q(locked_until__isnull=True) | Q(locked_until__lt=now))
+               .exclude(id__in=list(self._jobs)))
+        ids = list(due.order_by("created_at").values_list("id", flat=True)[:free])
+        if not ids:
+            return 0
+        # The lease condition is re-checked in the UPDATE, so a worker that
+        # raced us on the SELECT simply gets fewer jobs
+        due.filter(id__in=ids).update(**self.lease())
+        resumed = 0
+        jobs = VoiceJob.objects.filter(id__in=ids, locked_by=self.worker_id).only("id", "audio", "audio_format")
+        for job in jobs:
+            try:
+                self.submit(job.id, bytes(job.audio), job.audio_format or None)
+            except PipelineFull:
+                break  # the lease runs out and another worker (or we, later) picks it up
+            resumed += 1
+        if resumed:
+            self.stats["resumed"] += resumed
+            print(f"🔄 [BACKEND] Resumed {resumed} abandoned voice jobs")
+        return resumed
+
+    def pending(self):
+        return self._pending
+
+    def metrics(self):
+        """Queue depth, counters and per-stage timing percentiles (ms) for this process."""
+        timings = {}
+        for stage in STAGES:
+            samples = np.fromiter(self._timings[stage], dtype=float)
+            if len(samples):
+                p50, p95 = np.percentile(samples, [50, 95])
+                timings[stage] = {"count": len(samples), "p50": round(p50, 2),
+                                  "p95": round(p95, 2), "max": round(samples.max(), 2)}
+        return {
+            "backend": self.backend,
+            "workers": self.workers,
+            "queue_depth": self._pending,
+            "max_pending": self.max_pending,
+            "problem": self.problem(),
+            **{key: self.stats[key] for key in ("submitted", "completed", "failed", "rejected", "resumed")},
+            "timings_ms": timings,
+        }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, finisher = self._executor, self._finisher
+            self._executor = self._finisher = None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+        if finisher is not None:
+            finisher.shutdown(wait=wait)
+
+
+voice_pipeline = VoicePipeline(
+    workers=getattr(settings, "VOICE_WORKERS", 2),
+    max_pending=getattr(settings, "VOICE_MAX_PENDING", 32),
+    backend=getattr(settings, "VOICE_RECOGNIZER", "sphinx"),
+    model_path=getattr(settings, "VOICE_VOSK_MODEL", None),
+    lease_seconds=getattr(settings, "VOICE_JOB_LEASE_SECONDS", 60),
+)
@@ -0,0 +1,40 @@
+"""
+Gunicorn settings, picked up automatically from the working directory.
+
+The ML model and push clients load lazily (api/lazy.py). By default each
+worker warms them right after it boots so the first request does not pay
+for the load. With GUNICORN_PRELOAD=True the app is imported once in the
+master and warmed there, and forked workers share those pages. With
+INFERENCE_SOCKET set the workers use the shared inference sidecar
+(manage.py inference_server) and only load the model as a fallback.
+Each worker also starts its outbox dispatcher (api/outbox.py) and its voice
+job lease keeper (api/voice_pipeline.py).
+"""
+import os
+
+preload_app = os.environ.get("GUNICORN_PRELOAD", "False") == "True"
+WARM_UP = os.environ.get("WARM_UP_MODELS", "True") == "True"
+
+
+def _warm_up(log):
+    from api.lazy import warm_up
+
+    timings = warm_up("inference_client" if os.environ.get("INFERENCE_SOCKET") else "accident_model")
+    log.info("Warmed up: %s", ", ".join(f"{name} {secs * 1000:.1f} ms" for name, secs in timings.items() if secs))
+
+
+def when_ready(server):
+    if WARM_UP and preload_app:
+        _warm_up(server.log)
+
+
+def post_worker_init(worker):
+    if WARM_UP and not preload_app:
+        _warm_up(worker.log)
+    # Drains outbox events left by a previous process; checks the voice
+    # recognizer and resumes clips whose worker went away
+    from api.outbox import outbox_dispatcher
+    from api.voice_pipeline import voice_pipeline
+
+    outbox_dispatcher.wake()
+    voice_pipeline.start()